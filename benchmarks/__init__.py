@@ -0,0 +1,3 @@
+"""
+Init file
+"""
\ No newline at end of file
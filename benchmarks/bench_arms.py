@@ -0,0 +1,109 @@
+"""
+Memory and draw microbenchmarks of :class:`core.arms.discrete_arm.DiscreteArm` against the previous arm, which copied
+its values, computed all its statistics eagerly in an instance ``__dict__`` and drew with ``numpy.random.choice``.
+
+The memory of an arm is traced (with :mod:`tracemalloc`) while building many arms over one shared buffer of values,
+so it does not count the buffer itself.
+
+Run with ``python -m benchmarks.bench_arms``.
+"""
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.bench_selection import best_time
+from core.arms.discrete_arm import DiscreteArm
+from core.utils.objective_function_util import discounted_rewards
+
+#: Number of arms built for the memory measures
+NB_ARMS = 20000
+#: Numbers of values of each arm
+SIZES = [10, 100, 1000]
+
+
+class DiscreteArmPrevious(object):
+    """ Previous DiscreteArm."""
+
+    def __init__(self, placement_id, values):
+        self._placement_id = placement_id
+        self._values = values if isinstance(values, np.ndarray) else values.copy()
+        self._lower = min(self._values)
+        self._magnitude = max(self._values) - self._lower
+        self.mean = np.mean(self._values)
+        self.median = np.median(self._values)
+        self.sum = np.sum(discounted_rewards(self._values))
+        self.consumption = np.sum(self._values)
+        self.size = len(self._values)
+
+    def draw(self, t=None):
+        """ Draw one sample."""
+        return np.random.choice(self._values)
+
+    def draw_nparray(self, shape=(1,)):
+        """ Draw a numpy array of random samples."""
+        return np.asarray(np.random.choice(self._values, replace=True, size=shape))
+
+
+def bytes_per_arm(build, nb_arms=NB_ARMS):
+    """
+    Traced memory allocated to build the arms, divided by their number
+    :param build: function of the index of an arm, returning the arm
+    :param nb_arms: number of arms
+    :return: float, bytes
+    """
+    tracemalloc.start()
+    arms = [build(k) for k in range(nb_arms)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del arms
+    return current / nb_arms
+
+
+def main():
+    """
+    Prints the memory of an arm and the timings of its construction and draws, previous and new
+    :return: None
+    """
+    rng = np.random.default_rng(42)
+    print("{:>6} {:>22} {:>14} {:>14} {:>14}".format("values", "arm", "bytes / arm", "build (us)", "stats (us)"))
+    for size in SIZES:
+        buffer = rng.poisson(3., size=size * NB_ARMS // 10).astype(np.int32)
+        nb_slices = buffer.shape[0] // size
+        views = [buffer[k * size:(k + 1) * size] for k in range(nb_slices)]
+        lists = [view.tolist() for view in views[:100]]
+        cases = [
+            ("previous, list", lambda k: DiscreteArmPrevious(k, lists[k % 100])),
+            ("previous, view", lambda k: DiscreteArmPrevious(k, views[k % nb_slices])),
+            ("new, view", lambda k: DiscreteArm(k, views[k % nb_slices])),
+        ]
+        for name, build in cases:
+            nb_arms = NB_ARMS if size < 1000 else NB_ARMS // 10
+            memory = bytes_per_arm(build, nb_arms)
+            build_time = best_time(lambda: build(0), number=200)
+            # All the statistics a MAB reads from an arm, after its construction
+            stats_time = best_time(lambda: (lambda arm: (arm.mean, arm.sum, arm.size, arm.consumption))(build(0)),
+                                   number=200)
+            print("{:>6} {:>22} {:>14.0f} {:>14.4g} {:>14.4g}".format(size, name, memory, build_time, stats_time))
+
+    print("\n{:>6} {:>8} {:>14} {:>14} {:>14} {:>10}".format("values", "draws", "previous (us)", "new (us)",
+                                                             "new rng (us)", "speedup"))
+    for size in SIZES:
+        values = rng.poisson(3., size=size).astype(np.int32)
+        previous = DiscreteArmPrevious(0, values.tolist())
+        arm = DiscreteArm(0, values)
+        arm_rng = DiscreteArm(0, values, rng=np.random.default_rng(0))
+        for shape in [None, (1000,)]:
+            if shape is None:
+                previous_time = best_time(previous.draw, number=2000)
+                new_time = best_time(arm.draw, number=2000)
+                rng_time = best_time(arm_rng.draw, number=2000)
+            else:
+                previous_time = best_time(lambda: previous.draw_nparray(shape), number=500)
+                new_time = best_time(lambda: arm.draw_nparray(shape), number=500)
+                rng_time = best_time(lambda: arm_rng.draw_nparray(shape), number=500)
+            print("{:>6} {:>8} {:>14.4g} {:>14.4g} {:>14.4g} {:>9.1f}x".format(
+                size, 1 if shape is None else shape[0], previous_time, new_time, rng_time, previous_time / rng_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Microbenchmarks of one BESA tournament: the recursive :func:`besa_k_actions` against the round by round
+:func:`besa_k_actions__vectorized`, on the reward history of a :class:`BESA` policy, and of the ranked choice of
+:meth:`BESA.choice_with_rank`.
+
+Run with ``python -m benchmarks.bench_besa``.
+"""
+import numpy as np
+
+from benchmarks.bench_selection import best_time
+from core.policies.besa import BESA, besa_k_actions, besa_k_actions__vectorized
+from core.policies.reward_store import RewardStore
+
+#: Numbers of arms
+NB_ARMS = [3, 5, 10, 20, 50]
+#: Range of the number of pulls of each arm
+PULLS = (50, 500)
+#: Rank of the ranked choices
+RANK = 5
+
+
+def reward_store(nb_arms, rng, pulls_range=PULLS):
+    """
+    Returns a reward store with a random number of Poisson sales for each arm
+    :param nb_arms:
+    :param rng:
+    :param pulls_range: range of the number of pulls of each arm
+    :return: RewardStore
+    """
+    store = RewardStore(nb_arms)
+    for arm, pulls in enumerate(rng.integers(*pulls_range, size=nb_arms)):
+        store.replace(arm, rng.poisson(3. + arm / nb_arms, size=pulls).astype(float))
+    return store
+
+
+def main():
+    """
+    Prints the timings of one tournament of each implementation
+    :return: None
+    """
+    rng = np.random.default_rng(42)
+    print("{:>6} {:>14} {:>16} {:>10}".format("arms", "recursive (us)", "vectorized (us)", "speedup"))
+    for nb_arms in NB_ARMS:
+        store = reward_store(nb_arms, rng)
+        actions = rng.permutation(nb_arms)
+        recursive_time = best_time(lambda: besa_k_actions(store, store.counts, actions), number=200)
+        vectorized_time = best_time(lambda: besa_k_actions__vectorized(store, store.counts, actions), number=200)
+        print("{:>6} {:>14.4g} {:>16.4g} {:>9.1f}x".format(
+            nb_arms, recursive_time, vectorized_time, recursive_time / vectorized_time))
+
+    # Ranked choice, from repeated tournaments or from one shared tournament
+    print("\n{:>6} {:>6} {:>14} {:>16} {:>10}".format("arms", "rank", "repeated (us)", "shared (us)", "speedup"))
+    for nb_arms in NB_ARMS[1:]:
+        store = reward_store(nb_arms, rng)
+        times = []
+        for vectorized in (False, True):
+            policy = BESA(nb_arms, vectorized=vectorized)
+            policy.all_rewards, policy.pulls = store, store.counts.copy()
+            times.append(best_time(lambda: policy.choice_with_rank(RANK), number=50))
+        print("{:>6} {:>6} {:>14.4g} {:>16.4g} {:>9.1f}x".format(nb_arms, RANK, times[0], times[1],
+                                                                 times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark of :func:`core.utils.objective_function_util.discounted_rewards` against the previous implementation,
+which evaluated one ``np.poly1d`` per prefix of the history.
+
+Run with ``python -m benchmarks.bench_discounted_rewards``.
+"""
+import timeit
+
+import numpy as np
+
+from core.utils.objective_function_util import discount_factor, discounted_rewards, next_discounted_reward
+
+#: Sizes of the histories, in days
+SIZES = [1000, 10000, 100000]
+#: Above this size the quadratic implementation is not run, its time is extrapolated from the largest size run
+MAX_REFERENCE_SIZE = 10000
+
+
+def discounted_rewards_poly1d(credit_consumption):
+    """
+    Previous, quadratic, implementation of the discounted rewards
+    :param credit_consumption:
+    :return: list
+    """
+    credit_consumed = np.array(credit_consumption)
+    rewards = []
+    for index in range(credit_consumed.shape[0]):
+        cc_discountfactor = credit_consumed[0:index + 1] * discount_factor
+        p = np.poly1d(cc_discountfactor)
+        rewards.append(p(1 - discount_factor))
+    return rewards
+
+
+def best_time(function, number=1, repeat=3):
+    """
+    Returns the best time of one call to the function, in seconds
+    :param function:
+    :param number:
+    :param repeat:
+    :return: float
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def main():
+    """
+    Prints the timings of both implementations and checks they agree
+    :return: None
+    """
+    rng = np.random.default_rng(42)
+    reference_size, reference_time = None, None
+    print("{:>8} {:>14} {:>14} {:>10}".format("days", "poly1d (s)", "linear (s)", "speedup"))
+    for size in SIZES:
+        consumption = rng.integers(0, 500, size=size)
+        linear_time = best_time(lambda: discounted_rewards(consumption), number=10)
+        if size <= MAX_REFERENCE_SIZE:
+            np.testing.assert_allclose(discounted_rewards(consumption), discounted_rewards_poly1d(consumption))
+            reference_size = size
+            reference_time = best_time(lambda: discounted_rewards_poly1d(consumption), repeat=1)
+            poly1d_time, estimated = reference_time, ""
+        else:
+            poly1d_time, estimated = reference_time * (size / reference_size) ** 2, " (estimated)"
+        print("{:>8} {:>14.4g} {:>14.4g} {:>10.0f}x{}".format(
+            size, poly1d_time, linear_time, poly1d_time / linear_time, estimated))
+
+    # Appending one day to a history costs O(1)
+    consumption = rng.integers(0, 500, size=SIZES[-1])
+    rewards = discounted_rewards(consumption[:-1])
+    np.testing.assert_allclose(next_discounted_reward(rewards[-1], consumption[-1]),
+                               discounted_rewards(consumption)[-1])
+    np.testing.assert_allclose(discounted_rewards(consumption[-10:], initial=rewards[-10]),
+                               discounted_rewards(consumption)[-10:])
+    print("one more day: {:.3g} s".format(best_time(lambda: next_discounted_reward(rewards[-1], consumption[-1]),
+                                                    number=1000)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Microbenchmarks of the Kullback-Leibler divergences of :mod:`core.arms.kullback` and of the index formulas of
+:mod:`core.policies.kernels`: a Python loop over the arms, the NumPy versions, and the Numba ufuncs (if Numba is
+installed).
+
+Run with ``python -m benchmarks.bench_kernels``.
+"""
+import numpy as np
+
+from benchmarks.bench_selection import best_time
+from core.arms import kullback
+from core.policies import kernels
+from core.utils.jit_util import USE_NUMBA
+
+#: Numbers of arms
+NB_ARMS = [10, 1000, 100000, 1000000]
+
+
+def kl_cases(x, y):
+    """
+    Returns the KL divergences to time: name, Python loop, NumPy version and compiled version
+    :param x:
+    :param y:
+    :return: list of tuple
+    """
+    cases = []
+    for name in ("bern", "poisson", "exp"):
+        scalar = getattr(kullback, "_kl_" + name)
+        numpy_version = getattr(kullback, "kl_{}_numpy".format(name))
+        compiled = getattr(kullback, "_kl_{}_ufunc".format(name))
+        cases.append(("kl_" + name, lambda scalar=scalar: [scalar(a, b) for a, b in zip(x, y)],
+                      lambda numpy_version=numpy_version: numpy_version(x, y),
+                      lambda compiled=compiled: compiled(x, y)))
+    return cases
+
+
+def index_cases(rewards, rewards_squared, pulls, t):
+    """
+    Returns the index formulas to time: name, Python loop, NumPy version and compiled version
+    :param rewards:
+    :param rewards_squared:
+    :param pulls:
+    :param t:
+    :return: list of tuple
+    """
+    return [
+        ("ucb", lambda: [kernels._ucb_index(r, n, t) for r, n in zip(rewards, pulls)],
+         lambda: kernels.ucb_index_numpy(rewards, pulls, t), lambda: kernels.ucb_index(rewards, pulls, t)),
+        ("ucbv", lambda: [kernels._ucbv_index(r, s, n, t, 1.) for r, s, n in zip(rewards, rewards_squared, pulls)],
+         lambda: kernels.ucbv_index_numpy(rewards, rewards_squared, pulls, t, 1.),
+         lambda: kernels.ucbv_index(rewards, rewards_squared, pulls, t, 1.)),
+        ("ucbv_tuned", lambda: [kernels._ucbv_tuned_index(r, s, n, t)
+                                for r, s, n in zip(rewards, rewards_squared, pulls)],
+         lambda: kernels.ucbv_tuned_index_numpy(rewards, rewards_squared, pulls, t),
+         lambda: kernels.ucbv_tuned_index(rewards, rewards_squared, pulls, t)),
+    ]
+
+
+def main():
+    """
+    Prints the timings of each kernel, in microseconds
+    :return: None
+    """
+    rng = np.random.default_rng(42)
+    print("Numba: {}".format("installed" if USE_NUMBA else "not installed, the compiled kernels are the NumPy ones"))
+    print("{:>10} {:>8} {:>14} {:>12} {:>14} {:>12}".format(
+        "kernel", "arms", "loop (us)", "numpy (us)", "compiled (us)", "loop/numpy"))
+    for nb_arms in NB_ARMS:
+        x, y = rng.random(nb_arms), rng.random(nb_arms)
+        pulls = rng.integers(1, 1000, size=nb_arms).astype(float)
+        rewards = x * pulls
+        rewards_squared = rewards * x + 0.01 * pulls
+        number = max(1, 100000 // nb_arms)
+        for name, loop, numpy_version, compiled in kl_cases(x, y) + index_cases(rewards, rewards_squared, pulls,
+                                                                                np.sum(pulls)):
+            loop_time = best_time(loop, number=max(1, number // 10), repeat=3)
+            numpy_time = best_time(numpy_version, number=number, repeat=3)
+            compiled_time = best_time(compiled, number=number, repeat=3)
+            print("{:>10} {:>8} {:>14.4g} {:>12.4g} {:>14.4g} {:>11.0f}x".format(
+                name, nb_arms, loop_time, numpy_time, compiled_time, loop_time / numpy_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmarks of the allocation pipeline, stage by stage and end to end, on synthetic demand histories of 10^3 to 10^7
+rows (see :mod:`benchmarks.synthetic`): the wall time of each stage and its peak memory (traced by :mod:`tracemalloc`,
+in a run of its own so the tracing does not slow the timed runs).
+
+- csv load: :func:`read_demand_csv` of the whole file,
+- demand store: the index of the history (:func:`set_demand_history`),
+- demand by price, arms + MAB, UCBVtuned index / choice, BESA tournament: for each of the first products, the
+  historical demand of :func:`get_historical_demand_by_price`, the :class:`DiscreteArm` and the :class:`MAB` of the
+  product, the indexes and the choice of a :class:`UCBVtuned` policy, the tournament of a :class:`BESA` policy,
+- discounted rewards: :func:`discounted_rewards` of the whole consumption column,
+- start: the full run of :func:`core.main.start`, in one process.
+
+Run with ``python -m benchmarks.bench_pipeline``, or ``python -m benchmarks.bench_pipeline 1000 100000`` for some
+sizes only (the 10^7 rows take a few minutes and a few GB).
+"""
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import date
+
+from benchmarks.synthetic import write_demand_csv
+from core.arms import DiscreteArm
+from core.environment.mab import MAB
+from core.main import start
+from core.policies import BESA, UCBVtuned
+from core.policies.reward_store import RewardStore
+from core.utils.objective_function_util import discounted_rewards
+from core.utils.transformations_util import clear_demand_store, get_historical_demand_by_price, read_demand_csv, \
+    set_demand_history
+from definitions import HISTORICAL_DEMAND_CONSUMPTION
+
+#: Numbers of rows of the synthetic histories
+ROWS = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+#: Number of products of the per product stages
+NB_PRODUCTS = 100
+
+
+def measure(function, repeat=3):
+    """
+    Returns the best wall time of one call to the function, and the peak memory it allocates in one more, traced, call
+    :param function:
+    :param repeat:
+    :return: tuple, (seconds, bytes)
+    """
+    seconds = min(timeit.repeat(function, number=1, repeat=repeat))
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def product_stages(store, today, nb_products=NB_PRODUCTS):
+    """
+    Returns the per product stages to measure, on the first products of the demand store
+    :param store: DemandStore
+    :param today: date of the experiments
+    :param nb_products:
+    :return: list of tuple, (name, function)
+    """
+    products = store.index.products()[:nb_products]
+    histories = [[store.consumption(id, product_type, placement_id, today)
+                  for placement_id in store.placement_ids(id, product_type)] for id, product_type in products]
+
+    environments = [MAB([DiscreteArm(k, values) for k, values in enumerate(history)]) for history in histories]
+    index_policies = []
+    for environment in environments:
+        policy = UCBVtuned(environment.nbArms)
+        policy.t, policy.pulls = environment.t, environment.pulls
+        policy.rewards, policy.rewardsSquared = environment.rewards, environment.rewardsSquared
+        index_policies.append(policy)
+    besa_policies = []
+    for history in histories:
+        policy = BESA(len(history))
+        policy.all_rewards = RewardStore(len(history))
+        for arm, values in enumerate(history):
+            policy.all_rewards.replace(arm, values.astype(float))
+        policy.pulls = policy.all_rewards.counts.copy()
+        besa_policies.append(policy)
+
+    return [
+        ("demand by price", lambda: [get_historical_demand_by_price(HISTORICAL_DEMAND_CONSUMPTION, id, product_type,
+                                                                    today) for id, product_type in products]),
+        ("arms + MAB", lambda: [MAB([DiscreteArm(k, values) for k, values in enumerate(history)])
+                                for history in histories]),
+        ("UCBVtuned index", lambda: [policy.compute_all_index() for policy in index_policies]),
+        ("UCBVtuned choice", lambda: [policy.choice() for policy in index_policies]),
+        ("BESA tournament", lambda: [policy.choice() for policy in besa_policies]),
+    ], len(products)
+
+
+def main(rows=ROWS):
+    """
+    Prints the wall time and the peak memory of each stage, for each size of history
+    :param rows: numbers of rows of the synthetic histories
+    :return: None
+    """
+    today = date.today().strftime("%d-%m-%Y")
+    print("{:>9} {:>18} {:>12} {:>16} {:>12}".format("rows", "stage", "time (ms)", "per product (us)", "peak (MB)"))
+    with tempfile.TemporaryDirectory() as directory:
+        for nb_rows in rows:
+            path = os.path.join(directory, "grocery_sales_history_{}.csv".format(nb_rows))
+            nb_rows = write_demand_csv(nb_rows, path)
+            data = read_demand_csv(path)
+
+            # The stages read the synthetic history in place of the sample data
+            store = set_demand_history(data, HISTORICAL_DEMAND_CONSUMPTION)
+            stages, nb_products = product_stages(store, today)
+            results = [
+                ("csv load", measure(lambda: read_demand_csv(path)), None),
+                ("demand store", measure(lambda: set_demand_history(data, HISTORICAL_DEMAND_CONSUMPTION)), None),
+                ("discounted rewards", measure(lambda: discounted_rewards(data['consumption'].to_numpy())), None),
+            ]
+            results += [(name, measure(function), nb_products) for name, function in stages]
+            results.append(("start", measure(lambda: start(n_workers=1), repeat=1), len(store.index.products())))
+            clear_demand_store()
+
+            for name, (seconds, peak), per in results:
+                print("{:>9} {:>18} {:>12.4g} {:>16} {:>12.4g}".format(
+                    nb_rows, name, seconds * 1e3, "" if per is None else "{:.4g}".format(seconds / per * 1e6),
+                    peak / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main([int(float(size)) for size in sys.argv[1:]] or ROWS)
@@ -0,0 +1,86 @@
+"""
+Microbenchmarks of the selection layer of :mod:`core.policies.selection` against the selection code previously inlined
+in :class:`core.policies.index_policy.IndexPolicy`.
+
+Run with ``python -m benchmarks.bench_selection``.
+"""
+import timeit
+
+import numpy as np
+
+from core.policies.selection import random_argmax, random_argmax_subset, random_rank, random_top_m
+
+#: Numbers of arms
+NB_ARMS = [3, 10, 50]
+#: Number of rows of indexes for the batched selection
+NB_ROWS = 100000
+
+
+def argmax_previous(index):
+    """ Previous IndexPolicy.choice selection."""
+    return np.random.choice(np.nonzero(index == np.max(index))[0])
+
+
+def rank_previous(index, rank):
+    """ Previous IndexPolicy.choice_with_rank selection."""
+    sorted_rewards = np.sort(index)
+    return np.random.choice(np.nonzero(index == sorted_rewards[-rank])[0])
+
+
+def subset_previous(index, available_arms):
+    """ Previous IndexPolicy.choice_from_subset selection."""
+    return available_arms[np.random.choice(np.nonzero(index[available_arms] == np.max(index[available_arms]))[0])]
+
+
+def top_m_previous(index, m):
+    """ Previous IndexPolicy.choice_imp selection of the exploitation arms."""
+    sorted_index = np.sort(index)
+    return np.random.choice(np.nonzero(index >= sorted_index[-m])[0], size=m, replace=False)
+
+
+def best_time(function, number=2000, repeat=5):
+    """
+    Returns the best time of one call to the function, in microseconds
+    :param function:
+    :param number:
+    :param repeat:
+    :return: float
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    """
+    Prints the timings of the previous and new selections
+    :return: None
+    """
+    rng = np.random.default_rng(42)
+    print("{:>6} {:>10} {:>14} {:>14} {:>10}".format("arms", "selection", "previous (us)", "new (us)", "speedup"))
+    for nb_arms in NB_ARMS:
+        index = rng.random(nb_arms)
+        available_arms = np.arange(0, nb_arms, 2)
+        m = min(3, nb_arms - 1)
+        cases = [
+            ("argmax", lambda: argmax_previous(index), lambda: random_argmax(index, rng=rng)),
+            ("rank 2", lambda: rank_previous(index, 2), lambda: random_rank(index, 2, rng=rng)),
+            ("subset", lambda: subset_previous(index, available_arms),
+             lambda: random_argmax_subset(index, available_arms, rng=rng)),
+            ("top m", lambda: top_m_previous(index, m), lambda: random_top_m(index, m, rng=rng)),
+        ]
+        for name, previous, new in cases:
+            previous_time, new_time = best_time(previous), best_time(new)
+            print("{:>6} {:>10} {:>14.3g} {:>14.3g} {:>9.1f}x".format(
+                nb_arms, name, previous_time, new_time, previous_time / new_time))
+
+    # Many rows at once, against a loop over the rows
+    print("\n{:>6} {:>10} {:>14} {:>14} {:>10}".format("arms", "rows", "loop (ms)", "batched (ms)", "speedup"))
+    for nb_arms in NB_ARMS:
+        indexes = rng.random((NB_ROWS, nb_arms))
+        loop_time = best_time(lambda: [argmax_previous(row) for row in indexes], number=1, repeat=1)
+        batched_time = best_time(lambda: random_argmax(indexes, rng=rng), number=5, repeat=3)
+        print("{:>6} {:>10} {:>14.4g} {:>14.4g} {:>9.0f}x".format(
+            nb_arms, NB_ROWS, loop_time / 1e3, batched_time / 1e3, loop_time / batched_time))
+
+
+if __name__ == '__main__':
+    main()
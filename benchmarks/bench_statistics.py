@@ -0,0 +1,85 @@
+"""
+Benchmark of :meth:`core.environment.arm_statistics.ArmStatistics.update`, on one chunk of growing size, and of
+:meth:`ArmStatistics.from_chunks` on a synthetic history (see :mod:`benchmarks.synthetic`) read chunk by chunk: the
+time per row should stay flat as the rows grow, and the streamed statistics equal those of :meth:`from_index`.
+
+Run with ``python -m benchmarks.bench_statistics``.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import demand_history
+from core.environment.arm_statistics import ArmStatistics
+from core.utils.transformations_util import DATE_FORMAT, DemandIndex
+
+#: Numbers of arms of the chunks
+NB_ARMS = [30, 3000]
+#: Numbers of rows of the chunks
+ROWS = [90000, 180000, 360000, 720000]
+#: Numbers of rows of the synthetic histories streamed, and of each of their chunks
+HISTORY_ROWS, CHUNK_SIZE = [10 ** 5, 10 ** 6], 10 ** 5
+
+
+def chunk(nb_arms, nb_rows, rng):
+    """
+    Returns a chunk of history with the same number of days for every arm, 3 arms per product
+    :param nb_arms:
+    :param nb_rows:
+    :param rng:
+    :return: dataframe
+    """
+    nb_days = nb_rows // nb_arms
+    return pd.DataFrame({
+        'id': np.repeat(['Product {}'.format(k // 3) for k in range(nb_arms)], nb_days),
+        'product_type': 'bakery goods',
+        'placement_id': np.repeat(np.arange(nb_arms) % 3 + 1, nb_days),
+        'date': np.tile(pd.date_range('1900-01-01', periods=nb_days).values, nb_arms),
+        'consumption': rng.poisson(50., size=nb_arms * nb_days),
+    })
+
+
+def best_seconds(function, repeat=3):
+    """
+    Returns the best wall time of one call to the function, in seconds
+    :param function:
+    :param repeat:
+    :return: float
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    """
+    Prints the time per row of an update and of the streaming, and whether the streamed statistics are exact
+    :return: None
+    """
+    rng = np.random.default_rng(42)
+    print("{:>6} {:>9} {:>12} {:>14}".format("arms", "rows", "update (s)", "per row (us)"))
+    for nb_arms in NB_ARMS:
+        for nb_rows in ROWS:
+            data = chunk(nb_arms, nb_rows, rng)
+            seconds = best_seconds(lambda: ArmStatistics().update(data))
+            print("{:>6} {:>9} {:>12.4g} {:>14.4g}".format(nb_arms, len(data), seconds, seconds / len(data) * 1e6))
+
+    print("\n{:>9} {:>12} {:>14} {:>8}".format("rows", "stream (s)", "per row (us)", "exact"))
+    for nb_rows in HISTORY_ROWS:
+        data = demand_history(nb_rows, rng=rng)
+        data['date'] = pd.to_datetime(data['date'], format=DATE_FORMAT)
+        chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+        seconds = best_seconds(lambda: ArmStatistics.from_chunks(chunks), repeat=1)
+        streamed, indexed = ArmStatistics.from_chunks(chunks), ArmStatistics.from_index(DemandIndex(data))
+        exact = streamed.keys == indexed.keys and all(
+            np.allclose(getattr(streamed, name), getattr(indexed, name))
+            for name in ('count', 'total', 'total_squared', 'discounted', 'discounted_sum'))
+        print("{:>9} {:>12.4g} {:>14.4g} {:>8}".format(len(data), seconds, seconds / len(data) * 1e6, str(exact)))
+
+
+if __name__ == '__main__':
+    main()
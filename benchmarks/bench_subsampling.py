@@ -0,0 +1,49 @@
+"""
+Microbenchmarks of the sub-sampling of BESA: :func:`core.policies.besa.subsample_uniform` against
+:class:`core.policies.subsampling.SubSampler`, alone and in a vectorized tournament.
+
+Run with ``python -m benchmarks.bench_subsampling``.
+"""
+import numpy as np
+
+from benchmarks.bench_besa import NB_ARMS, reward_store
+from benchmarks.bench_selection import best_time
+from core.policies.besa import besa_k_actions__vectorized, subsample_uniform
+from core.policies.subsampling import SubSampler
+
+#: Sizes (sub-sample, history) of the sub-sampling
+SIZES = [(4, 50), (20, 50), (100, 500), (400, 500), (200, 5000), (1000, 100000), (60000, 100000)]
+#: Ranges of the number of pulls of each arm in the tournaments
+PULLS = [(50, 500), (5000, 50000)]
+
+
+def main():
+    """
+    Prints the timings of the previous and new sub-sampling
+    :return: None
+    """
+    rng = np.random.default_rng(42)
+    sampler = SubSampler(rng)
+    print("{:>8} {:>8} {:>14} {:>14} {:>10}".format("n", "m", "previous (us)", "new (us)", "speedup"))
+    for n, m in SIZES:
+        values = rng.poisson(3., size=m).astype(float)
+        total = np.sum(values)
+        previous_time = best_time(lambda: np.sum(values[subsample_uniform(n, m)]), number=200)
+        new_time = best_time(lambda: sampler.sum(values, n, total=total), number=200)
+        print("{:>8} {:>8} {:>14.4g} {:>14.4g} {:>9.1f}x".format(n, m, previous_time, new_time,
+                                                                 previous_time / new_time))
+
+    print("\n{:>6} {:>14} {:>14} {:>14} {:>10}".format("arms", "pulls", "previous (us)", "new (us)", "speedup"))
+    for pulls_range in PULLS:
+        for nb_arms in NB_ARMS:
+            store = reward_store(nb_arms, rng, pulls_range)
+            actions = rng.permutation(nb_arms)
+            previous_time = best_time(lambda: besa_k_actions__vectorized(store, store.counts, actions), number=50)
+            new_time = best_time(lambda: besa_k_actions__vectorized(store, store.counts, actions, sampler=sampler),
+                                 number=50)
+            print("{:>6} {:>14} {:>14.4g} {:>14.4g} {:>9.1f}x".format(
+                nb_arms, "{}-{}".format(*pulls_range), previous_time, new_time, previous_time / new_time))
+
+
+if __name__ == '__main__':
+    main()
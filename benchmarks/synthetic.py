@@ -0,0 +1,64 @@
+"""
+Synthetic demand histories, with the columns and formats of ``data/grocery_sales_history.csv``: a product has one row
+per day and placement id, and its unit sales are Poisson around a mean of its own for each placement.
+"""
+import numpy as np
+import pandas as pd
+
+from core.utils.transformations_util import DATE_FORMAT
+
+#: Product types of the products, in turn
+PRODUCT_TYPES = ['chilled desserts', 'bakery goods', 'beverages']
+#: Names of the placements, the name of a placement id depending on the product type
+PLACEMENT_NAMES = ['entrance', 'neardairyproducts', 'nearalcohol', 'nearnoodles', 'snacks', 'cashier',
+                   'asidecoffeemaker', 'beveragessection', 'healthyalternativessection']
+#: Placement ids of every product
+PLACEMENT_IDS = [1, 2, 3]
+#: Number of days of history of a product, about as in the sample data
+NB_DAYS = 150
+#: First day of the histories
+FIRST_DAY = '2018-11-02'
+
+
+def demand_history(nb_rows, rng=None):
+    """
+    Returns a synthetic demand history of about nb_rows rows (a whole number of products), in the order of the csv
+    file: product after product, then day after day
+    :param nb_rows:
+    :param rng: numpy.random.Generator, seeded with 42 by default
+    :return: dataframe, with the columns of the csv file (dates as strings)
+    """
+    rng = np.random.default_rng(42) if rng is None else rng
+    rows_per_product = NB_DAYS * len(PLACEMENT_IDS)
+    nb_products = max(1, -(-nb_rows // rows_per_product))
+    nb_rows = nb_products * rows_per_product
+
+    products = np.repeat(np.arange(nb_products), rows_per_product)
+    days = np.tile(np.repeat(np.arange(NB_DAYS), len(PLACEMENT_IDS)), nb_products)
+    placements = np.tile(np.arange(len(PLACEMENT_IDS)), nb_products * NB_DAYS)
+    product_types = products % len(PRODUCT_TYPES)
+    means = rng.uniform(20., 400., size=(nb_products, len(PLACEMENT_IDS)))
+
+    dates = pd.date_range(FIRST_DAY, periods=NB_DAYS).strftime(DATE_FORMAT).to_numpy()
+    names = np.array(PLACEMENT_NAMES)
+    return pd.DataFrame({
+        'id': pd.Categorical.from_codes(products, ['Product {:07d}'.format(k) for k in range(nb_products)]),
+        'product_type': pd.Categorical.from_codes(product_types, PRODUCT_TYPES),
+        'date': dates[days],
+        'placement_id': np.array(PLACEMENT_IDS)[placements],
+        'consumption': rng.poisson(means[products, placements]),
+        'placment_name': names[(product_types * len(PLACEMENT_IDS) + placements) % len(names)],
+    })
+
+
+def write_demand_csv(nb_rows, path, rng=None):
+    """
+    Writes a synthetic demand history as a csv file
+    :param nb_rows:
+    :param path:
+    :param rng:
+    :return: number of rows written
+    """
+    data = demand_history(nb_rows, rng=rng)
+    data.to_csv(path, index=False)
+    return len(data)
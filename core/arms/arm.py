@@ -4,6 +4,9 @@
 class Arm(object):
     """ Base class for an arm class."""
 
+    # No __dict__ of its own, so that the slotted arms (eg. DiscreteArm) have none
+    __slots__ = ()
+
     def __init__(self, lower=0., amplitude=1.):
         self.lower = lowe;       self.amplitude = amplitude
         self.min = lower
@@ -1,46 +1,94 @@
 # -*- coding: utf-8 -*-
-""" Discretely distributed arm, of finite support."""
+""" Discretely distributed arm, of finite support.
+
+- The values of an arm are a numpy array, used as it is (eg. a slice of a :class:`DemandIndex`, so many arms view one
+  shared buffer without any copy), and never written to,
+- The statistics (mean, median, sum of discounted rewards, consumption) are only computed on first use, and cached,
+- The arms are slotted (no ``__dict__``), so an arm is a few machine words on top of its values,
+- A draw is a random index into the values, with ``rng``, a :class:`numpy.random.Generator`, or the global numpy random
+  state if it is ``None`` (so ``np.random.seed`` still makes the draws reproducible).
+"""
 
 from __future__ import division
 
 import numpy as np
-from numpy.random import choice
 
 
 # Local imports
 from core.arms.arm import Arm
+from core.arms.kullback import kl_bern
 from core.utils.objective_function_util import discounted_rewards
 
+
 class DiscreteArm(Arm):
     """Discreet distributed Arm"""
 
-    def __init__(self, placement_id, values):
+    __slots__ = ('_placement_id', '_values', '_rng', '_mean', '_median', '_sum', '_consumption')
+
+    def __init__(self, placement_id, values, rng=None):
         assert len(
             values) > 0, "Error: Discrete Arm values dictionary cannot be empty"
         self._placement_id = placement_id
-        self._values = values.copy()
-        self._lower = min(self._values)
-        self._magnitude = max(self._values) - self._lower
-        self.mean = np.mean(self._values)
-        self.median = np.median(self._values)
-        self.sum = np.sum(discounted_rewards(self._values))  # summation of discounted rewards
-        self.consumption = np.sum(self._values)
-        self.size = len(self._values)
+        # numpy arrays (eg. slices of a DemandIndex) are shared as they are, never written to
+        self._values = np.asarray(values)
+        self._rng = rng
+        self._mean = None
+        self._median = None
+        self._sum = None
+        self._consumption = None
+
+    @property
+    def mean(self):
+        """Mean of the values"""
+        if self._mean is None:
+            self._mean = np.mean(self._values)
+        return self._mean
+
+    @property
+    def median(self):
+        """Median of the values"""
+        if self._median is None:
+            self._median = np.median(self._values)
+        return self._median
+
+    @property
+    def sum(self):
+        """Summation of the discounted rewards of the values"""
+        if self._sum is None:
+            self._sum = np.sum(discounted_rewards(self._values))
+        return self._sum
+
+    @property
+    def consumption(self):
+        """Summation of the values"""
+        if self._consumption is None:
+            self._consumption = np.sum(self._values)
+        return self._consumption
+
+    @property
+    def size(self):
+        """Number of values"""
+        return self._values.shape[0]
+
+    def _indexes(self, shape):
+        """Random indexes into the values, of a certain shape (None for one index)"""
+        if self._rng is None:
+            return np.random.randint(self._values.shape[0], size=shape)
+        return self._rng.integers(self._values.shape[0], size=shape)
 
     def draw(self, t=None):
         """Draw one sample"""
-        return choice(self._values)
+        return self._values[self._indexes(None)]
 
     def draw_nparray(self, shape=(1,)):
         """Draw a numpy array of random samples, of the certain shape"""
-        return np.asarray(choice(self._values, replace=True, size=shape))
+        return self._values[self._indexes(shape)]
 
     def __str__(self):
         return "DiscreteArm"
 
     def __repr__(self):
-        # return "D({})".format(repr(self._values_to_proba))
-        return "D({}{}{})".format("{", ", ".join("{:.3g}: {:.3g}".format(self._price, v) for v in self._values), "}")
+        return "D({}: {} values, mean {:.3g})".format(self._placement_id, self.size, self.mean)
 
     @staticmethod
     def kl(x, y):
@@ -61,5 +109,6 @@ class DiscreteArm(Arm):
         """(lower, amplitude)"""
         return 0., 1.
 
-    # Only export and expose the class defined here
-    __all__ = ["DiscreteArm"]
+
+# Only export and expose the class defined here
+__all__ = ["DiscreteArm"]
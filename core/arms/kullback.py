@@ -1,27 +1,239 @@
 # -*- coding: utf-8 -*-
-""" Kullback-Leibler divergence functions and klUCB utilities."""
+""" Kullback-Leibler divergence functions and klUCB utilities.
+
+- The functions accept floats or numpy arrays (broadcast together), the arrays being computed by a ufunc compiled
+  with Numba if it is installed (see :mod:`core.utils.jit_util`), or with NumPy otherwise,
+- The ``*_numpy`` functions are the NumPy versions,
+- The ``klucb*`` functions solve the KL-UCB upper confidence bounds of many arms at once.
+"""
+from __future__ import division, print_function  # Python 2 compatibility
 
 from math import log
 
-# TODO: Try to make use of Numba JIT
+import numpy as np
 
+from core.utils.jit_util import jit_ufunc
 
 # : Threshold value: everything in [0,1] is truncated to [eps, 1-eps]
 eps = 1e-15
 
-# Simple Kullback - Liebler divergece for Bernoulli distribution
 
-# @jit
+# --- Scalar kernels, compiled to ufuncs with Numba
+
+
+def _kl_bern(x, y):
+    """ Kullback-Leibler divergence of two Bernoulli distributions, for floats."""
+    x = min(max(x, eps), 1 - eps)
+    y = min(max(y, eps), 1 - eps)
+    return x * log(x / y) + (1 - x) * log((1 - x) / (1 - y))
+
+
+def _kl_gauss(x, y, sig2x):
+    """ Kullback-Leibler divergence of two Gaussian distributions of variance sig2x, for floats."""
+    return (x - y) ** 2 / (2. * sig2x)
+
+
+def _kl_poisson(x, y):
+    """ Kullback-Leibler divergence of two Poisson distributions, for floats."""
+    x = max(x, eps)
+    y = max(y, eps)
+    return y - x + x * log(x / y)
+
+
+def _kl_exp(x, y):
+    """ Kullback-Leibler divergence of two exponential distributions, for floats."""
+    if x <= 0 or y <= 0:
+        return float('inf')
+    return x / y - 1 - log(x / y)
+
+
+# --- NumPy versions
+
+
+def kl_bern_numpy(x, y):
+    """ Kullback-Leibler divergence of two Bernoulli distributions, with NumPy."""
+    x = np.clip(x, eps, 1 - eps)
+    y = np.clip(y, eps, 1 - eps)
+    return x * np.log(x / y) + (1 - x) * np.log((1 - x) / (1 - y))
+
+
+def kl_gauss_numpy(x, y, sig2x=0.25):
+    """ Kullback-Leibler divergence of two Gaussian distributions of variance sig2x, with NumPy."""
+    return (np.asarray(x) - y) ** 2 / (2. * sig2x)
+
+
+def kl_poisson_numpy(x, y):
+    """ Kullback-Leibler divergence of two Poisson distributions, with NumPy."""
+    x = np.maximum(x, eps)
+    y = np.maximum(y, eps)
+    return y - x + x * np.log(x / y)
+
+
+def kl_exp_numpy(x, y):
+    """ Kullback-Leibler divergence of two exponential distributions, with NumPy."""
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    positive = (x > 0) & (y > 0)
+    ratio = np.where(positive, x, 1.) / np.where(positive, y, 1.)
+    return np.where(positive, ratio - 1 - np.log(ratio), np.inf)
+
+
+_kl_bern_ufunc = jit_ufunc(_kl_bern) or kl_bern_numpy
+_kl_gauss_ufunc = jit_ufunc(_kl_gauss) or kl_gauss_numpy
+_kl_poisson_ufunc = jit_ufunc(_kl_poisson) or kl_poisson_numpy
+_kl_exp_ufunc = jit_ufunc(_kl_exp) or kl_exp_numpy
+
+
+# --- Kullback-Leibler divergences, of floats or arrays
 
 
 def kl_bern(x, y):
+    """ Kullback-Leibler divergence of two Bernoulli distributions of means x and y.
+
+    >>> kl_bern(0.5, 0.5)
+    0.0
+    >>> np.round(kl_bern(np.array([0.1, 0.5]), 0.9), 4)
+    array([1.7578, 0.5108])
     """
+    if np.ndim(x) == 0 and np.ndim(y) == 0:
+        return _kl_bern(x, y)
+    return _kl_bern_ufunc(x, y)
+
 
-    :param x:
-    :param y:
-    :return:
+def kl_gauss(x, y, sig2x=0.25):
+    """ Kullback-Leibler divergence of two Gaussian distributions of means x and y and variance sig2x.
+
+    >>> kl_gauss(np.array([0., 1.]), 0.5)
+    array([0.5, 0.5])
     """
-    x = min(max(x, eps), 1 - eps)
-    y = min(max(y, eps), 1 - eps)
+    if np.ndim(x) == 0 and np.ndim(y) == 0 and np.ndim(sig2x) == 0:
+        return _kl_gauss(x, y, sig2x)
+    return _kl_gauss_ufunc(x, y, sig2x)
+
+
+def kl_poisson(x, y):
+    """ Kullback-Leibler divergence of two Poisson distributions of means x and y.
+
+    >>> np.round(kl_poisson(np.array([2., 3.]), 3.), 4)
+    array([0.1891, 0.    ])
+    """
+    if np.ndim(x) == 0 and np.ndim(y) == 0:
+        return _kl_poisson(x, y)
+    return _kl_poisson_ufunc(x, y)
+
+
+def kl_exp(x, y):
+    """ Kullback-Leibler divergence of two exponential distributions of means x and y.
+
+    >>> np.round(kl_exp(np.array([1., 2., 0.]), 2.), 4)
+    array([0.1931, 0.    ,    inf])
+    """
+    if np.ndim(x) == 0 and np.ndim(y) == 0:
+        return _kl_exp(x, y)
+    return _kl_exp_ufunc(x, y)
+
+
+# --- Derivatives of the Kullback-Leibler divergences in their second argument
+
+
+def dkl_bern(x, y):
+    """ Derivative in y of kl_bern(x, y)."""
+    x = np.minimum(np.maximum(x, eps), 1 - eps)
+    y = np.minimum(np.maximum(y, eps), 1 - eps)
+    return (y - x) / (y * (1 - y))
+
+
+def dkl_poisson(x, y):
+    """ Derivative in y of kl_poisson(x, y)."""
+    return 1 - np.maximum(x, eps) / np.maximum(y, eps)
+
+
+def dkl_exp(x, y):
+    """ Derivative in y of kl_exp(x, y)."""
+    return (y - x) / y ** 2
+
+
+# --- KL-UCB upper confidence bounds
+
+
+def klucb(x, d, kl, dkl, upperbound, lowerbound=float('-inf'), precision=1e-6, max_iterations=50):
+    r""" The upper confidence bounds :math:`\max\{ q \in [x, upperbound] : kl(x, q) \leq d \}` of arrays of means x and
+    thresholds d, all solved at once.
+
+    - Newton iterations from the upper bound: on the convex function :math:`q \mapsto kl(x, q) - d` they go down and
+      stay above the solution (which keeps the bounds optimistic), and they are kept in :math:`[x, upperbound]`,
+    - Only the bounds that have not converged yet (whose last step is larger than the precision) are iterated, so a
+      tight upper bound makes the whole solver a few vectorized steps. It must be where dkl is finite (eg. below 1
+      for Bernoulli means).
+
+    >>> np.round(klucb(np.array([0.1, 0.5]), 0.2, kl_bern_numpy, dkl_bern, 0.95), 4)
+    array([0.3784, 0.7871])
+    """
+    x, d = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(d, dtype=float))
+    high = np.broadcast_to(np.asarray(upperbound, dtype=float), x.shape)
+    low = np.maximum(x, lowerbound)
+    q = high.copy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        active = np.flatnonzero(kl(x, q) > d)
+        for _ in range(max_iterations):
+            if len(active) == 0:
+                break
+            xa, qa = x[active], q[active]
+            step = (kl(xa, qa) - d[active]) / dkl(xa, qa)
+            q[active] = np.minimum(np.maximum(qa - step, low[active]), high[active])
+            active = active[np.abs(step) > precision]
+    return q
+
+
+def klucb_bern(x, d, precision=1e-6):
+    r""" KL-UCB upper confidence bounds for Bernoulli means x (in [0, 1]), starting from the smallest of the bound of
+    Pinsker's inequality and of :math:`1 - (1 - x) \exp((x \log(x) - d) / (1 - x))`, which is below 1 (where the
+    derivative of the divergence explodes).
+
+    >>> np.round(klucb_bern(np.array([0., 0.9]), 0.1), 4)
+    array([0.0952, 0.9834])
+    """
+    x, d = np.asarray(x, dtype=float), np.asarray(d, dtype=float)
+    y = np.clip(x, eps, 1 - eps)
+    upperbound = np.minimum(np.minimum(1., x + np.sqrt(d / 2.)), 1 - (1 - y) * np.exp((y * np.log(y) - d) / (1 - y)))
+    return klucb(x, d, kl_bern_numpy, dkl_bern, upperbound, precision=precision)
+
+
+def klucb_gauss(x, d, sig2x=0.25, precision=0.):
+    """ KL-UCB upper confidence bounds for Gaussian means x of variance sig2x, in closed form.
+
+    >>> klucb_gauss(np.array([0., 1.]), 0.5)
+    array([0.5, 1.5])
+    """
+    return np.asarray(x) + np.sqrt(2. * sig2x * np.asarray(d))
+
+
+def klucb_poisson(x, d, precision=1e-6):
+    """ KL-UCB upper confidence bounds for Poisson means x (eg. unit sales), starting from the bound
+    :math:`x + d + \sqrt{d^2 + 2 x d}`.
+
+    >>> np.round(klucb_poisson(np.array([0., 3.]), 0.5), 4)
+    array([0.5   , 5.0802])
+    """
+    x, d = np.asarray(x, dtype=float), np.asarray(d, dtype=float)
+    upperbound = x + d + np.sqrt(d * d + 2. * x * d)
+    return klucb(x, d, kl_poisson_numpy, dkl_poisson, upperbound, precision=precision)
+
+
+def klucb_exp(x, d, precision=1e-6):
+    """ KL-UCB upper confidence bounds for exponential means x.
+
+    >>> np.round(klucb_exp(np.array([1., 2.]), 0.2), 4)
+    array([2.0274, 4.0548])
+    """
+    x, d = np.asarray(x, dtype=float), np.asarray(d, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        upperbound = np.where(d < 0.77, x / (1 + 2. / 3. * d - np.sqrt(4. / 9. * d * d + 2 * d)), x * np.exp(d + 1))
+    return klucb(x, d, kl_exp_numpy, dkl_exp, upperbound, precision=precision)
+
 
-    return x * log(x / y) + (1 - x)*log((1 - x) / (1 - y))
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
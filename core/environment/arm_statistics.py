@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+r""" :class:`ArmStatistics`, the sufficient statistics of the arms of every product, updated incrementally.
+
+Instead of rebuilding every :class:`DiscreteArm` and :class:`MAB` from the full history each day, the statistics
+used by the policies are kept per ``(id, product_type, placement_id)``:
+
+- the number of days, the sum and the sum of squares of the consumption,
+- the last discounted reward and the sum of the discounted rewards (see :mod:`core.utils.objective_function_util`),
+- the first and last dates seen,
+- a P² sketch of the median [Jain & Chlamtac, 1985], five markers per arm.
+
+Updating them with new rows costs :math:`\mathcal{O}(1)` per row (after sorting them), whatever the length of the
+history (see ``python -m benchmarks.bench_statistics``).
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+import numpy as np
+import pandas as pd
+
+from core.utils.objective_function_util import discount_factor
+from core.utils.transformations_util import DATE_FORMAT, to_cutoff_date
+
+#: Number of markers of the P² sketch
+NB_MARKERS = 5
+#: Quantiles followed by the markers of the P² sketch, the median being the middle one
+MARKER_QUANTILES = np.array([0., 0.25, 0.5, 0.75, 1.])
+#: Increment of the desired position of each marker for each new value
+MARKER_INCREMENTS = MARKER_QUANTILES.copy()
+
+
+class ArmStatistics(object):
+    """ Sufficient statistics of the arms of every product, one row per ``(id, product_type, placement_id)``."""
+
+    def __init__(self):
+        """New empty statistics"""
+        self.keys = []  #: ``(id, product_type, placement_id)`` of each row
+        self._rows = {}
+        self._products = {}
+        self._product_codes = {}
+        self.product_code = np.zeros(0, dtype=np.int64)  #: Position of the product of each row in :meth:`products`
+        self.count = np.zeros(0, dtype=np.int64)  #: Number of days of each arm
+        self.total = np.zeros(0)  #: Sum of the consumption
+        self.total_squared = np.zeros(0)  #: Sum of the squared consumption
+        self.discounted = np.zeros(0)  #: Discounted reward of the last day
+        self.discounted_sum = np.zeros(0)  #: Sum of the discounted rewards of all days
+        self.first_date = np.zeros(0, dtype='datetime64[ns]')  #: First date seen
+        self.last_date = np.zeros(0, dtype='datetime64[ns]')  #: Last date seen
+        #: Heights of the markers of the median sketch, or the first values while there are less than 5 of them
+        self.marker_heights = np.zeros((0, NB_MARKERS))
+        self.marker_positions = np.zeros((0, NB_MARKERS))  #: Positions of the markers, from 0
+        self.marker_desired = np.zeros((0, NB_MARKERS))  #: Desired positions of the markers, from 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        return "{}(nbArms: {}, nbProducts: {})".format(self.__class__.__name__, len(self), len(self._products))
+
+    # --- Rows and products
+
+    def _add_arms(self, keys):
+        """ Add empty rows for new arms."""
+        nb = len(keys)
+        product_codes = np.zeros(nb, dtype=np.int64)
+        for i, key in enumerate(keys):
+            self._rows[key] = len(self.keys)
+            if key[:2] not in self._products:
+                self._product_codes[key[:2]] = len(self._products)
+                self._products[key[:2]] = []
+            product_codes[i] = self._product_codes[key[:2]]
+            self._products[key[:2]].append(len(self.keys))
+            self.keys.append(key)
+        self.product_code = np.append(self.product_code, product_codes)
+        self.count = np.append(self.count, np.zeros(nb, dtype=np.int64))
+        self.total = np.append(self.total, np.zeros(nb))
+        self.total_squared = np.append(self.total_squared, np.zeros(nb))
+        self.discounted = np.append(self.discounted, np.zeros(nb))
+        self.discounted_sum = np.append(self.discounted_sum, np.zeros(nb))
+        self.first_date = np.append(self.first_date, np.full(nb, np.datetime64('NaT'), dtype='datetime64[ns]'))
+        self.last_date = np.append(self.last_date, np.full(nb, np.datetime64('NaT'), dtype='datetime64[ns]'))
+        self.marker_heights = np.vstack([self.marker_heights, np.zeros((nb, NB_MARKERS))])
+        self.marker_positions = np.vstack([self.marker_positions, np.zeros((nb, NB_MARKERS))])
+        self.marker_desired = np.vstack([self.marker_desired, np.zeros((nb, NB_MARKERS))])
+
+    def rows(self, keys, add=False):
+        """ Rows of the arms of keys ``(id, product_type, placement_id)``, adding the missing ones if ``add``."""
+        if add:
+            missing = [key for key in dict.fromkeys(keys) if key not in self._rows]
+            if missing:
+                self._add_arms(missing)
+        return np.array([self._rows[key] for key in keys], dtype=int)
+
+    def products(self):
+        """ Dictionary mapping each ``(id, product_type)`` to the rows of its arms."""
+        return {product: np.array(rows, dtype=int) for product, rows in self._products.items()}
+
+    def product_keys(self):
+        """ ``(id, product_type)`` of each product, in the order of :attr:`product_code`."""
+        return list(self._products)
+
+    def product_rows(self, id, product_type):
+        """ Rows of the arms of one product."""
+        return np.array(self._products.get((id, product_type), []), dtype=int)
+
+    @property
+    def placement_id(self):
+        """ Placement id of each row."""
+        return np.array([key[2] for key in self.keys])
+
+    # --- Derived statistics
+
+    @property
+    def mean(self):
+        """ Mean consumption of each arm."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.total / self.count
+
+    @property
+    def variance(self):
+        """ Variance of the consumption of each arm."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.total_squared / self.count - np.square(self.total / self.count)
+
+    @property
+    def median(self):
+        """ Median of the consumption of each arm: exact below 5 days, estimated by the P² sketch after."""
+        medians = self.marker_heights[:, NB_MARKERS // 2].copy()
+        for row in np.flatnonzero(self.count < NB_MARKERS):
+            medians[row] = np.median(self.marker_heights[row, :self.count[row]]) if self.count[row] > 0 else np.nan
+        return medians
+
+    # --- Build and update
+
+    @classmethod
+    def from_index(cls, index, date=None):
+        r""" Statistics of every group of a :class:`DemandIndex`, up to the date (included), computed in one pass.
+
+        The discounted rewards are summed in closed form: with :math:`r = 1 - \gamma` and :math:`a_j` the number of
+        days after day :math:`j`, the last discounted reward is :math:`\gamma \sum_j x_j r^{a_j}` and the sum of all
+        of them is :math:`\sum_j x_j (1 - r^{a_j + 1})`.
+        """
+        statistics = cls()
+        starts, stops = index.offsets[:-1], index.offsets[1:]
+        cutoff = to_cutoff_date(date)
+        groups = np.repeat(np.arange(len(starts)), stops - starts)
+        if cutoff is None:
+            counts = stops - starts
+        else:
+            # dates are sorted inside each group, the rows up to the cutoff are a prefix of the group
+            counts = np.bincount(groups, weights=index.dates <= cutoff, minlength=len(starts)).astype(np.int64)
+        nonempty = np.flatnonzero(counts > 0)
+        if len(nonempty) == 0:
+            return statistics
+
+        positions = np.arange(len(groups)) - starts[groups]
+        kept = positions < counts[groups]
+        rows = np.searchsorted(nonempty, groups[kept])
+        positions = positions[kept]
+        values = index.consumption[kept].astype(float)
+        counts, starts = counts[nonempty], starts[nonempty]
+        ages = counts[rows] - 1 - positions
+        ratio = 1 - discount_factor
+
+        statistics._add_arms([index.keys[group] for group in nonempty])
+        nb = len(nonempty)
+        statistics.count[:] = counts
+        statistics.total[:] = np.bincount(rows, weights=values, minlength=nb)
+        statistics.total_squared[:] = np.bincount(rows, weights=np.square(values), minlength=nb)
+        statistics.discounted[:] = discount_factor * np.bincount(rows, weights=values * ratio ** ages, minlength=nb)
+        statistics.discounted_sum[:] = np.bincount(rows, weights=values * (1 - ratio ** (ages + 1)), minlength=nb)
+        statistics.first_date[:] = index.dates[starts]
+        statistics.last_date[:] = index.dates[starts + counts - 1]
+
+        # Markers of the median sketch at the exact quantiles, from the values sorted once
+        order = np.lexsort((values, rows))
+        sorted_values = values[order]
+        sorted_starts = np.r_[0, np.cumsum(counts)[:-1]]
+        desired = np.outer(counts - 1, MARKER_QUANTILES)
+        marker_positions = np.round(desired)
+        full = counts >= NB_MARKERS
+        statistics.marker_desired[full] = desired[full]
+        statistics.marker_positions[full] = marker_positions[full]
+        statistics.marker_heights[full] = sorted_values[(sorted_starts[:, None] + marker_positions.astype(int))[full]]
+        for row in np.flatnonzero(~full):
+            statistics.marker_heights[row, :counts[row]] = sorted_values[sorted_starts[row]:
+                                                                         sorted_starts[row] + counts[row]]
+        return statistics
+
+    @classmethod
+    def from_chunks(cls, chunks, date=None):
+        """ Statistics folded from an iterable of chunks of demand history (eg. :func:`iter_demand_history`), up to the
+        date (included), with :meth:`update`.
+
+        Only the statistics and one chunk are in memory at a time, so the memory is bounded by the number of arms and
+        not by the number of rows. As in :meth:`update`, the rows of an arm must come in date order across the chunks,
+        the rows older than the last date already seen for their arm being ignored.
+
+        The statistics are those of :meth:`from_index` on the whole history (but the median sketch, exact there):
+
+        >>> from core.utils.transformations_util import DemandIndex
+        >>> rng = np.random.default_rng(0)
+        >>> data = pd.DataFrame({'id': 'Ice Cream Bar', 'product_type': 'chilled desserts',
+        ...                      'date': np.repeat(pd.date_range('2018-11-02', periods=20), 3),
+        ...                      'placement_id': np.tile([1, 2, 3], 20), 'consumption': rng.poisson(50, 60)})
+        >>> streamed = ArmStatistics.from_chunks(data[i:i + 7] for i in range(0, 60, 7))
+        >>> indexed = ArmStatistics.from_index(DemandIndex(data))
+        >>> streamed.keys == indexed.keys
+        True
+        >>> all(np.allclose(getattr(streamed, name), getattr(indexed, name))
+        ...     for name in ('count', 'total', 'total_squared', 'discounted', 'discounted_sum'))
+        True
+        >>> np.array_equal(streamed.last_date, indexed.last_date)
+        True
+        """
+        statistics = cls()
+        cutoff = to_cutoff_date(date)
+        for chunk in chunks:
+            if cutoff is not None:
+                dates = chunk['date']
+                if not pd.api.types.is_datetime64_any_dtype(dates):
+                    dates = pd.to_datetime(dates, format=DATE_FORMAT)
+                chunk = chunk[np.asarray(dates <= cutoff)]
+            statistics.update(chunk)
+        return statistics
+
+    def update(self, data):
+        r""" Update the statistics with new rows of demand history (a dataframe with the columns ``id``,
+        ``product_type``, ``placement_id``, ``date`` and ``consumption``).
+
+        - The rows not more recent than the last date already seen for their arm are ignored, so giving the same rows
+          twice does not count them twice,
+        - The rows are sorted by arm and date once, the sums are then updated in one pass over the rows and the median
+          sketch in one round per rank of a row in its arm (each round being a slice of the rows), so the cost is
+          linear in the number of rows, the rows of one arm are applied in date order.
+        """
+        if len(data) == 0:
+            return
+        dates = data['date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, format=DATE_FORMAT)
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        # Rows of the distinct arms of the data, then of each row of the data
+        codes = data.groupby(['id', 'product_type', 'placement_id'], sort=False, observed=True).ngroup().values
+        first = np.unique(codes, return_index=True)[1]
+        keys = zip(*(np.asarray(data[column])[first].tolist() for column in ('id', 'product_type', 'placement_id')))
+        rows = self.rows(list(keys), add=True)[codes]
+        values = np.asarray(data['consumption'], dtype=float)
+
+        last_dates = self.last_date[rows]
+        new = np.isnat(last_dates) | (dates > last_dates)
+        rows, values, dates = rows[new], values[new], dates[new]
+        if len(rows) == 0:
+            return
+        order = np.lexsort((dates, rows))
+        rows, values, dates = rows[order], values[order], dates[order]
+
+        # The new rows of an arm are now contiguous: one segment per arm, each row having a rank in its segment
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        sizes = np.diff(np.r_[starts, len(rows)])
+        arms, segments = rows[starts], np.repeat(np.arange(len(starts)), sizes)
+        ranks = np.arange(len(rows)) - starts[segments]
+        ages = sizes[segments] - 1 - ranks
+        previous_counts = self.count[arms]
+        self._update_sums(arms, segments, values, ages, sizes)
+        first_dates = self.first_date[arms]
+        self.first_date[arms] = np.where(np.isnat(first_dates), dates[starts], first_dates)
+        self.last_date[arms] = dates[starts + sizes - 1]
+
+        # The sketch takes the values of an arm one by one: the k-th new value of every arm is applied at the k-th
+        # round, the rows being sorted by rank once so that each round is a slice
+        by_rank = np.argsort(ranks, kind='stable')
+        bounds = np.r_[0, np.cumsum(np.bincount(ranks))]
+        counts = previous_counts[segments] + ranks + 1
+        for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            selected = by_rank[start:stop]
+            self._update_median(rows[selected], values[selected], counts[selected])
+
+    def _update_sums(self, arms, segments, values, ages, sizes):
+        r""" Add new values to the sums of distinct arms, in one pass: the values of the arm of segment s are the
+        ``values[segments == s]``, the j-th of them being followed by :math:`a_j` (``ages``) newer ones.
+
+        With :math:`r = 1 - \gamma`, :math:`D_0` the last discounted reward and :math:`n` new values, the last
+        discounted reward is :math:`r^n D_0 + \gamma \sum_j x_j r^{a_j}` and the discounted rewards of the new days
+        sum to :math:`D_0 r (1 - r^n) / \gamma + \sum_j x_j (1 - r^{a_j + 1})`, as in :meth:`from_index`.
+        """
+        nb = len(arms)
+        ratio = 1 - discount_factor
+        previous = self.discounted[arms]
+        self.count[arms] += sizes
+        self.total[arms] += np.bincount(segments, weights=values, minlength=nb)
+        self.total_squared[arms] += np.bincount(segments, weights=np.square(values), minlength=nb)
+        self.discounted_sum[arms] += previous * ratio * (1 - ratio ** sizes) / discount_factor + \
+            np.bincount(segments, weights=values * (1 - ratio ** (ages + 1)), minlength=nb)
+        self.discounted[arms] = ratio ** sizes * previous + \
+            discount_factor * np.bincount(segments, weights=values * ratio ** ages, minlength=nb)
+
+    def _update_median(self, rows, values, counts):
+        """ P² update of the median sketch of distinct arms, with one new value each, counts being their numbers of
+        values with the new one."""
+
+        # The first 5 values are kept, then sorted as the initial markers
+        filling = counts <= NB_MARKERS
+        self.marker_heights[rows[filling], counts[filling] - 1] = values[filling]
+        ready = rows[counts == NB_MARKERS]
+        self.marker_heights[ready] = np.sort(self.marker_heights[ready], axis=1)
+        self.marker_positions[ready] = np.arange(NB_MARKERS)
+        self.marker_desired[ready] = np.arange(NB_MARKERS)
+
+        rows, values = rows[~filling], values[~filling]
+        if len(rows) == 0:
+            return
+        heights = self.marker_heights[rows]
+        positions = self.marker_positions[rows]
+        desired = self.marker_desired[rows] + MARKER_INCREMENTS
+
+        # Cell k of the new value, such that q_k <= x < q_k+1, extending the extreme markers if needed
+        cells = np.sum(values[:, None] >= heights[:, 1:NB_MARKERS - 1], axis=1)
+        heights[:, 0] = np.minimum(heights[:, 0], values)
+        heights[:, -1] = np.maximum(heights[:, -1], values)
+        positions += np.arange(NB_MARKERS)[None, :] > cells[:, None]
+
+        # Move the middle markers that are too far from their desired position
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i in range(1, NB_MARKERS - 1):
+                gap = desired[:, i] - positions[:, i]
+                move = ((gap >= 1) & (positions[:, i + 1] - positions[:, i] > 1)) | \
+                       ((gap <= -1) & (positions[:, i - 1] - positions[:, i] < -1))
+                step = np.where(gap >= 0, 1., -1.)
+                q, q_prev, q_next = heights[:, i], heights[:, i - 1], heights[:, i + 1]
+                n, n_prev, n_next = positions[:, i], positions[:, i - 1], positions[:, i + 1]
+                parabolic = q + step / (n_next - n_prev) * ((n - n_prev + step) * (q_next - q) / (n_next - n)
+                                                            + (n_next - n - step) * (q - q_prev) / (n - n_prev))
+                linear = np.where(step > 0, q + (q_next - q) / (n_next - n), q - (q_prev - q) / (n_prev - n))
+                new_height = np.where((q_prev < parabolic) & (parabolic < q_next), parabolic, linear)
+                heights[:, i] = np.where(move, new_height, q)
+                positions[:, i] = np.where(move, n + step, n)
+
+        self.marker_heights[rows] = heights
+        self.marker_positions[rows] = positions
+        self.marker_desired[rows] = desired
+
+    # --- Environments
+
+    def mab_state(self, rows):
+        """ Statistics of some arms (eg. the rows of a product) as the state of a :class:`MAB`, the same as built from
+        their :class:`DiscreteArm`: ``MAB(statistics.mab_state(rows))``."""
+        rows = np.asarray(rows, dtype=int)
+        rewards = self.discounted_sum[rows]
+        return {
+            'means': self.total[rows] / self.count[rows],
+            'rewards': rewards,
+            'pulls': self.count[rows],
+            'placement_id': np.array([self.keys[row][2] for row in rows.tolist()]),
+            'rewardsSquared': np.square(rewards),
+            'totalconsumption': self.total[rows],
+        }
+
+    # --- Save and load
+
+    def save(self, path):
+        """ Save the statistics in a ``.npz`` file."""
+        np.savez(path,
+                 ids=np.array([key[0] for key in self.keys], dtype=str),
+                 product_types=np.array([key[1] for key in self.keys], dtype=str),
+                 placement_ids=self.placement_id,
+                 count=self.count, total=self.total, total_squared=self.total_squared,
+                 discounted=self.discounted, discounted_sum=self.discounted_sum,
+                 first_date=self.first_date, last_date=self.last_date,
+                 marker_heights=self.marker_heights, marker_positions=self.marker_positions,
+                 marker_desired=self.marker_desired)
+
+    @classmethod
+    def load(cls, path):
+        """ Load statistics saved by :meth:`save`."""
+        statistics = cls()
+        with np.load(path) as saved:
+            statistics._add_arms(list(zip(saved['ids'].tolist(), saved['product_types'].tolist(),
+                                          saved['placement_ids'].tolist())))
+            for name in ('count', 'total', 'total_squared', 'discounted', 'discounted_sum', 'first_date',
+                         'last_date', 'marker_heights', 'marker_positions', 'marker_desired'):
+                getattr(statistics, name)[:] = saved[name]
+        return statistics
+
+
+# Only export and expose the class defined here
+__all__ = ["ArmStatistics"]
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
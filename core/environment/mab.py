@@ -10,34 +10,43 @@ See https://github.com/SMPyBandits/SMPyBandits/issues/71
 from __future__ import division, print_function  # Python 2 compatibility
 import numpy as np
 
+from core.utils.instrumentation_util import timed
+
 class MAB(object):
     """Basic Multi-Arm Bandit Problem"""
 
+    @timed('MAB.__init__')
     def __init__(self, configuration):
         """New MAB"""
         self.arms = []
         self._sparisity = None
+        # Flat buffer of the values of all the arms, arm after arm, and the offset of each arm in it (see set_values)
+        self._values = None
+        self._offsets = None
+        #: :class:`numpy.random.Generator` of the draws from the flat buffer, None to use the global numpy random state
+        #: (by default the generator shared by all the arms, if they have one)
+        self.rng = None
 
         if isinstance(configuration, dict):
-            raise NotImplementedError(
-                "To implement configuration load as a dictionary")
+            # Statistics of the arms given directly, eg. restored by get_state(), there is no arm to draw from
+            self.set_state(configuration)
         else:
             for arm in configuration:
                 self.arms.append(arm)
 
-        # Compute the mean and stats
-        # : Means of the arms
-        self.means = np.array([arm.mean for arm in self.arms])
-        self.nbArms = len(self.arms)  #: Number of arms
-        # : Sums of rewards of each arm
-        self.rewards = np.array([arm.sum for arm in self.arms])
-        # : pulls of the arms
-        self.pulls = np.array([arm.size for arm in self.arms])
-        self.t = np.sum(self.pulls)  # : total number of days
-        self.placement_id = np.array([arm._placement_id for arm in self.arms])
-        # Square of rewards for calculating variance
-        self.rewardsSquared = np.square(self.rewards)
-        self.totalconsumption = np.array([arm.consumption for arm in self.arms])
+            # Compute the mean and stats
+            # : Means of the arms
+            self.means = np.array([arm.mean for arm in self.arms])
+            self.nbArms = len(self.arms)  #: Number of arms
+            # : Sums of rewards of each arm
+            self.rewards = np.array([arm.sum for arm in self.arms])
+            # : pulls of the arms
+            self.pulls = np.array([arm.size for arm in self.arms])
+            self.t = np.sum(self.pulls)  # : total number of days
+            self.placement_id = np.array([arm._placement_id for arm in self.arms])
+            # Square of rewards for calculating variance
+            self.rewardsSquared = np.square(self.rewards)
+            self.totalconsumption = np.array([arm.consumption for arm in self.arms])
 
         if self._sparisity is not None:
             print(" - with 'sparsity' =", self._sparsity)  # DEBUG
@@ -51,12 +60,89 @@ class MAB(object):
         # print(" - with 'arms' represented as:", self.reprarms(1, latex=True))
         # # DEBUG
 
+    @classmethod
+    def from_arrays(cls, means, rewards, pulls, placement_id, rewards_squared=None, total_consumption=None,
+                    values=None, offsets=None):
+        """ MAB of the statistics of its arms given as arrays, without any arm object (eg. from
+        :meth:`ArmStatistics.mab_state` or from a :class:`DemandIndex`).
+
+        - rewards_squared: the squares of the rewards by default, as for arms,
+        - total_consumption: the sums of the values, or the means times the pulls if there are no values,
+        - values, offsets: flat buffer of the values of all the arms and offset of each arm in it (with a last entry
+          being the end of the last arm), to draw from the arms (see :meth:`set_values`).
+        """
+        rewards = np.asarray(rewards)
+        if total_consumption is None:
+            if values is not None:
+                total_consumption = np.add.reduceat(values, offsets[:-1]) if len(offsets) > 1 else np.zeros(0)
+            else:
+                total_consumption = np.asarray(means) * np.asarray(pulls)
+        mab = cls({
+            'means': means,
+            'rewards': rewards,
+            'pulls': pulls,
+            'placement_id': placement_id,
+            'rewardsSquared': np.square(rewards) if rewards_squared is None else rewards_squared,
+            'totalconsumption': total_consumption,
+        })
+        if values is not None:
+            mab.set_values(values, offsets)
+        return mab
+
+    def set_values(self, values, offsets):
+        """ Values to draw from: ``values[offsets[k]:offsets[k + 1]]`` are the values of arm k, each arm having at
+        least one value. The buffer is used as it is, never written to (eg. a slice of a :class:`DemandIndex`)."""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        assert len(offsets) == self.nbArms + 1 and np.all(np.diff(offsets) > 0), \
+            "Error: every arm of a MAB must have at least one value."
+        self._values = np.asarray(values)
+        self._offsets = offsets
+
+    def _values_buffer(self):
+        """ Flat buffer of the values and offsets of the arms, built from the arms on first use if they all have
+        values (eg. :class:`DiscreteArm`), or None. Arms with generators of their own (different ones) are not put in a
+        buffer, each arm then draws with its generator."""
+        if self._values is None and self.arms and all(hasattr(arm, '_values') for arm in self.arms):
+            rngs = [getattr(arm, '_rng', None) for arm in self.arms]
+            if any(rng is not rngs[0] for rng in rngs):
+                return None
+            if self.rng is None:
+                self.rng = rngs[0]
+            values = [np.asarray(arm._values) for arm in self.arms]
+            self.set_values(np.concatenate(values), np.r_[0, np.cumsum([len(value) for value in values])])
+        return self._values
+
+    #: Statistics of the arms saved by :meth:`get_state`
+    STATE_FIELDS = ('means', 'rewards', 'pulls', 'placement_id', 'rewardsSquared', 'totalconsumption')
+
+    def get_state(self):
+        """ Statistics of the arms, as a dictionary of numpy arrays."""
+        return {name: np.asarray(getattr(self, name)) for name in self.STATE_FIELDS}
+
+    def set_state(self, state):
+        """ Restore the statistics of the arms, saved by :meth:`get_state`."""
+        for name in self.STATE_FIELDS:
+            setattr(self, name, np.array(state[name]))
+        self.nbArms = len(self.means)
+        self.t = np.sum(self.pulls)
+
     def hoifactor(self):
         """ Compute the HOI factor H_OI(mu), the Optimal Arm Identification (OI) factor,
         for this MAB problem (complexity). Cf. (3.3) in Navikkumar MODI's thesis,
         "Machine Learning and Statistical Decision Making for Green Radio" (2017)."""
-        return sum(a.one_hoi(self.maxArm, a.mean)
-                   for a in self.arms if a.mean != self.maxArm) / float(self.nbArms)
+        return self._sum_suboptimal('one_hoi') / float(self.nbArms)
+
+    def _sum_suboptimal(self, term):
+        """ Sum of a term ``(mumax, mu)`` of the arm class over the sub-optimal arms, computed for all the arms of a
+        class at once, on the array of their means."""
+        arm_classes = [type(arm) for arm in self.arms]
+        suboptimal = self.means != self.maxArm
+        total = 0.
+        for arm_class in set(arm_classes):
+            means = self.means[suboptimal & np.array([cls is arm_class for cls in arm_classes])]
+            if len(means) > 0:
+                total += np.sum(getattr(arm_class, term)(self.maxArm, means))
+        return total
 
     def __repr__(self):
         return "{}(nbArms: {}, arms: {}, minArm: {:.3g}, maxArm: {:.3g})".format(
@@ -64,20 +150,41 @@ class MAB(object):
 
     # --- Draw samples
 
+    def _draw_values(self, arms, shape):
+        """ Uniform draws of the values of some arms (an array), of shape ``arms.shape + shape``, from the flat buffer
+        of the values in one vectorized draw (of indexes with :attr:`rng`, if there is one)."""
+        starts, stops = self._offsets[arms], self._offsets[np.asarray(arms) + 1]
+        expand = (Ellipsis,) + (None,) * len(shape)
+        size = np.shape(arms) + tuple(shape)
+        if self.rng is not None:
+            return self._values[self.rng.integers(starts[expand], stops[expand], size=size)]
+        uniforms = np.random.random_sample(size)
+        return self._values[starts[expand] + (uniforms * (stops - starts)[expand]).astype(np.int64)]
+
     def draw(self, arm_id, t=1):
         """ Return a random sample from the armId-th arm, at time t. Usually t is not used."""
-        return self.arms[arm_id].draw(t)
+        if self.arms:
+            return self.arms[arm_id].draw(t)
+        return self._draw_values(np.array(arm_id), ())[()]
 
     def draw_nparray(self, arm_id, shape=(1,)):
         """ Return a numpy array of random sample from the armId-th arm, of a certain shape."""
-        return self.arms[arm_id].draw_nparray(shape)
+        if self.arms:
+            return self.arms[arm_id].draw_nparray(shape)
+        return self._draw_values(np.array(arm_id), tuple(np.atleast_1d(shape)))
 
     def draw_each(self, t=1):
-        """ Return a random sample from each arm, at time t. Usually t is not used."""
+        """ Return a random sample from each arm, at time t. Usually t is not used. The arms with values (eg.
+        :class:`DiscreteArm`) are drawn from at once."""
+        if self._values_buffer() is not None:
+            return self._draw_values(np.arange(self.nbArms), ())
         return np.array([self.draw(armId, t) for armId in range(self.nbArms)])
 
     def draw_each_nparray(self, shape=(1,)):
-        """ Return a numpy array of random sample from each arm, of a certain shape."""
+        """ Return a numpy array of random sample from each arm, of a certain shape (so of shape ``(nbArms,) +
+        shape``). The arms with values (eg. :class:`DiscreteArm`) are drawn from at once."""
+        if self._values_buffer() is not None:
+            return self._draw_values(np.arange(self.nbArms), tuple(np.atleast_1d(shape)))
         return np.array([self.draw_nparray(armId, shape)
                          for armId in range(self.nbArms)])
 
@@ -166,8 +273,7 @@ class MAB(object):
     def lowerbound(self):
         r""" Compute the constant :math:`C(\mu)`, for the [Lai & Robbins] lower-bound for this MAB problem (
         complexity), using functions from ``kullback.py`` or ``kullback.so`` (see :mod:`Arms.kullback`). """
-        return sum(a.one_lr(self.maxArm, a.mean)
-                   for a in self.arms if a.mean != self.maxArm)
+        return self._sum_suboptimal('one_lr')
 
     def lowerbound_sparse(self, sparsity=None):
         """ Compute the constant :math:`C(mu)`, for [Kwon et al, 2017] lower-bound for sparse bandits for this MAB
@@ -5,12 +5,14 @@ Invoke multiarmed bandit.
 from __future__ import division, print_function
 
 import os, sys
+import numpy as np
 from core.environment.mab import MAB
 from core.arms import DiscreteArm
 from core.scripts.setup import PATH_SAMPLE_DATA_FILES
 from definitions import HISTORICAL_DEMAND_CONSUMPTION
 from core.utils.logger_util import get_logger
-from core.utils.transformations_util import get_historical_demand_by_price
+from core.utils.instrumentation_util import count, timed, timer
+from core.utils.transformations_util import get_demand_store
 from core.policies import *
 Ellipsi=X=[435]
 logger = get_logger()
@@ -21,7 +23,13 @@ class Experiment:
     Class to wrap an experiment
     """
 
-    def __init__(self, placement_id_values):
+    def __init__(self, placement_id_values, statistics=None):
+        """
+        New experiment of one product
+        :param placement_id_values: config of the product, as created by create_input_config_file
+        :param statistics: ArmStatistics to build the environment from, instead of the arms of the demand history (the
+        statistics being as of the date they were built for)
+        """
         self.placement_id_values = placement_id_values
         self.arms = []
 
@@ -38,10 +46,24 @@ class Experiment:
         self.placement_id = self.placement_id_values['placement_ids']['current']
 
         # --- Setup the arms for each price and the consumption
-        self.__initArms__()
-        self.environment = MAB(self.arms)
+        if statistics is None:
+            self.__initArms__()
+            self.environment = MAB(self.arms)
+        else:
+            self.environment = MAB(statistics.mab_state(self._statistics_rows(statistics)))
         self.__initPolicies__()
 
+    def _statistics_rows(self, statistics):
+        """
+        Rows of the statistics of the placement ids of the experiment having a history, in the order of the arms
+        :param statistics: ArmStatistics
+        :return: numpy.ndarray
+        """
+        rows = statistics.product_rows(self.id, self.product_type)
+        by_placement_id = {statistics.keys[row][2]: row for row in rows.tolist()}
+        return np.array([by_placement_id[placement_id] for placement_id in self.placement_id
+                         if placement_id in by_placement_id], dtype=int)
+
 
     def __initPolicies__(self):
         self.policy = self.policy_algorithm(
@@ -51,13 +73,15 @@ class Experiment:
         self.policy.rewards = self.environment.rewards
         self.policy.pulls = self.environment.pulls
         self.policy.rewardsSquared = self.environment.rewardsSquared
-        index, self.calculation = self.policy.choice()
+        with timer('policy.choice'):
+            index, self.calculation = self.policy.choice()
         self.new_placement_id = self.environment.placement_id[index]
 
         logger.info(f'-- Model chooses placement id {self.environment.placement_id[index]}')
         self.placement_id = "Model choice"
 
 
+    @timed('Experiment.__initArms__')
     def __initArms__(self):
         """
         Create the discrete arms using the historical credit consumption
@@ -80,12 +104,14 @@ class Experiment:
 
                     # logger.info(f'-- Adding an Arm with placement id {placement_id} for id {self.id}')
                     self.arms.append(DiscreteArm(placement_id, self.consumption))
-                    logger.debug(f' -- Values of appended arm {DiscreteArm(placement_id, self.consumption)}')
+                    logger.debug(f' -- Values of appended arm {self.arms[-1]!r}')
                     self.num_placement_id_added += 1
 
                 except Exception as e:
                     logger.error(f'Error {e}')
 
+            count('arms_built', len(self.arms))
+
         else:
             raise ValueError('The price list is empty.Add prices')
 
@@ -100,11 +126,9 @@ class Experiment:
         """
 
         if os.path.isfile(os.path.join(PATH_SAMPLE_DATA_FILES, HISTORICAL_DEMAND_CONSUMPTION) + ".csv"):
-            # Query from the csv file
-            previous_rewards = get_historical_demand_by_price(HISTORICAL_DEMAND_CONSUMPTION, id, product_type, date)
-
-
-            consumption = previous_rewards[placement_id]['consumed']
+            # Query from the demand store, the csv file is only read once per process
+            consumption = get_demand_store(HISTORICAL_DEMAND_CONSUMPTION).consumption(
+                id, product_type, placement_id, date)
 
 
         return consumption
@@ -2,76 +2,40 @@
 Starting point for the program
 """
 from definitions import DATA_SOURCE_DISK, HISTORICAL_DEMAND_CONSUMPTION
-from core.experiment import Experiment
+from core.runner import run_experiments
+from core.utils import instrumentation_util
 from core.utils.config_util import create_input_config_file
-from core.utils.transformations_util import get_demand_history
-import pandas as pd
 
 
-def start():
+def start(n_workers=None, chunk_size=None, summary_path=None, prometheus_path=None):
     """
     Invokes the pricing function.
+    :param n_workers: number of processes running the experiments, None for the number of cores
+    :param chunk_size: number of products sent at once to a worker, None for an automatic size
+    :param summary_path: json file of the per stage timings and counters of the run, which enables the
+    instrumentation (it is also enabled by GROCERY_INSTRUMENTATION=1, the summary then going to PATH_INSTRUMENTATION)
+    :param prometheus_path: Prometheus text file of the same summary, which enables the instrumentation too
+    :return: dataframe with the chosen placement id of each product
     """
-
-    ### Create the placement id parameters
-
-    placement_ids_values = create_input_config_file(HISTORICAL_DEMAND_CONSUMPTION, data_source=DATA_SOURCE_DISK)
-
-    for id in placement_ids_values:
-        experiment = Experiment(id)
+    was_enabled = instrumentation_util.is_enabled()
+    if summary_path is not None or prometheus_path is not None:
+        instrumentation_util.enable()
+    elif was_enabled:
+        instrumentation_util.reset()
+
+    try:
+        ### Create the placement id parameters
+
+        placement_ids_values = create_input_config_file(HISTORICAL_DEMAND_CONSUMPTION, data_source=DATA_SOURCE_DISK)
+
+        result = run_experiments(placement_ids_values, n_workers=n_workers, chunk_size=chunk_size)
+        if instrumentation_util.is_enabled():
+            instrumentation_util.write_summary(summary_path, prometheus_path)
+    finally:
+        # Only this run is instrumented, the next calls cost nothing again
+        if not was_enabled:
+            instrumentation_util.disable()
+    return result
 
 if __name__ == '__main__':
     start()
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
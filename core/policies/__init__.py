@@ -7,7 +7,23 @@ from .base_policy import BasePolicy
 
 # --- Simple UCB policies
 from .ucb import UCB
+from .ucbv import UCBV
 from .ucbv_tuned import UCBVtuned
 
+# --- Sliding-window and discounted policies, from [Garivier & Moulines, 2011]
+from .nonstationary import SWUCB, SWUCBVtuned, DiscountedUCB, DiscountedUCBVtuned
+
+# From [Garivier & Cappé, 2011]
+from .klucb import KLUCB
+
+# --- Bayesian policies, from [Thompson, 1933]
+from .thompson import Thompson
+
+# --- Contextual policies, from [Li et al, 2010]
+from .linucb import LinUCB
+
 # From [Baransi et al, 2014]
-from .besa import BESA
\ No newline at end of file
+from .besa import BESA
+
+# --- Batched index policies, for many products at once
+from .batched import BatchedUCB, BatchedUCBV, BatchedUCBVtuned, BatchedKLUCB, BatchedThompson
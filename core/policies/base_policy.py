@@ -44,8 +44,27 @@ class BasePolicy(object):
         self.pulls.fill(0)
         self.rewards.fill(0)
 
+    # --- Save and restore the internal memory
+
+    def get_state(self):
+        """ Internal memory of the policy, as a dictionary of numpy arrays.
+
+        :return: dict
+        """
+        return {'t': np.asarray(self.t), 'pulls': np.asarray(self.pulls), 'rewards': np.asarray(self.rewards)}
+
+    def set_state(self, state):
+        """ Restore the internal memory of the policy, saved by :meth:`get_state`.
+
+        :param state: dict
+        :return: None
+        """
+        self.t = state['t'][()]
+        self.pulls = np.array(state['pulls'], dtype=int)
+        self.rewards = np.array(state['rewards'], dtype=float)
+
     # TODO: Make checkbounds function. for now its being ignored. Probably not needed.
-    def get_reward(self, arm, reward, price):
+    def get_reward(self, arm, reward, price=1.):
         """
 
         :param arm:
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+""" Batched index policies: one policy object for many products.
+
+The internal memory (``t``, ``pulls``, ``rewards``, ``rewardsSquared`` and ``index``) is kept as matrices of shape
+``(nbProducts, nbArms)`` (``t`` being ``(nbProducts, 1)``), so the vectorized ``compute_all_index`` of :class:`UCB`,
+:class:`UCBV`, :class:`UCBVtuned`, :class:`KLUCB` and :class:`Thompson` computes the indexes of every product in
+one pass (for :class:`Thompson`, one sample of all the posteriors), and :meth:`choice` takes the argmax of every row at
+once.
+
+- Products with fewer arms than ``nbArms`` are padded, and their missing arms are masked with ``available``.
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+import numpy as np
+
+from core.policies.index_policy import IndexPolicy
+from core.policies.klucb import KLUCB
+from core.policies.selection import random_argmax_subset
+from core.policies.thompson import Thompson
+from core.policies.ucb import UCB
+from core.policies.ucbv import UCBV
+from core.policies.ucbv_tuned import UCBVtuned
+
+
+class BatchedIndexPolicy(IndexPolicy):
+    """ Generic index policy for many products at once, the index formula coming from the other parent class.
+
+    On the same statistics, it makes the choices and computes the indexes of the index policy of each product (and,
+    for :class:`Thompson`, draws the same samples from a generator of the same seed):
+
+    >>> from core.policies import UCB, UCBV, UCBVtuned, KLUCB, Thompson
+    >>> np.random.seed(0)
+    >>> pulls = np.random.randint(1, 50, size=(4, 3))
+    >>> rewards = pulls * np.random.uniform(size=(4, 3))
+    >>> rewards_squared = rewards ** 2 / pulls + 0.01 * pulls
+    >>> for policy_class in [UCB, UCBV, UCBVtuned, KLUCB, Thompson]:
+    ...     batched = mapping_BATCHED_POLICY[policy_class.__name__](4, 3)
+    ...     batched.rng = np.random.default_rng(1)
+    ...     batched.set_statistics(pulls, rewards, rewards_squared)
+    ...     choices, index = batched.choice()
+    ...     policies = [policy_class(3) for _ in range(4)]
+    ...     rng = np.random.default_rng(1)
+    ...     for product, policy in enumerate(policies):
+    ...         policy.rng, policy.t, policy.pulls = rng, np.sum(pulls[product]), pulls[product]
+    ...         policy.rewards, policy.rewardsSquared = rewards[product], rewards_squared[product]
+    ...     scalar_choices, scalar_index = zip(*[(policy.choice()[0], policy.index.copy()) for policy in policies])
+    ...     print(policy_class.__name__, choices, bool(np.all(choices == scalar_choices)),
+    ...           bool(np.allclose(index, scalar_index)))
+    UCB [2 0 0 1] True True
+    UCBV [2 0 0 2] True True
+    UCBVtuned [2 0 0 1] True True
+    KLUCB [2 0 0 1] True True
+    Thompson [2 1 2 1] True True
+    """
+
+    def __init__(self, nb_products, nb_arms, **params):
+        """ New batched index policy.
+
+        - nbProducts: the number of products, one row each,
+        - nbArms: the (maximum) number of arms of a product,
+        - params: parameters of the index policy, eg. lower and amplitude, the lower value and known amplitude of the
+          rewards.
+        """
+        super(BatchedIndexPolicy, self).__init__(nb_arms, **params)
+        self.nbProducts = nb_products  #: Number of products
+        self.t = np.full((nb_products, 1), -1)  #: Internal time of each product
+        self.pulls = np.zeros((nb_products, nb_arms), dtype=int)
+        self.rewards = np.zeros((nb_products, nb_arms))
+        self.index = np.zeros((nb_products, nb_arms))
+        if hasattr(self, 'rewardsSquared'):
+            self.rewardsSquared = np.zeros((nb_products, nb_arms))
+        #: Whether each arm of each product exists, the other ones are never chosen
+        self.available = np.ones((nb_products, nb_arms), dtype=bool)
+
+    def __str__(self):
+        return "Batched{}".format(super(BatchedIndexPolicy, self).__str__())
+
+    def start_game(self):
+        """ Initialize the policy for a new game, for every product."""
+        super(BatchedIndexPolicy, self).start_game()
+        self.t = np.zeros((self.nbProducts, 1), dtype=int)
+
+    def set_statistics(self, pulls, rewards, rewards_squared=None, available=None):
+        """ Set the memory of every product from aggregate statistics of shape ``(nbProducts, nbArms)``, the time of a
+        product being its total number of pulls (as in :class:`Experiment`)."""
+        self.pulls = np.asarray(pulls)
+        self.rewards = np.asarray(rewards, dtype=float)
+        if rewards_squared is not None:
+            self.rewardsSquared = np.asarray(rewards_squared, dtype=float)
+        if available is not None:
+            self.available = np.asarray(available, dtype=bool)
+        self.t = np.sum(np.where(self.available, self.pulls, 0), axis=1, keepdims=True)
+        self.index = np.zeros(self.pulls.shape)
+
+    def get_reward(self, arms, reward, price=1.):
+        """ Give one reward to each product, for the arm it played: ``arms`` and ``reward`` are of length
+        nbProducts."""
+        rows = np.arange(self.nbProducts)
+        reward = np.asarray(reward, dtype=float)
+        self.t += 1
+        self.pulls[rows, arms] += 1
+        self.rewards[rows, arms] += reward * price
+        if hasattr(self, 'rewardsSquared'):
+            self.rewardsSquared[rows, arms] += ((reward - self.lower) / self.amplitude) ** 2
+
+    def choice(self):
+        r""" Choose, for every product, an arm with maximal index (uniformly at random among the ties):
+
+        .. math:: A_p(t) \sim U(\arg\max_{1 \leq k \leq K} I_{p,k}(t)).
+
+        The ties are broken by :func:`random_argmax`, for all rows at once.
+        """
+        self.compute_all_index()
+        return random_argmax_subset(self.index, self.available, rng=self.rng), self.index
+
+
+class BatchedUCB(BatchedIndexPolicy, UCB):
+    """ The UCB policy, for many products at once."""
+    pass
+
+
+class BatchedUCBV(BatchedIndexPolicy, UCBV):
+    """ The UCB-V policy, for many products at once."""
+    pass
+
+
+class BatchedUCBVtuned(BatchedIndexPolicy, UCBVtuned):
+    """ The UCBV-Tuned policy, for many products at once."""
+    pass
+
+
+class BatchedKLUCB(BatchedIndexPolicy, KLUCB):
+    """ The KL-UCB policy, for many products at once."""
+    pass
+
+
+class BatchedThompson(BatchedIndexPolicy, Thompson):
+    """ The Thompson policy, for many products at once."""
+    pass
+
+
+#: Batched version of each index policy, by name
+mapping_BATCHED_POLICY = {
+    "UCB": BatchedUCB,
+    "UCBV": BatchedUCBV,
+    "UCBVtuned": BatchedUCBVtuned,
+    "KLUCB": BatchedKLUCB,
+    "Thompson": BatchedThompson,
+}
+
+# Only export and expose the classes defined here
+__all__ = ["BatchedIndexPolicy", "BatchedUCB", "BatchedUCBV", "BatchedUCBVtuned", "BatchedKLUCB",
+           "BatchedThompson", "mapping_BATCHED_POLICY"]
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
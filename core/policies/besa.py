@@ -9,15 +9,20 @@ https://github.com/SMPyBandits/SMPyBandits/issues/116
 so take a look to the article before wondering why it should work.
 
 .. warning:: Right now, it is between 10 and 25 times slower than :class:`Policies.klUCB` and other single-player
-policies. """
+policies. The tournament of :func:`besa_k_actions__vectorized` (used by default) is 2 to 3 times faster than the
+recursive one, see ``benchmarks/bench_besa.py``. """
 from __future__ import division, print_function  # Python 2 compatibility
 
 __author__ = 'Akalya'
 __maintainer__ = 'Akalya'
 
+from functools import partial
+
 import numpy as np
 
 from core.policies.index_policy import IndexPolicy
+from core.policies.reward_store import RewardStore
+from core.policies.subsampling import PERMUTATION_MAX_SIZE, SubSampler
 
 # --- Utility functions
 
@@ -86,8 +91,8 @@ def besa_two_actions(rewards, pulls, a, b, subsample_function=subsample_uniform)
     - Else if m_a < m_b, choose b,
     - And in case of a tie, break by choosing i such that Ni is minimal (or random [a, b] if Na=Nb).
 
-    .. note:: ``rewards`` can be a numpy array of shape (at least) ``(nbArms, max(Na, Nb))`` or a dictionary maping
-    ``a,b`` to lists (or iterators) of lengths ``>= max(Na, Nb)``.
+    .. note:: ``rewards`` can be a numpy array of shape (at least) ``(nbArms, max(Na, Nb))``, a :class:`RewardStore`
+    or a dictionary maping ``a,b`` to lists (or iterators) of lengths ``>= max(Na, Nb)``.
 
     >>> np.random.seed(2345)  # reproducible results
     >>> pulls = [6, 10]; K = len(pulls); N = max(pulls)
@@ -99,7 +104,6 @@ def besa_two_actions(rewards, pulls, a, b, subsample_function=subsample_uniform)
     >>> besa_two_actions(rewards, pulls, 0, 1, subsample_function=subsample_deterministic)  # doctest: +ELLIPSIS
     0
     >>> [besa_two_actions(rewards, pulls, 0, 1, subsample_function=subsample_uniform) for _ in range(10)]
-    # doctest: +ELLIPSIS
     [0, 0, 1, 1, 0, 0, 1, 0, 0, 0]
     """
     if a == b:
@@ -114,7 +118,7 @@ def besa_two_actions(rewards, pulls, a, b, subsample_function=subsample_uniform)
     # assert all(0 <= i < Nb for i in Ib), "Error: indexes in Ib should be between 0 and Nb = {}".format(Nb)  # DEBUG
     # assert len(Ia) == len(Ib) == N, "Error in subsample_function, Ia of size = {} and Ib of size = {} should have
     # size N = {} ...".format(len(Ia), len(Ib), N)  # DEBUG Compute sub means
-    if isinstance(rewards, np.ndarray):  # faster to compute this
+    if isinstance(rewards, (np.ndarray, RewardStore)):  # faster to compute this
         sub_mean_a = np.sum(rewards[a, ia]) / n
         sub_mean_b = np.sum(rewards[b, ib]) / n
     else:  # than this for other data type (eg. dict mapping int to list)
@@ -155,10 +159,8 @@ def besa_k_actions_non_randomized(rewards, pulls, left, right, subsample_functio
     >>> np.mean(rewards[:, :min(pulls)], axis=1)  # arm 1 is better in the first 6 samples
     array([-0.06401484,  0.17366346,  0.05323033, -0.09514708])
     >>> besa_k_actions_non_randomized(rewards, pulls, 0, K-1, subsample_function=subsample_deterministic)
-    # doctest: +ELLIPSIS
     3
     >>> [besa_k_actions_non_randomized(rewards, pulls, 0, K-1, subsample_function=subsample_uniform) for _ in range(10)]
-    # doctest: +ELLIPSIS
     [3, 3, 2, 3, 3, 0, 0, 0, 2, 3]
     """
     # assert left <= right, "Error: in 'besa_K_actions' function, left = {} was not <= right = {}...".format(left,
@@ -207,10 +209,9 @@ def besa_k_actions_smart_divideandconquer(rewards, pulls, left, right, random_pe
     >>> np.mean(rewards[:, :min(pulls)], axis=1)  # arm 1 is better in the first 6 samples
     array([-0.06401484,  0.17366346,  0.05323033, -0.09514708])
     >>> besa_k_actions_smart_divideandconquer(rewards, pulls, 0, K-1, subsample_function=subsample_deterministic)
-    # doctest: +ELLIPSIS
     3
     >>> [besa_k_actions_smart_divideandconquer(rewards, pulls, 0, K-1,
-    subsample_function=subsample_uniform) for _ in range(10)]  # doctest: +ELLIPSIS
+    ...                                        subsample_function=subsample_uniform) for _ in range(10)]
     [3, 3, 2, 3, 3, 0, 0, 0, 2, 3]
     """
     # assert left <= right, "Error: in 'besa_K_actions__smart_divideandconquer' function, left = {} was not <= right
@@ -269,10 +270,9 @@ def besa_k_actions(rewards, pulls, actions, subsample_function=subsample_uniform
     array([ 0.09876921, -0.18561207,  0.04463033,  0.0653539 ])
     >>> np.mean(rewards[:, :min(pulls)], axis=1)  # arm 1 is better in the first 6 samples
     array([-0.06401484,  0.17366346,  0.05323033, -0.09514708])
-    >>> besa_k_actions(rewards, pulls, actions, subsample_function=subsample_deterministic)  # doctest: +ELLIPSIS
+    >>> int(besa_k_actions(rewards, pulls, actions, subsample_function=subsample_deterministic))
     3
-    >>> [besa_k_actions(rewards, pulls, actions, subsample_function=subsample_uniform) for _ in range(10)]
-    # doctest: +ELLIPSIS
+    >>> [int(besa_k_actions(rewards, pulls, actions, subsample_function=subsample_uniform)) for _ in range(10)]
     [3, 3, 2, 3, 3, 0, 0, 0, 2, 3]
     """
     # print("In 'besa_K_actions', actions = {} for this call.".format(actions))  # DEBUG
@@ -317,11 +317,10 @@ def besa_k_actions__non_binary(rewards, pulls, actions, subsample_function=subsa
     array([ 0.09876921, -0.18561207,  0.04463033,  0.0653539 ])
     >>> np.mean(rewards[:, :min(pulls)], axis=1)  # arm 1 is better in the first 6 samples
     array([-0.06401484,  0.17366346,  0.05323033, -0.09514708])
-    >>> besa_k_actions__non_binary(rewards, pulls, actions, subsample_function=subsample_deterministic)
-    # doctest: +ELLIPSIS
+    >>> int(besa_k_actions__non_binary(rewards, pulls, actions, subsample_function=subsample_deterministic))
     3
-    >>> [besa_k_actions__non_binary(rewards, pulls, actions, subsample_function=subsample_uniform) for _ in range(10)]
-     # doctest: +ELLIPSIS
+    >>> [int(besa_k_actions__non_binary(rewards, pulls, actions, subsample_function=subsample_uniform))
+    ...  for _ in range(10)]
     [3, 3, 3, 2, 0, 3, 3, 3, 3, 3]
     """
     # print("In 'besa_K_actions__non_binary', actions = {} for this call.".format(actions))  # DEBUG
@@ -353,11 +352,10 @@ def besa_k_actions__non_recursive(rewards, pulls, actions, subsample_function=su
     array([ 0.09876921, -0.18561207,  0.04463033,  0.0653539 ])
     >>> np.mean(rewards[:, :min(pulls)], axis=1)  # arm 1 is better in the first 6 samples
     array([-0.06401484,  0.17366346,  0.05323033, -0.09514708])
-    >>> besa_k_actions__non_recursive(rewards, pulls, None, subsample_function=subsample_deterministic)
-    # doctest: +ELLIPSIS
+    >>> int(besa_k_actions__non_recursive(rewards, pulls, None, subsample_function=subsample_deterministic))
     3
-    >>> [besa_k_actions__non_recursive(rewards, pulls, None, subsample_function=subsample_uniform) for _ in range(10)]
-    # doctest: +ELLIPSIS
+    >>> [int(besa_k_actions__non_recursive(rewards, pulls, None, subsample_function=subsample_uniform))
+    ...  for _ in range(10)]
     [1, 3, 0, 2, 2, 3, 1, 1, 3, 1]
     """
     k = len(pulls)
@@ -366,7 +364,7 @@ def besa_k_actions__non_recursive(rewards, pulls, actions, subsample_function=su
     for k in range(k):
         ik = subsample_function(min_pulls, pulls[k])
         # sub_means[k] = np.mean(rewards[k, Ik])
-        if isinstance(rewards, np.ndarray):  # faster to compute this
+        if isinstance(rewards, (np.ndarray, RewardStore)):  # faster to compute this
             sub_means[k] = np.sum(rewards[k, ik]) / min_pulls
         else:  # than this for other data type (eg. dict mapping int to list)
             sub_means[k] = sum(rewards[k][i] for i in ik) / min_pulls
@@ -377,6 +375,257 @@ def besa_k_actions__non_recursive(rewards, pulls, actions, subsample_function=su
     return which_are_best[np.random.choice(np.nonzero(best_less_sampled == np.min(best_less_sampled))[0])]
 
 
+# --- Vectorized BESA tournament: the independent duels of each round at once
+
+
+#: Cache of the tournament schedules, by number of actions
+_SCHEDULES = {}
+#: Smallest number of duels of a round played at once by :func:`besa_duels`, the smaller rounds being faster duel by
+#: duel, as the cost of the sub-sampling is then dominated by the number of rewards and not by the number of duels
+VECTORIZED_ROUND = 16
+
+
+def tournament_schedule(nb_actions):
+    """ Duels of the binary tournament of :func:`besa_k_actions` for ``nb_actions`` actions, grouped in rounds of
+    independent duels.
+
+    - Slots ``0, ..., nb_actions - 1`` hold the actions, and the winner of the d-th duel goes to slot
+      ``nb_actions + d``, so the winner of the tournament is in the last slot,
+    - A round is a tuple of arrays ``(left_slots, right_slots, winner_slots)``, each duel of a round only depending on
+      the duels of the previous rounds.
+
+    >>> tournament_schedule(3)  # actions[0] against the winner of actions[1] and actions[2]
+    [(array([1]), array([2]), array([3])), (array([0]), array([3]), array([4]))]
+    """
+    if nb_actions not in _SCHEDULES:
+        duels = []
+
+        def split(left, right):
+            """ Slot and height of the winner of actions[left:right], split as in besa_k_actions."""
+            if right - left == 1:
+                return left, 0
+            pivot = left + (right - left) // 2
+            (slot_left, height_left), (slot_right, height_right) = split(left, pivot), split(pivot, right)
+            duels.append((max(height_left, height_right) + 1, slot_left, slot_right, nb_actions + len(duels)))
+            return duels[-1][3], duels[-1][0]
+
+        split(0, nb_actions)
+        schedule = []
+        for height in sorted(set(duel[0] for duel in duels)):
+            same_round = [duel for duel in duels if duel[0] == height]
+            schedule.append(tuple(np.array([duel[i] for duel in same_round], dtype=int) for i in (1, 2, 3)))
+        _SCHEDULES[nb_actions] = schedule
+    return _SCHEDULES[nb_actions]
+
+
+def _arm_rewards(rewards, arm, count):
+    """ The first ``count`` rewards of an arm, as an array."""
+    if isinstance(rewards, np.ndarray):
+        return rewards[arm, :count]
+    if isinstance(rewards, RewardStore):
+        return rewards.values(arm)[:count]
+    return np.asarray(rewards[arm][:count], dtype=float)
+
+
+def _reward_sums(rewards, pulls, arms):
+    """ Sum of the first ``pulls[arm]`` rewards of some arms."""
+    if isinstance(rewards, RewardStore):
+        return rewards.sums[arms]
+    return np.array([np.sum(_arm_rewards(rewards, arm, pulls[arm])) for arm in arms])
+
+
+def subsample_sums(rewards, arms, counts, sizes, random_subsample=True, sampler=None, totals=None):
+    """ Sum of a sub-sample of ``sizes[i]`` of the first ``counts[i]`` rewards of ``arms[i]``, for all i at once.
+
+    - The random sub-samples are uniform without replacement: the rewards of all the arms are concatenated, randomly
+      permuted, and grouped back by arm with a stable (radix) sort, which shuffles the rewards within each arm in
+      :math:`\mathcal{O}(\sum_i counts_i)`; the first ``sizes[i]`` ones of each arm are then summed,
+    - With a :class:`SubSampler`, the permutation uses its generator, and the sub-samples of long histories are drawn
+      arm by arm in :math:`\mathcal{O}(sizes_i)` (using the sums of all the rewards, ``totals``, if given),
+    - The deterministic sub-samples are the first ``sizes[i]`` rewards.
+
+    >>> rewards = np.array([[1., 2., 3., 4.], [10., 20., 30., 40.]])
+    >>> subsample_sums(rewards, np.array([0, 1]), np.array([4, 3]), np.array([2, 3]), random_subsample=False)
+    array([ 3., 60.])
+    >>> subsample_sums(rewards, np.array([0, 1]), np.array([4, 3]), np.array([4, 3]))
+    array([10., 60.])
+    """
+    if random_subsample and sampler is not None and np.sum(counts) > PERMUTATION_MAX_SIZE * len(arms):
+        totals = [None] * len(arms) if totals is None else totals
+        return np.array([sampler.sum(_arm_rewards(rewards, arm, count), size, total=total)
+                         for arm, count, size, total in zip(arms, counts, sizes, totals)])
+    values = np.concatenate([_arm_rewards(rewards, arm, count) for arm, count in zip(arms, counts)])
+    starts = np.cumsum(counts) - counts
+    if random_subsample:
+        segments = np.repeat(np.arange(len(arms), dtype=np.int16 if len(arms) < 2 ** 15 else int), counts)
+        permutation = (np.random if sampler is None else sampler.rng).permutation(len(values))
+        values = values[permutation[np.argsort(segments[permutation], kind='stable')]]
+    cumulated = np.concatenate(([0.], np.cumsum(values)))
+    return cumulated[starts + sizes] - cumulated[starts]
+
+
+def besa_duels(rewards, pulls, a, b, sums=None, random_subsample=True, sampler=None):
+    """ The duels of :func:`besa_two_actions` between ``a[i]`` and ``b[i]``, for all i at once.
+
+    - The less pulled arm of a duel is sub-sampled entirely, so its sub-sample sum is the sum of all its rewards
+      (``sums``, computed if not given), and only the other arm is actually sub-sampled.
+
+    >>> rewards = np.array([[1., 1., 1.], [0., 0., 0.], [1., 0., 1.]])
+    >>> besa_duels(rewards, np.array([3, 3, 3]), np.array([0, 1]), np.array([1, 2]))
+    array([0, 2])
+    """
+    pulls = np.asarray(pulls)
+    a_larger = pulls[a] > pulls[b]
+    larger, smaller = np.where(a_larger, a, b), np.where(a_larger, b, a)
+    sizes, counts = pulls[smaller], pulls[larger]
+    if sums is None:
+        sums = np.zeros(len(pulls))
+        sums[np.r_[a, b]] = _reward_sums(rewards, pulls, np.r_[a, b])
+    sum_larger = sums[larger]
+    # Only the more pulled arms need to be sub-sampled
+    subsampled = np.flatnonzero(counts > sizes)
+    if len(subsampled) > 0:
+        sum_larger[subsampled] = subsample_sums(rewards, larger[subsampled], counts[subsampled], sizes[subsampled],
+                                                random_subsample=random_subsample, sampler=sampler,
+                                                totals=sum_larger[subsampled])
+    difference = (sum_larger - sums[smaller]) / sizes
+    # In case of a tie, the less pulled arm wins, or a uniformly random one if they were pulled as much
+    chosen = np.where(difference > TOLERANCE, larger, smaller)
+    random_ties = (np.abs(difference) <= TOLERANCE) & (counts == sizes)
+    if np.any(random_ties):
+        chosen[random_ties] = np.where(np.random.random_sample(len(a)) < 0.5, a, b)[random_ties]
+    return chosen
+
+
+def _besa_duel(rewards, pulls, sums, a, b, random_subsample=True, sampler=None):
+    """ One duel of :func:`besa_duels`, without the array overhead."""
+    if pulls[a] > pulls[b]:
+        larger, smaller = a, b
+    else:
+        larger, smaller = b, a
+    size, count = pulls[smaller], pulls[larger]
+    sum_larger = sums[larger]
+    if count > size:
+        values = _arm_rewards(rewards, larger, count)
+        if not random_subsample:
+            sum_larger = np.sum(values[:size])
+        elif sampler is not None:
+            sum_larger = sampler.sum(values, size, total=sum_larger)
+        else:
+            sum_larger = np.sum(values[np.random.permutation(count)[:size]])
+    difference = (sum_larger - sums[smaller]) / size
+    if difference > TOLERANCE:
+        return larger
+    elif difference < -TOLERANCE or count > size:
+        return smaller
+    return a if np.random.random_sample() < 0.5 else b
+
+
+def besa_k_actions__vectorized(rewards, pulls, actions, subsample_function=subsample_uniform, depth=0, sampler=None):
+    r""" BESA selection algorithm for an action set of size :math:`\mathcal{K} \geq 1`, with the same binary
+    tournament as :func:`besa_k_actions` (so the same distribution of the chosen arm), but played round by round: all
+    the duels of a large round are done at once by :func:`besa_duels`.
+
+    - In each duel, only the more pulled arm is sub-sampled, the other one using the sum of all its rewards.
+
+    - Actions is assumed to be shuffled *before* calling this function!
+    - Any sub-sampling function other than :func:`subsample_deterministic` is taken as uniform sub-sampling, done by the
+      :class:`SubSampler` if one is given.
+
+    >>> np.random.seed(1234)  # reproducible results
+    >>> pulls = [5, 6, 7, 8]; K = len(pulls); N = max(pulls)
+    >>> actions = np.arange(K)
+    >>> rewards = np.random.randn(K, N)
+    >>> besa_k_actions__vectorized(rewards, pulls, actions, subsample_function=subsample_deterministic)
+    3
+    """
+    actions = np.asarray(actions, dtype=int)
+    if len(actions) <= 1:
+        return int(actions[0])
+    return int(_play_tournament(rewards, pulls, actions, subsample_function=subsample_function, sampler=sampler)[0][-1])
+
+
+def _play_tournament(rewards, pulls, actions, subsample_function=subsample_uniform, sampler=None):
+    """ Plays the tournament of :func:`besa_k_actions__vectorized`, and returns the winner of every slot of
+    :func:`tournament_schedule` and the sums of the rewards of the arms."""
+    pulls = np.asarray(pulls)
+    sums = np.zeros(len(pulls))
+    sums[actions] = _reward_sums(rewards, pulls, actions)
+    random_subsample = subsample_function is not subsample_deterministic
+    winners = np.empty(2 * len(actions) - 1, dtype=int)
+    winners[:len(actions)] = actions
+    for left_slots, right_slots, winner_slots in tournament_schedule(len(actions)):
+        if len(winner_slots) < VECTORIZED_ROUND:
+            for left, right, slot in zip(winners[left_slots], winners[right_slots], winner_slots):
+                winners[slot] = _besa_duel(rewards, pulls, sums, left, right, random_subsample=random_subsample,
+                                           sampler=sampler)
+            continue
+        winners[winner_slots] = besa_duels(rewards, pulls, winners[left_slots], winners[right_slots], sums=sums,
+                                           random_subsample=random_subsample, sampler=sampler)
+    return winners, sums
+
+
+#: Cache of the tournament trees, by number of actions
+_TREES = {}
+
+
+def _tournament_tree(nb_actions):
+    """ Left and right children of each slot of :func:`tournament_schedule` (-1 for the actions), and its parent (-1 for
+    the winner of the tournament)."""
+    if nb_actions not in _TREES:
+        children = np.full((2, 2 * nb_actions - 1), -1, dtype=int)
+        parents = np.full(2 * nb_actions - 1, -1, dtype=int)
+        for left_slots, right_slots, winner_slots in tournament_schedule(nb_actions):
+            children[0, winner_slots], children[1, winner_slots] = left_slots, right_slots
+            parents[left_slots] = parents[right_slots] = winner_slots
+        _TREES[nb_actions] = children[0].tolist(), children[1].tolist(), parents.tolist()
+    return _TREES[nb_actions]
+
+
+def besa_k_actions__ranked(rewards, pulls, actions, nb=1, subsample_function=subsample_uniform, sampler=None):
+    r""" The ``nb`` best actions, in order, by BESA tournaments sharing their duels (a tournament sort):
+
+    - the first action wins the tournament of :func:`besa_k_actions__vectorized`,
+    - each next action wins the same tournament without the previous winners: only the duels on the path of the last
+      winner are played again, the others keep their results.
+
+    So the ``nb`` actions cost one tournament and :math:`(nb - 1) \lceil \log_2 K \rceil` duels, instead of ``nb``
+    tournaments.
+
+    - Actions is assumed to be shuffled *before* calling this function!
+
+    >>> np.random.seed(1234)  # reproducible results
+    >>> pulls = [5, 6, 7, 8]; K = len(pulls); N = max(pulls)
+    >>> actions = np.arange(K)
+    >>> rewards = np.random.randn(K, N)
+    >>> besa_k_actions__ranked(rewards, pulls, actions, nb=K, subsample_function=subsample_deterministic)
+    array([3, 2, 1, 0])
+    """
+    actions = np.asarray(actions, dtype=int)
+    nb = min(nb, len(actions))
+    winners, sums = _play_tournament(rewards, pulls, actions, subsample_function=subsample_function, sampler=sampler)
+    pulls = np.asarray(pulls)
+    random_subsample = subsample_function is not subsample_deterministic
+    left_children, right_children, parents = _tournament_tree(len(actions))
+    leaves = {arm: slot for slot, arm in enumerate(actions.tolist())}
+    ranking = [int(winners[-1])]
+    for _ in range(1, nb):
+        # Remove the last winner, and replay the duels of its path, a lone arm going through
+        slot = leaves[ranking[-1]]
+        winners[slot] = -1
+        slot = parents[slot]
+        while slot >= 0:
+            left, right = winners[left_children[slot]], winners[right_children[slot]]
+            if left < 0 or right < 0:
+                winners[slot] = max(left, right)
+            else:
+                winners[slot] = _besa_duel(rewards, pulls, sums, left, right, random_subsample=random_subsample,
+                                           sampler=sampler)
+            slot = parents[slot]
+        ranking.append(int(winners[-1]))
+    return np.array(ranking)
+
+
 # --- The BESA policy
 
 
@@ -385,21 +634,21 @@ class BESA(IndexPolicy):
 
     - Reference: [[Sub-Sampling For Multi Armed Bandits, Baransi et al., 2014]](https://hal.inria.fr/hal-01025651)
 
-    .. warning:: The BESA algorithm requires to store all the history of rewards, so its memory usage for :math:`T`
-    rounds with :math:`K` arms is :math:`\mathcal{O}(K T)`, which is huge for large :math:`T`, be careful! Aggregating
-    different BESA instances is probably a bad idea because of this limitation!
+    .. note:: The history of rewards is kept in a :class:`RewardStore`, which grows with the number of pulls of each arm
+    (and not with the horizon). It can keep ``float32`` (``reward_dtype=np.float32``) or integer-quantized rewards
+    (eg. ``reward_dtype=np.int32`` for unit-sale counts), and at most ``max_rewards`` rewards per arm, a uniform sample
+    of its history: the sub-samples are then drawn from these stored rewards.
     """
 
     def __init__(self, nb_arms, horizon=None,
                  min_pulls_of_each_arm=1, randomized_tournament=True, random_subsample=True,
-                 non_binary=False, non_recursive=False,
-                 lower=0., amplitude=1.):
+                 non_binary=False, non_recursive=False, vectorized=True,
+                 lower=0., amplitude=1.,
+                 reward_dtype=np.float64, reward_scale=None, max_rewards=None):
         super(BESA, self).__init__(nb_arms, lower=lower, amplitude=amplitude)
         # --- Arguments
-        # XXX find a solution to not need to horizon?
-        # : Just to know the memory to allocate for rewards. It could be implemented without
+        #: Only kept for the name of the policy, the memory for the rewards grows with the pulls
         self.horizon = horizon
-        # knowing the horizon, by using lists to keep all the reward history, but this would be way slower!
         self.minPullsOfEachArm = max(1, int(min_pulls_of_each_arm))
         # : Minimum number of pulls of each arm before using
         # the BESA algorithm. Using 1 might not be the best choice
@@ -415,7 +664,12 @@ class BESA(IndexPolicy):
         assert not (non_binary and non_recursive), "Error: BESA cannot use simultaneously non_binary and " \
                                                    "non_recursive option..."  # DEBUG
         self._subsample_function = subsample_uniform if random_subsample else subsample_deterministic
-        self._besa_function = besa_k_actions
+        #: Whether to play the binary tournament round by round with :func:`besa_k_actions__vectorized`
+        self.vectorized = vectorized
+        #: Random sub-sampling of the vectorized tournament, in :math:`\mathcal{O}(n)` for n sub-sampled rewards
+        self.sampler = SubSampler(self.rng)
+        self._tournament = partial(besa_k_actions__vectorized, sampler=self.sampler) if vectorized else besa_k_actions
+        self._besa_function = self._tournament
         if non_binary:
             self._besa_function = besa_k_actions__non_binary
         if non_recursive:
@@ -429,14 +683,9 @@ class BESA(IndexPolicy):
 
         # Memory to store all the rewards
         self._has_horizon = (self.horizon is not None) and (self.horizon > 1)
-        if self._has_horizon:
-            # : Keep **all** rewards of each arms. It consumes a
-            self.all_rewards = np.zeros((nb_arms, horizon + 1))
-            # :math:`\mathcal{O}(K T)` memory, that's really bad!!
-            # Just security, to be sure they don't count as zero in some computation
-            self.all_rewards.fill(-1e5)
-        else:
-            self.all_rewards = {k: [] for k in range(nb_arms)}
+        #: History of the rewards of each arm (or a uniform sample of at most ``max_rewards`` of them)
+        self.all_rewards = RewardStore(nb_arms, dtype=reward_dtype, scale=reward_scale, max_size=max_rewards,
+                                       rng=self.sampler.rng)
 
     def __str__(self):
         """ -> str"""
@@ -458,16 +707,33 @@ class BESA(IndexPolicy):
             ")" if (b1 or b2 or b3 or b4 or b5 or b6) else "",
         )
 
-    def get_reward(self, arm, reward, price):
+    def start_game(self):
+        """ Initialize the policy for a new game, forgetting the history of rewards."""
+        super(BESA, self).start_game()
+        self.all_rewards.clear()
+
+    def get_state(self):
+        """ Internal memory of the policy, with the history of rewards of all arms, concatenated arm after arm."""
+        state = super(BESA, self).get_state()
+        state['all_rewards'] = self.all_rewards.concatenate()
+        state['all_rewards_counts'] = self.all_rewards.counts.copy()
+        return state
+
+    def set_state(self, state):
+        """ Restore the internal memory of the policy, with the history of rewards of all arms."""
+        super(BESA, self).set_state(state)
+        bounds = np.r_[0, np.cumsum(state['all_rewards_counts'])].astype(int)
+        for k in range(self.nbArms):
+            self.all_rewards.replace(k, state['all_rewards'][bounds[k]:bounds[k + 1]])
+        # The stored rewards may be a sample of all the rewards received
+        self.all_rewards.seen = np.maximum(self.all_rewards.seen, self.pulls)
+
+    def get_reward(self, arm, reward, price=1.):
         """ Add the current reward in the global history.
 
         .. note:: There is no need to normalize the reward in [0,1], that's one of the strong point of the BESA
         algorith m."""
-        # XXX find a solution to not need to horizon?
-        if self._has_horizon:
-            self.all_rewards[arm, self.pulls[arm]] = reward * price
-        else:
-            self.all_rewards[arm].append(reward * price)
+        self.all_rewards.append(arm, reward * price)
         super(BESA, self).get_reward(arm, reward, price)
 
     # --- Basic choice() and handleCollision() method
@@ -481,7 +747,7 @@ class BESA(IndexPolicy):
             if self.randomized_tournament:
                 np.random.shuffle(self._actions)
             # print("Calling 'besa_K_actions' with actions list = {}...".format(self._actions))  # DEBUG
-            return self._besa_function(self.all_rewards, self.pulls, self._actions,
+            return self._besa_function(self.all_rewards, self.all_rewards.counts, self._actions,
                                        subsample_function=self._subsample_function, depth=0)
 
     # --- Others choice...() methods, partly implemented
@@ -499,8 +765,8 @@ class BESA(IndexPolicy):
                 if self.randomized_tournament:
                     np.random.shuffle(actions)
                 # print("Calling 'besa_K_actions' with actions list = {}...".format(actions))  # DEBUG
-                return besa_k_actions(self.all_rewards, self.pulls, actions,
-                                      subsample_function=self._subsample_function, depth=0)
+                return self._tournament(self.all_rewards, self.all_rewards.counts, actions,
+                                        subsample_function=self._subsample_function, depth=0)
 
     def choice_multiple(self, nb=1):
         """ Applies the multiple-choice BESA procedure with the current data history:
@@ -509,42 +775,44 @@ class BESA(IndexPolicy):
         2. remove it from the set of actions,
         3. restart step 1 with new smaller set of actions, until ``nb`` arm where chosen by basic BESA.
 
-        .. note:: This was not studied or published before, and there is no theoretical results about it!
+        The arms which were not pulled enough come first, in a random order. With the vectorized tournament, the
+        tournaments of step 3 share the duels of the first one (see :func:`besa_k_actions__ranked`), so ``nb`` arms
+        cost about one tournament.
 
-        .. warning:: This is very inefficient! The BESA procedure is already quite slow (with my current naive
-        implementation), this is crazily slow!
+        .. note:: This was not studied or published before, and there is no theoretical results about it!
         """
         if nb == 1:
             return np.array([self.choice()])
-        else:
-            actions = list(range(self.nbArms))
-            choices = []
-            for _ in range(nb):
-                # if some arm has never been selected, force to explore it!
-                if np.any(self.pulls[actions] < self.minPullsOfEachArm):
-                    choice_n = actions[np.random.choice(
-                        np.where(self.pulls[actions] < self.minPullsOfEachArm)[0])]
-                else:
-                    if self.randomized_tournament:
-                        np.random.shuffle(actions)
-                    # print("Calling 'besa_K_actions' with actions list = {}...".format(actions))  # DEBUG
-                    choice_n = besa_k_actions(self.all_rewards, self.pulls, actions,
-                                              subsample_function=self._subsample_function, depth=0)
-                # now, store it, remove it from action set
-                choices.append(choice_n)
-                actions.remove(choice_n)
+        # if some arm has never been selected, force to explore it!
+        under_explored = np.random.permutation(np.flatnonzero(self.pulls < self.minPullsOfEachArm))
+        choices = under_explored[:nb].tolist()
+        actions = [k for k in range(self.nbArms) if self.pulls[k] >= self.minPullsOfEachArm]
+        if len(choices) == nb or not actions:
+            return np.array(choices)
+        if self.randomized_tournament:
+            np.random.shuffle(actions)
+        if self.vectorized:
+            choices.extend(besa_k_actions__ranked(self.all_rewards, self.all_rewards.counts, actions,
+                                                  nb=nb - len(choices), subsample_function=self._subsample_function,
+                                                  sampler=self.sampler).tolist())
             return np.array(choices)
+        while len(choices) < nb and actions:
+            if self.randomized_tournament:
+                np.random.shuffle(actions)
+            choice_n = besa_k_actions(self.all_rewards, self.all_rewards.counts, actions,
+                                      subsample_function=self._subsample_function, depth=0)
+            # now, store it, remove it from action set
+            choices.append(choice_n)
+            actions.remove(choice_n)
+        return np.array(choices)
 
     def choice_with_rank(self, rank=1):
         """ Applies the ranked BESA procedure with the current data history:
 
-        1. use :meth:`choiceMultiplie` to select ``rank`` actions,
+        1. use :meth:`choice_multiple` to select ``rank`` actions,
         2. then take the ``rank``-th chosen action (the last one).
 
         .. note:: This was not studied or published before, and there is no theoretical results about it!
-
-        .. warning:: This is very inefficient! The BESA procedure is already quite slow (with my current naive
-        implementation), this is crazily slow!
         """
         choices = self.choice_multiple(nb=rank)
         return choices[-1]
@@ -11,6 +11,7 @@ __version__ = "0.6"
 import numpy as np
 
 from core.policies.base_policy import BasePolicy
+from core.policies.selection import random_argmax, random_argmax_subset, random_rank, random_top_m
 
 
 class IndexPolicy(BasePolicy):
@@ -25,6 +26,8 @@ class IndexPolicy(BasePolicy):
         super(IndexPolicy, self).__init__(
             nb_arms, lower=lower, amplitude=amplitude)
         self.index = np.zeros(nb_arms)  #: Numerical index for each arms
+        #: :class:`numpy.random.Generator` used to break ties, None to use the global numpy random state
+        self.rng = None
 
     # --- Start game, and receive rewards
 
@@ -33,6 +36,17 @@ class IndexPolicy(BasePolicy):
         super(IndexPolicy, self).start_game()
         self.index.fill(0)
 
+    def get_state(self):
+        """ Internal memory of the policy, with the indexes."""
+        state = super(IndexPolicy, self).get_state()
+        state['index'] = np.asarray(self.index)
+        return state
+
+    def set_state(self, state):
+        """ Restore the internal memory of the policy, with the indexes."""
+        super(IndexPolicy, self).set_state(state)
+        self.index = np.array(state['index'], dtype=float)
+
     def compute_index(self, arm):
         """ Compute the current index of arm 'arm'."""
         raise NotImplementedError(
@@ -52,8 +66,8 @@ class IndexPolicy(BasePolicy):
 
         .. math:: A(t) \sim U(\arg\max_{1 \leq k \leq K} I_k(t)).
 
-        .. warning:: In almost all cases, there is a unique arm with maximal index, so we loose a lot of time with
-        this generic code, but I couldn't find a way to be more efficient without loosing generality.
+        .. note:: In almost all cases, there is a unique arm with maximal index, :func:`random_argmax` only draws a
+        random number when there is a tie.
         """
         # I prefer to let this be another method, so child of IndexPolicy only needs to implement it (if they want,
         # or just computeIndex)
@@ -61,7 +75,7 @@ class IndexPolicy(BasePolicy):
         # Uniform choice among the best arms
         try:
             # print(self.index)
-            return np.random.choice(np.nonzero(self.index == np.max(self.index))[0]),self.index
+            return random_argmax(self.index, rng=self.rng), self.index
 
         except ValueError:
             print("Warning: unknown error in IndexPolicy.choice(): the indexes were {} but couldn't be used to select "
@@ -86,13 +100,11 @@ class IndexPolicy(BasePolicy):
             assert rank >= 1, "Error: for IndexPolicy = {}, in choiceWithRank(rank={}) rank has to be >= 1.".format(
                 self, rank)
             self.compute_all_index()
-            sorted_rewards = np.sort(self.index)
             # Question: What happens here if two arms has the same index, being the max? Then it is fair to chose a
             # random arm with best index, instead of aiming at an arm with index being ranked rank
-            chosen_index = sorted_rewards[-rank]
             # Uniform choice among the rank-th best arms
             try:
-                return np.random.choice(np.nonzero(self.index == chosen_index)[0])
+                return random_rank(self.index, rank, rng=self.rng)
             except ValueError:
                 print("Warning: unknown error in IndexPolicy.choiceWithRank(): the indexes were {} but couldn't be "
                       "used to select an arm.".format(
@@ -118,8 +130,7 @@ class IndexPolicy(BasePolicy):
                 self.index[arm] = self.compute_index(arm)
             # Uniform choice among the best arms
             try:
-                return available_arms[np.random.choice(
-                    np.nonzero(self.index[available_arms] == np.max(self.index[available_arms]))[0])]
+                return random_argmax_subset(self.index, np.asarray(available_arms), rng=self.rng)
             except ValueError:
                 return np.random.choice(available_arms)
 
@@ -138,13 +149,13 @@ class IndexPolicy(BasePolicy):
             else:
                 empirical_means = self.rewards / self.pulls
                 empirical_means[self.pulls < 1] = float('inf')
-            # First choose nb-1 arms, from rewards
-            sorted_empirical_means = np.sort(empirical_means)
-            exploitations = np.random.choice(np.nonzero(
-                empirical_means >= sorted_empirical_means[-nb])[0], size=nb - 1, replace=False)
+            # First choose nb-1 arms, uniformly among the arms with one of the nb best empirical means
+            threshold = np.partition(empirical_means, -nb)[-nb]
+            exploitations = random_top_m(empirical_means >= threshold, nb - 1, rng=self.rng)
             # Then choose 1 arm, from index now
-            available_arms = np.setdiff1d(np.arange(self.nbArms), exploitations)
-            exploration = self.choice_from_subset(available_arms)
+            available_arms = np.ones(self.nbArms, dtype=bool)
+            available_arms[exploitations] = False
+            exploration = self.choice_from_subset(np.flatnonzero(available_arms))
             # Affect a random location to is exploratory arm
             return np.insert(exploitations, np.random.randint(np.size(exploitations) + 1), exploration)
 
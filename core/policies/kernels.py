@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+r""" Index formulas of the UCB family, over arrays.
+
+The arguments are arrays of the same shape (one value per arm, or per product and arm), the time ``t`` and the
+amplitude being broadcast (eg. ``t`` of shape ``(nbProducts, 1)`` for :mod:`core.policies.batched`). The indexes of
+the arms never pulled are :math:`+\infty`.
+
+- With Numba installed, the formulas are ufuncs compiled from the scalar kernels (see :mod:`core.utils.jit_util`),
+  which make one pass over the arrays without temporaries, otherwise their ``*_numpy`` versions are used.
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+from math import log, sqrt
+
+import numpy as np
+
+from core.utils.jit_util import jit_ufunc
+
+np.seterr(divide='ignore')  # XXX dangerous in general, controlled here!
+
+
+# --- Scalar kernels, compiled to ufuncs with Numba
+
+
+def _ucb_index(rewards, pulls, t):
+    """ UCB index of one arm."""
+    if pulls < 1:
+        return float('inf')
+    return (rewards / pulls) + sqrt((2 * log(t)) / pulls)
+
+
+def _ucbv_index(rewards, rewards_squared, pulls, t, amplitude):
+    """ UCB-V index of one arm."""
+    if pulls < 1:
+        return float('inf')
+    mean = rewards / pulls
+    variance = (rewards_squared / pulls) - mean ** 2
+    return mean + sqrt(2.0 * log(t) * variance / pulls) + 3.0 * amplitude * log(t) / pulls
+
+
+def _ucbv_tuned_index(rewards, rewards_squared, pulls, t):
+    """ UCBV-Tuned index of one arm."""
+    if pulls < 1:
+        return float('inf')
+    mean = rewards / pulls
+    variance = (rewards_squared / pulls) - mean ** 2
+    variance += sqrt(2.0 * log(t) / pulls)
+    return mean + sqrt(log(t) * variance / pulls)
+
+
+# --- NumPy versions
+
+
+def ucb_index_numpy(rewards, pulls, t):
+    """ UCB indexes, with NumPy."""
+    indexes = (rewards / pulls) + np.sqrt((2 * np.log(t)) / pulls)
+    indexes[pulls < 1] = float('+inf')
+    return indexes
+
+
+def ucbv_index_numpy(rewards, rewards_squared, pulls, t, amplitude):
+    """ UCB-V indexes, with NumPy."""
+    means = rewards / pulls
+    variances = (rewards_squared / pulls) - means ** 2
+    indexes = means + np.sqrt(2.0 * np.log(t) * variances / pulls) + 3.0 * amplitude * np.log(t) / pulls
+    indexes[pulls < 1] = float('+inf')
+    return indexes
+
+
+def ucbv_tuned_index_numpy(rewards, rewards_squared, pulls, t):
+    """ UCBV-Tuned indexes, with NumPy."""
+    means = rewards / pulls
+    variances = (rewards_squared / pulls) - means ** 2
+    variances += np.sqrt(2.0 * np.log(t) / pulls)
+    indexes = means + np.sqrt(np.log(t) * variances / pulls)
+    indexes[pulls < 1] = float('+inf')
+    return indexes
+
+
+# --- Index formulas, compiled if possible
+
+#: UCB indexes ``ucb_index(rewards, pulls, t)``
+ucb_index = jit_ufunc(_ucb_index) or ucb_index_numpy
+#: UCB-V indexes ``ucbv_index(rewards, rewards_squared, pulls, t, amplitude)``
+ucbv_index = jit_ufunc(_ucbv_index) or ucbv_index_numpy
+#: UCBV-Tuned indexes ``ucbv_tuned_index(rewards, rewards_squared, pulls, t)``
+ucbv_tuned_index = jit_ufunc(_ucbv_tuned_index) or ucbv_tuned_index_numpy
+
+# Only export and expose the functions defined here
+__all__ = ["ucb_index", "ucbv_index", "ucbv_tuned_index",
+           "ucb_index_numpy", "ucbv_index_numpy", "ucbv_tuned_index_numpy"]
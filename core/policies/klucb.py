@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+""" The KL-UCB policy, for one-dimensional exponential families of rewards.
+
+- Reference: [Garivier & Cappé - COLT, 2011].
+- The upper confidence bounds of all the arms (and of all the products, see :mod:`core.policies.batched`) are solved at
+  once by :func:`core.arms.kullback.klucb`.
+- The default Poisson bounds fit count data like the unit sales, whatever their scale. For rewards in [0, 1] use
+  ``klucb=klucb_bern`` (``"klucb": "bern"`` in the policy parameters), or give their ``lower`` and ``amplitude``.
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+from math import log
+
+import numpy as np
+
+from core.arms import kullback
+from core.arms.kullback import klucb_poisson
+from core.policies.index_policy import IndexPolicy
+
+
+class KLUCB(IndexPolicy):
+    """ The KL-UCB policy, for one-dimensional exponential families of rewards.
+
+    - Reference: [Garivier & Cappé - COLT, 2011].
+
+    On daily unit sales, it places the product at the best placement almost every day:
+
+    >>> from core.arms import DiscreteArm
+    >>> from core.environment.mab import MAB
+    >>> from core.simulation import simulate
+    >>> np.random.seed(0)
+    >>> environment = MAB([DiscreteArm(k, np.random.poisson(mean, 200)) for k, mean in enumerate([40, 50, 60])])
+    >>> counts = simulate(KLUCB, environment, 2000).placement_counts(3)[0]
+    >>> bool(counts[2] > 0.95 * 2000)
+    True
+    """
+
+    def __init__(self, nb_arms, tolerance=1e-4, klucb=klucb_poisson, c=1., lower=0., amplitude=1.):
+        """ New KL-UCB policy.
+
+        - tolerance: precision of the upper confidence bounds,
+        - klucb: solver of the upper confidence bounds of a family of distributions, klucb_poisson by default (the
+          Bernoulli bounds of klucb_bern need normalized means in [0, 1]), or the name of the family (eg. "bern",
+          from the configuration),
+        - c: exploration constant, multiplying :math:`\\log(t)`.
+        """
+        super(KLUCB, self).__init__(nb_arms, lower=lower, amplitude=amplitude)
+        self.tolerance = tolerance  #: Precision of the upper confidence bounds
+        if isinstance(klucb, str):
+            klucb = getattr(kullback, "klucb_" + klucb)
+        self.klucb = klucb  #: Solver of the upper confidence bounds
+        self.c = c  #: Exploration constant
+
+    def __str__(self):
+        return "KL-UCB({}{})".format(self.klucb.__name__[6:].capitalize(), "" if self.c == 1 else ", c={:.3g}".format(
+            self.c))
+
+    def compute_index(self, arm):
+        r""" Compute the current index, at time t and after :math:`N_k(t)` pulls of arm k, for the normalized mean
+        :math:`\hat{\mu}_k(t) = (X_k(t) / N_k(t) - lower) / amplitude`:
+
+        .. math::
+
+           U_k(t) &= \sup\limits_{q \in [a, b]} \left\{ q : \mathrm{kl}(\hat{\mu}_k(t), q) \leq \frac{c \log(t)}{N_k(t)}
+           \right\}, \\
+           I_k(t) &= lower + amplitude \times U_k(t).
+        """
+        if self.pulls[arm] < 1:
+            return float('+inf')
+        mean = (self.rewards[arm] / self.pulls[arm] - self.lower) / self.amplitude
+        bound = self.klucb(np.array([mean]), self.c * log(self.t) / self.pulls[arm], precision=self.tolerance)[0]
+        return self.lower + self.amplitude * bound
+
+    def compute_all_index(self):
+        """ Compute the current indexes for all arms, in a vectorized manner."""
+        pulled = self.pulls >= 1
+        pulls = np.maximum(self.pulls, 1)
+        means = ((self.rewards / pulls - self.lower) / self.amplitude)[pulled]
+        thresholds = (self.c * np.log(self.t) / pulls)[pulled]
+        indexes = np.full(self.pulls.shape, float('+inf'))
+        indexes[pulled] = self.lower + self.amplitude * self.klucb(means, thresholds, precision=self.tolerance)
+        self.index[:] = indexes
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+r""" The LinUCB contextual policy: the mean reward of a placement is linear in features of the product and of the
+day, so a product learns from the products of the same ``product_type`` and from the same weekdays and months.
+
+- Reference: [Li et al. - WWW, 2010, "A contextual-bandit approach to personalized news article recommendation"],
+  with disjoint linear models (one per placement).
+- The inverse of the design matrix of each placement, :math:`A_k^{-1}`, is updated with the Sherman-Morrison formula
+  after each reward, so an update and the index of a context are :math:`\mathcal{O}(d^2)`, without inverting a matrix,
+- The indexes of the contexts of many products (one row each) are computed at once, and :meth:`LinUCB.choice` then
+  chooses a placement for every row.
+- :class:`ContextFeatures` encodes the ``product_type`` and the date as a one-hot vector: an intercept, the product
+  type, the weekday and the month.
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+import numpy as np
+import pandas as pd
+
+from core.policies.base_policy import BasePolicy
+from core.policies.selection import random_argmax, random_argmax_subset
+
+
+class ContextFeatures(object):
+    """ One-hot features of a product and a day: intercept, product type, weekday and month."""
+
+    def __init__(self, product_types):
+        """ New features, for some known product types (another product type only has the other features)."""
+        self.product_types = list(product_types)  #: Known product types, in the order of their features
+        self._codes = {product_type: code for code, product_type in enumerate(self.product_types)}
+
+    def __repr__(self):
+        return "{}(product types: {}, dimension: {})".format(self.__class__.__name__, len(self.product_types),
+                                                             self.dimension)
+
+    @property
+    def dimension(self):
+        """ Number of features."""
+        return 1 + len(self.product_types) + 7 + 12
+
+    def encode(self, product_types, dates):
+        """ Features of each (product type, date), as a matrix with one row each.
+
+        - dates: dates, or strings day first as in the demand history.
+
+        >>> features = ContextFeatures(['chilled desserts', 'bakery'])
+        >>> np.flatnonzero(features.encode(['bakery'], ['03-11-18'])[0])
+        array([ 0,  2,  8, 20])
+        """
+        dates = pd.DatetimeIndex(pd.to_datetime(pd.Series(dates), dayfirst=True))
+        rows = np.arange(len(dates))
+        codes = np.array([self._codes.get(product_type, -1) for product_type in product_types], dtype=int)
+        features = np.zeros((len(dates), self.dimension))
+        features[:, 0] = 1.
+        known = codes >= 0
+        features[rows[known], 1 + codes[known]] = 1.
+        offset = 1 + len(self.product_types)
+        features[rows, offset + np.asarray(dates.weekday)] = 1.
+        features[rows, offset + 7 + np.asarray(dates.month) - 1] = 1.
+        return features
+
+
+class LinUCB(BasePolicy):
+    """ The LinUCB contextual policy, with one linear model per arm.
+
+    - Reference: [Li et al. - WWW, 2010].
+    """
+
+    def __init__(self, nb_arms, dimension, alpha=1., regularization=1., lower=0., amplitude=1.):
+        """ New LinUCB policy.
+
+        - dimension: number of features of a context,
+        - alpha: exploration constant, multiplying the width of the confidence ellipsoid,
+        - regularization: ridge regularization, the initial design matrix of every arm being ``regularization * I``,
+        - lower, amplitude: the rewards are normalized as ``(reward - lower) / amplitude`` for the linear models.
+        """
+        super(LinUCB, self).__init__(nb_arms, lower=lower, amplitude=amplitude)
+        assert regularization > 0, "Error: the regularization of a LinUCB object must be > 0."
+        self.dimension = dimension  #: Number of features of a context
+        self.alpha = alpha  #: Exploration constant
+        self.regularization = regularization  #: Ridge regularization
+        #: Inverse of the design matrix of each arm, shape ``(nbArms, dimension, dimension)``
+        self.inverse = np.zeros((nb_arms, dimension, dimension))
+        self.b = np.zeros((nb_arms, dimension))  #: Sum of the normalized rewards times the contexts, of each arm
+        self.theta = np.zeros((nb_arms, dimension))  #: Coefficients of the linear model of each arm
+        #: :class:`numpy.random.Generator` used to break ties, None to use the global numpy random state
+        self.rng = None
+        self._reset_models()
+
+    def __str__(self):
+        return "LinUCB(alpha={:.3g})".format(self.alpha)
+
+    def _reset_models(self):
+        """ Every arm back to the prior, :math:`A_k = \\lambda I`."""
+        self.inverse[:] = np.eye(self.dimension) / self.regularization
+        self.b.fill(0)
+        self.theta.fill(0)
+
+    def start_game(self):
+        """ Initialize the policy for a new game."""
+        super(LinUCB, self).start_game()
+        self._reset_models()
+
+    def get_state(self):
+        """ Internal memory of the policy, with the linear models."""
+        state = super(LinUCB, self).get_state()
+        state.update(inverse=self.inverse, b=self.b)
+        return state
+
+    def set_state(self, state):
+        """ Restore the internal memory of the policy, with the linear models."""
+        super(LinUCB, self).set_state(state)
+        self.inverse = np.array(state['inverse'], dtype=float)
+        self.b = np.array(state['b'], dtype=float)
+        self.theta = np.einsum('kij,kj->ki', self.inverse, self.b)
+
+    def get_reward(self, arm, reward, price=1., context=None):
+        r""" Give a reward for the context it was received in, and update the model of the arm with the
+        Sherman-Morrison formula, :math:`v = A_k^{-1} x`:
+
+        .. math::
+
+           A_k^{-1} &\leftarrow A_k^{-1} - \frac{v v^T}{1 + x^T v}, \\
+           b_k &\leftarrow b_k + \tilde{r} x, \quad \theta_k = A_k^{-1} b_k.
+        """
+        assert context is not None, "Error: a LinUCB policy needs the context of every reward."
+        super(LinUCB, self).get_reward(arm, reward, price)
+        x = np.asarray(context, dtype=float)
+        inverse = self.inverse[arm]
+        v = inverse @ x
+        inverse -= np.outer(v, v) / (1. + x @ v)
+        self.b[arm] += ((reward * price - self.lower) / self.amplitude) * x
+        self.theta[arm] = inverse @ self.b[arm]
+
+    def get_rewards(self, arms, rewards, contexts, price=1.):
+        """ Give many rewards, one per row of the contexts (eg. the history of all products), in order."""
+        for arm, reward, context in zip(np.asarray(arms).tolist(), np.asarray(rewards).tolist(),
+                                        np.asarray(contexts, dtype=float)):
+            self.get_reward(arm, reward, price, context=context)
+
+    def compute_all_index(self, contexts):
+        r""" Indexes of all arms for one context (a vector) or for many (a matrix, one row each):
+
+        .. math:: I_k(x) = lower + amplitude \times \left(\theta_k^T x + \alpha \sqrt{x^T A_k^{-1} x}\right).
+        """
+        contexts = np.asarray(contexts, dtype=float)
+        means = contexts @ self.theta.T
+        # x^T A_k^{-1} x of every context and arm, as matrix products, shape (..., nbArms)
+        widths = np.moveaxis(np.sum((contexts @ self.inverse) * contexts, axis=-1), 0, -1)
+        return self.lower + self.amplitude * (means + self.alpha * np.sqrt(np.maximum(widths, 0.)))
+
+    def choice(self, contexts, available=None):
+        """ Choose an arm with maximal index for the context, or for each row of the contexts (uniformly at random
+        among the ties), and return it with the indexes.
+
+        - available: boolean mask of the arms that can be chosen, of the shape of the indexes.
+        """
+        index = self.compute_all_index(contexts)
+        if available is None:
+            return random_argmax(index, rng=self.rng), index
+        return random_argmax_subset(index, np.asarray(available, dtype=bool), rng=self.rng), index
+
+
+# Only export and expose the classes defined here
+__all__ = ["ContextFeatures", "LinUCB"]
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+r""" Sliding-window and discounted versions of the UCB and UCBV-Tuned policies, for non-stationary (eg. seasonal)
+demand: only the recent rewards count, or the old rewards count less.
+
+- Reference: [Garivier & Moulines - ALT, 2011, "On Upper-Confidence Bound Policies for Switching Bandit Problems"].
+- :class:`SWUCB` and :class:`SWUCBVtuned` only use the last ``window`` rewards, kept in a ring buffer: a new reward
+  replaces the oldest one in the sums of its arm, so :meth:`get_reward` is :math:`\mathcal{O}(1)`,
+- :class:`DiscountedUCB` and :class:`DiscountedUCBVtuned` weight a reward received s steps ago by :math:`\gamma^s`.
+  The sums are kept inflated by :math:`\gamma^{-t}` (and rescaled from time to time), so a reward only updates the
+  sums of its arm, in :math:`\mathcal{O}(1)`,
+- The indexes are the usual formulas of :mod:`core.policies.kernels` on these sums, the time being the number of
+  rewards in the window (or their total weight), so computing them is :math:`\mathcal{O}(1)` per arm. An arm with
+  less than one reward in the window (or of weight less than one) has an infinite index, and is explored again.
+
+These policies need the rewards one by one, with :meth:`get_reward` (eg. :func:`core.simulation.simulate` or
+:func:`core.simulation.replay`), the totals ``pulls`` and ``rewards`` being still kept as in the other policies.
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+from math import log, sqrt
+
+import numpy as np
+
+from core.policies.kernels import ucb_index, ucbv_tuned_index
+from core.policies.ucb import UCB
+from core.policies.ucbv_tuned import UCBVtuned
+
+#: Default number of last rewards used by the sliding-window policies
+DEFAULT_WINDOW = 100
+#: Default discount factor of the discounted policies
+DEFAULT_GAMMA = 0.99
+#: The discounted sums are rescaled once they are inflated by more than this factor
+MAX_INFLATION = 1e100
+
+
+class SlidingWindow(object):
+    """ Sums of the rewards of each arm over the last ``window`` rewards, for an index policy."""
+
+    def __init__(self, nb_arms, window=DEFAULT_WINDOW, **params):
+        """ New sliding-window policy.
+
+        - window: number of last rewards used by the indexes,
+        - params: parameters of the index policy, eg. lower and amplitude.
+        """
+        super(SlidingWindow, self).__init__(nb_arms, **params)
+        assert window > 0, "Error: the window of a {} object cannot be <= 0.".format(self.__class__.__name__)
+        self.window = window  #: Number of last rewards used by the indexes
+        self.windowPulls = np.zeros(nb_arms, dtype=int)  #: Number of pulls of each arm in the window
+        self.windowRewards = np.zeros(nb_arms)  #: Sum of the rewards of each arm in the window
+        self.windowRewardsSquared = np.zeros(nb_arms)  #: Sum of the normalized rewards squared in the window
+        # Ring buffer of the arm and rewards of the last steps, -1 for an empty slot
+        self._ringArms = np.full(window, -1, dtype=int)
+        self._ringRewards = np.zeros(window)
+        self._ringRewardsSquared = np.zeros(window)
+
+    def start_game(self):
+        """ Initialize the policy for a new game, with an empty window."""
+        super(SlidingWindow, self).start_game()
+        self.windowPulls.fill(0)
+        self.windowRewards.fill(0)
+        self.windowRewardsSquared.fill(0)
+        self._ringArms.fill(-1)
+
+    def get_state(self):
+        """ Internal memory of the policy, with the window."""
+        state = super(SlidingWindow, self).get_state()
+        state.update(windowPulls=self.windowPulls, windowRewards=self.windowRewards,
+                     windowRewardsSquared=self.windowRewardsSquared, ringArms=self._ringArms,
+                     ringRewards=self._ringRewards, ringRewardsSquared=self._ringRewardsSquared)
+        return state
+
+    def set_state(self, state):
+        """ Restore the internal memory of the policy, with the window.
+
+        The ring buffers are ``window`` long, a snapshot keeps them whole (see :mod:`core.utils.snapshot_util`):
+
+        >>> import os, tempfile
+        >>> from types import SimpleNamespace
+        >>> from core.environment.mab import MAB
+        >>> from core.utils.snapshot_util import load_snapshot, save_snapshot
+        >>> policy = SWUCB(3, window=4)
+        >>> policy.start_game()
+        >>> for t in range(7):
+        ...     policy.get_reward(t % 3, float(t))
+        >>> environment = MAB.from_arrays(policy.rewards / policy.pulls, policy.rewards, policy.pulls, [1, 2, 3])
+        >>> path = os.path.join(tempfile.mkdtemp(), 'snapshot.npz')
+        >>> save_snapshot(path, [SimpleNamespace(id='1', product_type='bakery', policy=policy, environment=environment)])
+        >>> restored = load_snapshot(path).policy(0, window=4)
+        >>> restored._ringArms
+        array([1, 2, 0, 0])
+        >>> restored.get_reward(1, 7.)
+        >>> restored.windowPulls, restored.windowRewards
+        (array([1, 2, 1]), array([ 6., 11.,  5.]))
+        """
+        super(SlidingWindow, self).set_state(state)
+        self.windowPulls = np.array(state['windowPulls'], dtype=int)
+        self.windowRewards = np.array(state['windowRewards'], dtype=float)
+        self.windowRewardsSquared = np.array(state['windowRewardsSquared'], dtype=float)
+        self._ringArms = np.array(state['ringArms'], dtype=int)
+        self._ringRewards = np.array(state['ringRewards'], dtype=float)
+        self._ringRewardsSquared = np.array(state['ringRewardsSquared'], dtype=float)
+
+    def get_reward(self, arm, reward, price=1.):
+        """ Give a reward: it replaces the oldest reward of the window, in :math:`\\mathcal{O}(1)`."""
+        super(SlidingWindow, self).get_reward(arm, reward, price)
+        slot = (self.t - 1) % self.window
+        oldest = self._ringArms[slot]
+        if oldest >= 0:
+            self.windowPulls[oldest] -= 1
+            self.windowRewards[oldest] -= self._ringRewards[slot]
+            self.windowRewardsSquared[oldest] -= self._ringRewardsSquared[slot]
+        self._ringArms[slot] = arm
+        self._ringRewards[slot] = reward * price
+        self._ringRewardsSquared[slot] = ((reward - self.lower) / self.amplitude) ** 2
+        self.windowPulls[arm] += 1
+        self.windowRewards[arm] += self._ringRewards[slot]
+        self.windowRewardsSquared[arm] += self._ringRewardsSquared[slot]
+
+    @property
+    def window_time(self):
+        """ Number of rewards in the window."""
+        return min(self.t, self.window)
+
+
+class Discounted(object):
+    """ Discounted sums of the rewards of each arm, a reward received s steps ago weighting :math:`\\gamma^s`, for an
+    index policy."""
+
+    def __init__(self, nb_arms, gamma=DEFAULT_GAMMA, **params):
+        """ New discounted policy.
+
+        - gamma: discount factor, in (0, 1],
+        - params: parameters of the index policy, eg. lower and amplitude.
+        """
+        super(Discounted, self).__init__(nb_arms, **params)
+        assert 0 < gamma <= 1, "Error: the discount factor of a {} object must be in (0, 1].".format(
+            self.__class__.__name__)
+        self.gamma = gamma  #: Discount factor
+        # Discounted sums, all inflated by self._inflation
+        self._discountedPulls = np.zeros(nb_arms)
+        self._discountedRewards = np.zeros(nb_arms)
+        self._discountedRewardsSquared = np.zeros(nb_arms)
+        self._discountedTime = 0.
+        self._inflation = 1.
+
+    def start_game(self):
+        """ Initialize the policy for a new game, with empty discounted sums."""
+        super(Discounted, self).start_game()
+        self._discountedPulls.fill(0)
+        self._discountedRewards.fill(0)
+        self._discountedRewardsSquared.fill(0)
+        self._discountedTime = 0.
+        self._inflation = 1.
+
+    def get_state(self):
+        """ Internal memory of the policy, with the discounted sums."""
+        state = super(Discounted, self).get_state()
+        state.update(discountedPulls=self.discountedPulls, discountedRewards=self.discountedRewards,
+                     discountedRewardsSquared=self.discountedRewardsSquared)
+        return state
+
+    def set_state(self, state):
+        """ Restore the internal memory of the policy, with the discounted sums."""
+        super(Discounted, self).set_state(state)
+        self._discountedPulls = np.array(state['discountedPulls'], dtype=float)
+        self._discountedRewards = np.array(state['discountedRewards'], dtype=float)
+        self._discountedRewardsSquared = np.array(state['discountedRewardsSquared'], dtype=float)
+        self._discountedTime = float(np.sum(self._discountedPulls))
+        self._inflation = 1.
+
+    def get_reward(self, arm, reward, price=1.):
+        """ Give a reward: it only updates the (inflated) sums of its arm, in :math:`\\mathcal{O}(1)`."""
+        super(Discounted, self).get_reward(arm, reward, price)
+        self._inflation /= self.gamma
+        if self._inflation > MAX_INFLATION:
+            for sums in (self._discountedPulls, self._discountedRewards, self._discountedRewardsSquared):
+                sums /= self._inflation
+            self._discountedTime /= self._inflation
+            self._inflation = 1.
+        self._discountedTime += self._inflation
+        self._discountedPulls[arm] += self._inflation
+        self._discountedRewards[arm] += reward * price * self._inflation
+        self._discountedRewardsSquared[arm] += ((reward - self.lower) / self.amplitude) ** 2 * self._inflation
+
+    @property
+    def discountedPulls(self):
+        """ Discounted number of pulls of each arm."""
+        return self._discountedPulls / self._inflation
+
+    @property
+    def discountedRewards(self):
+        """ Discounted sum of the rewards of each arm."""
+        return self._discountedRewards / self._inflation
+
+    @property
+    def discountedRewardsSquared(self):
+        """ Discounted sum of the normalized rewards squared of each arm."""
+        return self._discountedRewardsSquared / self._inflation
+
+    @property
+    def discounted_time(self):
+        """ Total weight of the rewards, :math:`\\sum_{s < t} \\gamma^s`."""
+        return self._discountedTime / self._inflation
+
+
+class SWUCB(SlidingWindow, UCB):
+    """ The UCB policy on the last ``window`` rewards.
+
+    - Reference: [Garivier & Moulines - ALT, 2011].
+    """
+
+    def __str__(self):
+        return "SW-UCB(window={})".format(self.window)
+
+    def compute_index(self, arm):
+        r""" Compute the current index, with :math:`N_k^\tau(t)` pulls of arm k and a sum of rewards
+        :math:`X_k^\tau(t)` in the window of the last :math:`\tau` rewards:
+
+        .. math:: I_k(t) = \frac{X_k^\tau(t)}{N_k^\tau(t)} + \sqrt{\frac{2 \log(\min(t, \tau))}{N_k^\tau(t)}}.
+        """
+        pulls = self.windowPulls[arm]
+        if pulls < 1:
+            return float('+inf')
+        return (self.windowRewards[arm] / pulls) + sqrt((2 * log(self.window_time)) / pulls)
+
+    def compute_all_index(self):
+        """ Compute the current indexes for all arms, in a vectorized manner."""
+        self.index[:] = ucb_index(self.windowRewards, self.windowPulls, self.window_time)
+
+
+class SWUCBVtuned(SlidingWindow, UCBVtuned):
+    """ The UCBV-Tuned policy on the last ``window`` rewards."""
+
+    def __str__(self):
+        return "SW-UCB-V-Tuned(window={})".format(self.window)
+
+    def compute_index(self, arm):
+        r""" Compute the current index, with :math:`N_k^\tau(t)` pulls of arm k, a sum of rewards :math:`X_k^\tau(t)`
+        and a sum of rewards squared :math:`Z_k^\tau(t)` in the window of the last :math:`\tau` rewards, and
+        :math:`t^\tau = \min(t, \tau)`:
+
+        .. math::
+
+           \hat{\mu}_k(t) &= \frac{X_k^\tau(t)}{N_k^\tau(t)}, \\
+           V'_k(t) &= \frac{Z_k^\tau(t)}{N_k^\tau(t)} - \hat{\mu}_k(t)^2 + \sqrt{\frac{2 \log(t^\tau)}{N_k^\tau(t)}}, \\
+           I_k(t) &= \hat{\mu}_k(t) + \sqrt{\frac{\log(t^\tau) V'_k(t)}{N_k^\tau(t)}}.
+        """
+        pulls = self.windowPulls[arm]
+        if pulls < 1:
+            return float('+inf')
+        mean = self.windowRewards[arm] / pulls
+        variance = (self.windowRewardsSquared[arm] / pulls) - mean ** 2
+        variance += sqrt(2.0 * log(self.window_time) / pulls)
+        return mean + sqrt(log(self.window_time) * variance / pulls)
+
+    def compute_all_index(self):
+        """ Compute the current indexes for all arms, in a vectorized manner."""
+        self.index[:] = ucbv_tuned_index(self.windowRewards, self.windowRewardsSquared, self.windowPulls,
+                                         self.window_time)
+
+
+class DiscountedUCB(Discounted, UCB):
+    """ The discounted UCB policy.
+
+    - Reference: [Garivier & Moulines - ALT, 2011].
+    """
+
+    def __str__(self):
+        return "D-UCB(gamma={:.3g})".format(self.gamma)
+
+    def compute_index(self, arm):
+        r""" Compute the current index, with the discounted number of pulls :math:`N_k^\gamma(t)` and sum of rewards
+        :math:`X_k^\gamma(t)` of arm k, and the total weight :math:`n^\gamma(t) = \sum_k N_k^\gamma(t)`:
+
+        .. math:: I_k(t) = \frac{X_k^\gamma(t)}{N_k^\gamma(t)} + \sqrt{\frac{2 \log(n^\gamma(t))}{N_k^\gamma(t)}}.
+        """
+        pulls = self._discountedPulls[arm] / self._inflation
+        if pulls < 1:
+            return float('+inf')
+        return (self._discountedRewards[arm] / self._discountedPulls[arm]) + sqrt(
+            (2 * log(self.discounted_time)) / pulls)
+
+    def compute_all_index(self):
+        """ Compute the current indexes for all arms, in a vectorized manner."""
+        self.index[:] = ucb_index(self.discountedRewards, self.discountedPulls, self.discounted_time)
+
+
+class DiscountedUCBVtuned(Discounted, UCBVtuned):
+    """ The discounted UCBV-Tuned policy."""
+
+    def __str__(self):
+        return "D-UCB-V-Tuned(gamma={:.3g})".format(self.gamma)
+
+    def compute_index(self, arm):
+        r""" Compute the current index, with the discounted number of pulls :math:`N_k^\gamma(t)`, sum of rewards
+        :math:`X_k^\gamma(t)` and sum of rewards squared :math:`Z_k^\gamma(t)` of arm k, and the total weight
+        :math:`n^\gamma(t) = \sum_k N_k^\gamma(t)`:
+
+        .. math::
+
+           \hat{\mu}_k(t) &= \frac{X_k^\gamma(t)}{N_k^\gamma(t)}, \\
+           V'_k(t) &= \frac{Z_k^\gamma(t)}{N_k^\gamma(t)} - \hat{\mu}_k(t)^2
+                      + \sqrt{\frac{2 \log(n^\gamma(t))}{N_k^\gamma(t)}}, \\
+           I_k(t) &= \hat{\mu}_k(t) + \sqrt{\frac{\log(n^\gamma(t)) V'_k(t)}{N_k^\gamma(t)}}.
+        """
+        pulls = self._discountedPulls[arm] / self._inflation
+        if pulls < 1:
+            return float('+inf')
+        time = self.discounted_time
+        mean = self._discountedRewards[arm] / self._discountedPulls[arm]
+        variance = (self._discountedRewardsSquared[arm] / self._discountedPulls[arm]) - mean ** 2
+        variance += sqrt(2.0 * log(time) / pulls)
+        return mean + sqrt(log(time) * variance / pulls)
+
+    def compute_all_index(self):
+        """ Compute the current indexes for all arms, in a vectorized manner."""
+        self.index[:] = ucbv_tuned_index(self.discountedRewards, self.discountedRewardsSquared, self.discountedPulls,
+                                         self.discounted_time)
+
+
+# Only export and expose the classes defined here
+__all__ = ["SlidingWindow", "Discounted", "SWUCB", "SWUCBVtuned", "DiscountedUCB", "DiscountedUCBVtuned"]
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
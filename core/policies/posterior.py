@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+r""" Conjugate posteriors of the means of the arms, for the Bayesian policies (eg. :class:`Thompson`).
+
+A posterior only depends on the number of pulls :math:`N_k(t)` and on the sum of the rewards :math:`X_k(t)` of each
+arm, which the policies already keep (updated in :math:`\mathcal{O}(1)` per reward), so it has no memory of its own:
+:meth:`sample` draws one posterior sample of every arm, and of every product for matrices, in one vectorized call.
+
+- :class:`Gamma`: Poisson rewards (eg. the unit sales of a day), with a Gamma prior on their rate,
+- :class:`Gauss`: Gaussian rewards of known variance, with a flat prior on their mean.
+
+The random draws use ``rng``, a :class:`numpy.random.Generator`, or the global numpy random state if it is ``None`` (so
+``np.random.seed`` still makes the policies reproducible).
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+import numpy as np
+
+
+class Gamma(object):
+    r""" Gamma posterior of the rate of Poisson rewards, from a :math:`\Gamma(k_0, \lambda_0)` prior (shape and
+    rate):
+
+    .. math:: \mu_k \mid X_k(t), N_k(t) \sim \Gamma(k_0 + X_k(t), \lambda_0 + N_k(t)).
+    """
+
+    def __init__(self, shape=1., rate=1.):
+        """ New Gamma posterior, of prior shape and rate."""
+        assert shape > 0 and rate > 0, "Error: the prior of a Gamma posterior must have a shape and a rate > 0."
+        self.shape = shape  #: Shape of the prior
+        self.rate = rate  #: Rate of the prior
+
+    def __repr__(self):
+        return "Gamma({:.3g}, {:.3g})".format(self.shape, self.rate)
+
+    def sample(self, pulls, rewards, rng=None):
+        """ One sample of the posterior of each arm, for arrays of pulls and sums of (non-negative) rewards.
+
+        >>> np.random.seed(0)
+        >>> np.round(Gamma().sample(np.array([10, 1000]), np.array([50., 5000.])), 2)
+        array([5.84, 5.02])
+        """
+        shape = self.shape + np.maximum(rewards, 0.)
+        scale = 1. / (self.rate + pulls)
+        return np.random.gamma(shape, scale) if rng is None else rng.gamma(shape, scale)
+
+
+class Gauss(object):
+    r""" Gaussian posterior of the mean of Gaussian rewards of variance :math:`\sigma^2`, from a flat prior:
+
+    .. math:: \mu_k \mid X_k(t), N_k(t) \sim \mathcal{N}\left(\frac{X_k(t)}{N_k(t)}, \frac{\sigma^2}{N_k(t)}\right).
+    """
+
+    def __init__(self, variance=0.25):
+        """ New Gaussian posterior, for rewards of a known variance."""
+        assert variance > 0, "Error: the variance of a Gauss posterior must be > 0."
+        self.variance = variance  #: Variance of the rewards
+
+    def __repr__(self):
+        return "Gauss({:.3g})".format(self.variance)
+
+    def sample(self, pulls, rewards, rng=None):
+        """ One sample of the posterior of each arm, for arrays of pulls (all > 0) and sums of rewards.
+
+        >>> np.random.seed(0)
+        >>> np.round(Gauss().sample(np.array([10, 1000]), np.array([5., 500.])), 2)
+        array([0.78, 0.51])
+        """
+        loc = rewards / pulls
+        scale = np.sqrt(self.variance / pulls)
+        return np.random.normal(loc, scale) if rng is None else rng.normal(loc, scale)
+
+
+#: Posterior of each family of rewards, by name (for the configuration files)
+mapping_POSTERIOR = {
+    "Gamma": Gamma,
+    "Poisson": Gamma,
+    "Gauss": Gauss,
+    "Gaussian": Gauss,
+}
+
+# Only export and expose the classes defined here
+__all__ = ["Gamma", "Gauss", "mapping_POSTERIOR"]
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
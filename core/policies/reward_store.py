@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+r""" Compact history of the rewards of each arm, for the policies that sub-sample it (eg. :class:`BESA`).
+
+- Each arm has its own typed buffer, whose capacity doubles when it is full, so appending is amortized
+  :math:`\mathcal{O}(1)` and the memory is at most twice the number of stored rewards (instead of a
+  ``(nbArms, horizon + 1)`` matrix or lists of Python floats),
+- The rewards can be stored as ``float32``, or quantized to integers (``reward / scale`` rounded, eg. unit-sale
+  counts with ``scale=1``),
+- With ``max_size``, an arm keeps at most ``max_size`` rewards, a uniform sample of all its rewards (reservoir
+  sampling, [Vitter, 1985, "Random sampling with a reservoir"]), with the generator of the store (eg. the one of its
+  policy),
+- ``store[arm]`` is a view of the rewards of an arm, and ``store[arm, indexes]`` only reads the sub-sampled rewards.
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+import numpy as np
+
+#: Initial capacity of the buffer of each arm
+DEFAULT_CAPACITY = 16
+
+
+class RewardStore(object):
+    """ Growable, typed history of the rewards of each arm."""
+
+    def __init__(self, nb_arms, dtype=np.float64, scale=None, max_size=None, capacity=DEFAULT_CAPACITY, rng=None):
+        """ New empty reward store.
+
+        - nb_arms: number of arms,
+        - dtype: type of the stored rewards, a float type, or an integer type to quantize them,
+        - scale: quantization step of the integer types (1 by default),
+        - max_size: maximum number of rewards kept for each arm, or None to keep them all,
+        - capacity: initial capacity of the buffer of each arm,
+        - rng: a :class:`numpy.random.Generator` for the reservoir sampling, or None for a generator seeded from the
+          global numpy random state (so ``np.random.seed`` still makes the policies reproducible).
+        """
+        self.dtype = np.dtype(dtype)  #: Type of the stored rewards
+        self.quantized = self.dtype.kind in 'iu'  #: Whether the rewards are stored as integers
+        self.scale = (1. if scale is None else scale) if self.quantized else None  #: Quantization step
+        self.max_size = max_size  #: Maximum number of rewards kept for each arm
+        #: Random generator of the reservoir sampling
+        self.rng = np.random.default_rng(np.random.randint(2 ** 31)) if rng is None else rng
+        if max_size is not None:
+            capacity = min(capacity, max_size)
+        self.counts = np.zeros(nb_arms, dtype=int)  #: Number of rewards stored for each arm
+        self.seen = np.zeros(nb_arms, dtype=int)  #: Number of rewards received by each arm
+        self.sums = np.zeros(nb_arms)  #: Sum of the stored rewards of each arm
+        self._capacity = max(1, capacity)
+        self._buffers = [np.empty(self._capacity, dtype=self.dtype) for _ in range(nb_arms)]
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def __repr__(self):
+        return "{}(nbArms: {}, stored: {}, dtype: {})".format(self.__class__.__name__, len(self),
+                                                              int(np.sum(self.counts)), self.dtype)
+
+    @property
+    def nbytes(self):
+        """ Memory used by the buffers, in bytes."""
+        return sum(buffer.nbytes for buffer in self._buffers)
+
+    def _encode(self, values):
+        """ Stored form of rewards."""
+        if self.quantized:
+            return np.rint(np.asarray(values) / self.scale).astype(self.dtype)
+        return values
+
+    def _decode(self, values):
+        """ Rewards from their stored form."""
+        return values * self.scale if self.quantized else values
+
+    def clear(self):
+        """ Forget all the rewards, keeping the buffers."""
+        self.counts.fill(0)
+        self.seen.fill(0)
+        self.sums.fill(0)
+
+    def append(self, arm, reward):
+        """ Add a reward to the history of an arm. Once the arm has ``max_size`` rewards, the new reward replaces a
+        uniformly random one with probability ``max_size / seen``."""
+        self.seen[arm] += 1
+        count = self.counts[arm]
+        buffer = self._buffers[arm]
+        if self.max_size is not None and count >= self.max_size:
+            slot = self.rng.integers(self.seen[arm])
+            if slot < count:
+                self.sums[arm] -= self._decode(buffer[slot])
+                buffer[slot] = self._encode(reward)
+                self.sums[arm] += self._decode(buffer[slot])
+            return
+        if count == len(buffer):
+            capacity = 2 * len(buffer) if self.max_size is None else min(2 * len(buffer), self.max_size)
+            buffer = self._buffers[arm] = np.resize(buffer, capacity)
+        buffer[count] = self._encode(reward)
+        self.sums[arm] += self._decode(buffer[count])
+        self.counts[arm] = count + 1
+
+    def replace(self, arm, rewards):
+        """ Replace the history of an arm by some rewards (all kept, even above ``max_size``)."""
+        rewards = np.asarray(rewards)
+        capacity = max(self._capacity, len(rewards))
+        if len(self._buffers[arm]) < capacity:
+            self._buffers[arm] = np.empty(capacity, dtype=self.dtype)
+        self._buffers[arm][:len(rewards)] = self._encode(rewards)
+        self.counts[arm] = self.seen[arm] = len(rewards)
+        self.sums[arm] = np.sum(self.values(arm))
+
+    def values(self, arm):
+        """ Stored rewards of an arm: a view of its buffer, decoded (so copied) only if they are quantized."""
+        return self._decode(self._buffers[arm][:self.counts[arm]])
+
+    def __getitem__(self, key):
+        """ ``store[arm]`` are the rewards of an arm, and ``store[arm, indexes]`` the rewards at some positions of its
+        history, which must be smaller than ``counts[arm]``."""
+        if isinstance(key, tuple):
+            arm, indexes = key
+            return self._decode(self._buffers[arm][indexes])
+        return self.values(key)
+
+    def concatenate(self):
+        """ Stored rewards of all arms, arm after arm, as float."""
+        if len(self) == 0:
+            return np.zeros(0)
+        return np.concatenate([self.values(arm) for arm in range(len(self))]).astype(float)
+
+
+# Only export and expose the class defined here
+__all__ = ["RewardStore"]
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+""" Fast selection of arms from their indexes, with uniform tie-breaking.
+
+These are the selection steps of the :class:`IndexPolicy` family: argmax, top-m, rank-k and argmax over a subset of
+arms. They work on a vector of indexes, or on a matrix with one row of indexes per product (selecting along the last
+axis).
+
+- The random tie-breaking uses ``rng``, a :class:`numpy.random.Generator`, or the global numpy random state if it is
+  ``None`` (so ``np.random.seed`` still makes the policies reproducible),
+- A single row first checks whether the maximum is unique, which is almost always the case, and draws a random number
+  only if it is not.
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+import numpy as np
+
+
+def _random(rng, shape):
+    """ Uniform random numbers in [0, 1), of a certain shape."""
+    return np.random.random_sample(shape) if rng is None else rng.random(shape)
+
+
+def _integer(rng, high):
+    """ One uniform random integer in [0, high)."""
+    return np.random.randint(high) if rng is None else rng.integers(high)
+
+
+def random_argmax(index, rng=None):
+    r""" Arm with maximal index, uniformly at random among the ties, for a vector or for each row of a matrix.
+
+    .. math:: A \sim U(\arg\max_{1 \leq k \leq K} I_k).
+
+    >>> random_argmax(np.array([0.1, 0.5, 0.2]))
+    1
+    >>> random_argmax(np.array([[0.1, 0.5, 0.2], [0.3, 0.1, 0.2]]))
+    array([1, 0])
+    """
+    index = np.asarray(index)
+    if index.ndim == 1:
+        best = int(np.argmax(index))
+        ties = index == index[best]
+        nb_ties = np.count_nonzero(ties)
+        if nb_ties == 1:
+            return best
+        return int(np.flatnonzero(ties)[_integer(rng, nb_ties)])
+    # One random key per arm, only the maximal arms having a non-negative key
+    keys = _random(rng, index.shape)
+    keys[index != np.max(index, axis=-1, keepdims=True)] = -1.
+    return np.argmax(keys, axis=-1)
+
+
+def random_order(index, rng=None):
+    """ Arms sorted by decreasing index, the ties being in a uniformly random order (along the last axis).
+
+    >>> random_order(np.array([0.1, 0.5, 0.2]))
+    array([1, 2, 0])
+    """
+    index = np.asarray(index, dtype=float)
+    return np.lexsort((_random(rng, index.shape), -index), axis=-1)
+
+
+def random_top_m(index, m, rng=None):
+    """ The m arms with largest indexes, by decreasing index, the ties being broken uniformly at random.
+
+    >>> random_top_m(np.array([0.1, 0.5, 0.2, 0.9]), 2)
+    array([3, 1])
+    """
+    return random_order(index, rng=rng)[..., :m]
+
+
+def random_rank(index, rank=1, rng=None):
+    """ The arm with the rank-th largest index (rank 1 being the best), uniformly at random among the arms having
+    that index.
+
+    >>> random_rank(np.array([0.1, 0.5, 0.2, 0.9]), 3)
+    2
+    """
+    if rank == 1:
+        return random_argmax(index, rng=rng)
+    chosen = random_order(index, rng=rng)[..., rank - 1]
+    return int(chosen) if np.ndim(chosen) == 0 else chosen
+
+
+def random_argmax_subset(index, available_arms, rng=None):
+    """ Arm with maximal index among the available arms, uniformly at random among the ties.
+
+    - ``available_arms`` is an array of arms for a vector of indexes, or a boolean mask of the shape of the indexes.
+
+    >>> random_argmax_subset(np.array([0.1, 0.5, 0.2, 0.9]), np.array([0, 2]))
+    2
+    >>> random_argmax_subset(np.array([[0.1, 0.5, 0.2], [0.3, 0.1, 0.2]]), np.array([[True, False, True]] * 2))
+    array([2, 0])
+    """
+    index = np.asarray(index)
+    available_arms = np.asarray(available_arms)
+    if available_arms.dtype == bool:
+        return random_argmax(np.where(available_arms, index, -np.inf), rng=rng)
+    return int(available_arms[random_argmax(index[available_arms], rng=rng)])
+
+
+# Only export and expose the functions defined here
+__all__ = ["random_argmax", "random_order", "random_top_m", "random_rank", "random_argmax_subset"]
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+""" Fast uniform sub-sampling without replacement, for the sub-sampling policies (eg. :class:`BESA`).
+
+:func:`core.policies.besa.subsample_uniform` uses ``np.random.choice(m, size=n, replace=False)``, which permutes all
+the ``m`` indexes at every call. A :class:`SubSampler` draws ``n`` of ``m`` indexes in :math:`\\mathcal{O}(n)`:
+
+- with Floyd's algorithm for a few indexes [Bentley & Floyd, 1987, "A sample of brilliance"],
+- with a full permutation of a short history, which is then the fastest,
+- with :meth:`numpy.random.Generator.choice` (``shuffle=False``) otherwise, which is either Floyd's algorithm with a
+  hash set or a partial Fisher-Yates shuffle, in C,
+- and :meth:`SubSampler.sum` returns the sum of the sub-sampled rewards directly, sub-sampling the complement when
+  more than half of the rewards are kept.
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+import numpy as np
+
+#: Largest number of indexes drawn with Floyd's algorithm in Python, above it numpy is faster
+FLOYD_MAX_SIZE = 8
+#: Largest history fully permuted to draw a sub-sample
+PERMUTATION_MAX_SIZE = 512
+
+
+class SubSampler(object):
+    """ Uniform sub-sampling without replacement, with its own random generator."""
+
+    def __init__(self, rng=None):
+        """ New sub-sampler.
+
+        - rng: a :class:`numpy.random.Generator`, or None for a generator seeded from the global numpy random state
+          (so ``np.random.seed`` still makes the policies reproducible).
+        """
+        #: Random generator of the sub-samples
+        self.rng = np.random.default_rng(np.random.randint(2 ** 31)) if rng is None else rng
+
+    def __repr__(self):
+        return "{}()".format(self.__class__.__name__)
+
+    def indexes(self, n, m):
+        """ A uniform sub-set of size n of :math:`\\{0, \\dots, m - 1\\}`, in no particular order.
+
+        >>> sampler = SubSampler(np.random.default_rng(1234))
+        >>> sorted(sampler.indexes(3, 5))
+        [1, 2, 4]
+        >>> len(set(sampler.indexes(100, 1000)))
+        100
+        """
+        if n <= FLOYD_MAX_SIZE:
+            chosen = set()
+            for j, u in zip(range(m - n, m), self.rng.random(n).tolist()):
+                i = int(u * (j + 1))
+                chosen.add(j if i in chosen else i)
+            return list(chosen)
+        if m <= PERMUTATION_MAX_SIZE:
+            return self.rng.permutation(m)[:n]
+        return self.rng.choice(m, size=n, replace=False, shuffle=False)
+
+    def sum(self, values, n, total=None):
+        """ Sum of a uniform sub-sample of size n of the values (all of them if n is larger).
+
+        - total: sum of all the values if known, then at most half of the values are sub-sampled.
+
+        >>> sampler = SubSampler(np.random.default_rng(1234))
+        >>> sampler.sum(np.array([1., 2., 3., 4.]), 4)
+        10.0
+        >>> sampler.sum(np.ones(10), 7, total=10.)
+        7.0
+        """
+        m = len(values)
+        if n >= m:
+            return float(np.sum(values)) if total is None else total
+        if total is not None and 2 * n > m:
+            return total - float(np.sum(values[self.indexes(m - n, m)]))
+        return float(np.sum(values[self.indexes(n, m)]))
+
+
+# Only export and expose the class defined here
+__all__ = ["SubSampler"]
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+""" The Thompson (Bayesian) policy: play the arm with the largest sample of the posterior of its mean.
+
+- Reference: [Thompson - Biometrika, 1933], and [Agrawal & Goyal - AISTATS, 2013] for the Gamma-Poisson and Gaussian
+  posteriors.
+- The index of an arm is one sample of its posterior (see :mod:`core.policies.posterior`), and the samples of all the
+  arms (and of all the products, see :mod:`core.policies.batched`) are drawn in one vectorized call.
+- For count data like the unit sales, the default Gamma posterior of Poisson rewards fits, for Gaussian rewards use
+  ``posterior="Gauss"`` (with ``"posterior": "Gauss"`` in the policy parameters of the configuration).
+"""
+from __future__ import division, print_function  # Python 2 compatibility
+
+import numpy as np
+
+from core.policies.index_policy import IndexPolicy
+from core.policies.posterior import mapping_POSTERIOR
+
+
+class Thompson(IndexPolicy):
+    """ The Thompson (Bayesian) policy: play the arm with the largest sample of the posterior of its mean.
+
+    - Reference: [Thompson - Biometrika, 1933].
+    """
+
+    def __init__(self, nb_arms, posterior="Gamma", lower=0., amplitude=1., **posterior_params):
+        """ New Thompson policy.
+
+        - posterior: posterior class, or its name in mapping_POSTERIOR (eg. "Gamma" or "Gauss"),
+        - lower, amplitude: the rewards are normalized as ``(reward - lower) / amplitude`` for the posterior,
+        - posterior_params: parameters of the posterior, eg. the prior shape and rate of a Gamma posterior or the
+          variance of a Gauss posterior.
+        """
+        super(Thompson, self).__init__(nb_arms, lower=lower, amplitude=amplitude)
+        if isinstance(posterior, str):
+            posterior = mapping_POSTERIOR[posterior]
+        self.posterior = posterior(**posterior_params)  #: Posterior of the mean of the arms
+
+    def __str__(self):
+        return "Thompson({})".format(self.posterior)
+
+    def compute_index(self, arm):
+        r""" Compute the current index of arm k, a sample of the posterior of its (normalized) mean given the
+        :math:`N_k(t)` pulls and the sum of rewards :math:`X_k(t)`:
+
+        .. math:: I_k(t) = lower + amplitude \times \tilde{\mu}_k(t), \quad \tilde{\mu}_k(t) \sim
+           \mathbb{P}(\mu_k \mid X_k(t), N_k(t)).
+        """
+        if self.pulls[arm] < 1:
+            return float('+inf')
+        rewards = (self.rewards[arm] - self.lower * self.pulls[arm]) / self.amplitude
+        return self.lower + self.amplitude * self.posterior.sample(self.pulls[arm], rewards, rng=self.rng)
+
+    def compute_all_index(self):
+        """ Compute the current indexes for all arms, with one sample of all the posteriors at once."""
+        pulled = self.pulls >= 1
+        pulls = self.pulls[pulled]
+        rewards = (self.rewards[pulled] - self.lower * pulls) / self.amplitude
+        indexes = np.full(self.pulls.shape, float('+inf'))
+        indexes[pulled] = self.lower + self.amplitude * self.posterior.sample(pulls, rewards, rng=self.rng)
+        self.index[:] = indexes
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
@@ -6,6 +6,7 @@ from math import sqrt, log
 import numpy as np
 np.seterr(divide='ignore')  # XXX dangerous in general, controlled here!
 from core.policies.index_policy import IndexPolicy
+from core.policies.kernels import ucb_index
 
 
 class UCB(IndexPolicy):
@@ -24,10 +25,7 @@ class UCB(IndexPolicy):
 
     def compute_all_index(self):
         """ Compute the current indexes for all arms, in a vectorized manner."""
-        indexes = (self.rewards / self.pulls) + \
-            np.sqrt((2 * np.log(self.t)) / self.pulls)
-        indexes[self.pulls < 1] = float('+inf')
-        self.index[:] = indexes
+        self.index[:] = ucb_index(self.rewards, self.pulls, self.t)
 
 
 # --- Debugging
@@ -9,6 +9,7 @@ __maintainer__ = 'Akalya'
 
 from math import sqrt, log
 import numpy as np
+from core.policies.kernels import ucbv_index
 from core.policies.ucb import UCB
 
 np.seterr(divide='ignore')  # XXX dangerous in general, controlled here!
@@ -35,12 +36,21 @@ class UCBV(UCB):
         super(UCBV, self).start_game()
         self.rewardsSquared.fill(0)
 
-    # TODO check signature @akalya
-    def get_reward(self, arm, reward):
+    def get_state(self):
+        """ Internal memory of the policy, with the sums of squared rewards."""
+        state = super(UCBV, self).get_state()
+        state['rewardsSquared'] = np.asarray(self.rewardsSquared)
+        return state
+
+    def set_state(self, state):
+        """ Restore the internal memory of the policy, with the sums of squared rewards."""
+        super(UCBV, self).set_state(state)
+        self.rewardsSquared = np.array(state['rewardsSquared'], dtype=float)
+
+    def get_reward(self, arm, reward, price=1.):
         """Give a reward: increase t, pulls, and update cumulated sum of rewards and of rewards squared for that arm
         (normalized in [0, 1]). """
-        # TODO: no argument for price? @akalya
-        super(UCBV, self).get_reward(arm, reward)
+        super(UCBV, self).get_reward(arm, reward, price)
         self.rewardsSquared[arm] += ((reward -
                                       self.lower) / self.amplitude) ** 2
 
@@ -68,10 +78,4 @@ class UCBV(UCB):
 
     def compute_all_index(self):
         """ Compute the current indexes for all arms, in a vectorized manner."""
-        means = self.rewards / self.pulls   # Mean estimate
-        variances = (self.rewardsSquared / self.pulls) - \
-            means ** 2  # Variance estimate
-        indexes = means + np.sqrt(2.0 * np.log(self.t) * variances /
-                                  self.pulls) + 3.0 * self.amplitude * np.log(self.t) / self.pulls
-        indexes[self.pulls < 1] = float('+inf')
-        self.index[:] = indexes
+        self.index[:] = ucbv_index(self.rewards, self.rewardsSquared, self.pulls, self.t, self.amplitude)
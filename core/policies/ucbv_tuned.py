@@ -9,6 +9,7 @@ __version__ = "0.5"
 
 from math import sqrt, log
 import numpy as np
+from core.policies.kernels import ucbv_tuned_index
 from core.policies.ucbv import UCBV
 np.seterr(divide='ignore')  # XXX dangerous in general, controlled here!
 
@@ -47,10 +48,4 @@ class UCBVtuned(UCBV):
 
     def compute_all_index(self):
         """ Compute the current indexes for all arms, in a vectorized manner."""
-        means = self.rewards / self.pulls   # Mean estimate
-        variances = (self.rewardsSquared / self.pulls) - \
-            means ** 2  # Variance estimate
-        variances += np.sqrt(2.0 * np.log(self.t) / self.pulls)
-        indexes = means + np.sqrt(np.log(self.t) * variances / self.pulls)
-        indexes[self.pulls < 1] = float('+inf')
-        self.index[:] = indexes
+        self.index[:] = ucbv_tuned_index(self.rewards, self.rewardsSquared, self.pulls, self.t)
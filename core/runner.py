@@ -0,0 +1,252 @@
+"""
+Run the experiments of many products, serially or across a pool of processes.
+"""
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+
+from core import policies
+from core.experiment import Experiment
+from core.policies.batched import mapping_BATCHED_POLICY
+from core.policies.linucb import ContextFeatures, LinUCB
+from core.utils import instrumentation_util
+from core.utils.logger_util import get_logger
+from core.utils.transformations_util import DATE_FORMAT, get_demand_store, to_cutoff_date
+from definitions import DATA_SOURCE_DISK, HISTORICAL_DEMAND_CONSUMPTION
+
+logger = get_logger()
+
+#: Columns of the result table
+RESULT_COLUMNS = ['id', 'product_type', 'placement_id', 'placement_ids', 'index']
+
+
+def _experiment_result(placement_id_values):
+    """
+    Runs the experiment of one product and keeps only what goes into the result table
+    :param placement_id_values: config of the product, as created by create_input_config_file
+    :return: dict
+    """
+    experiment = Experiment(placement_id_values)
+    return {
+        'id': experiment.id,
+        'product_type': experiment.product_type,
+        'placement_id': experiment.new_placement_id,
+        'placement_ids': experiment.environment.placement_id.tolist(),
+        'index': np.asarray(experiment.calculation).tolist(),
+    }
+
+
+def _run_chunk(chunk):
+    """
+    Runs the experiments of a chunk of products, in a worker
+    :param chunk: list of configs
+    :return: list of dict
+    """
+    return [_experiment_result(placement_id_values) for placement_id_values in chunk]
+
+
+def _run_worker_chunk(chunk):
+    """
+    Runs the experiments of a chunk of products in a worker, and sends back what the worker recorded meanwhile
+    :param chunk: list of configs
+    :return: tuple, (list of dict, recorded stages and counters or None)
+    """
+    results = _run_chunk(chunk)
+    return results, instrumentation_util.collect() if instrumentation_util.is_enabled() else None
+
+
+def _init_worker(f_name, data_source, instrumented=False):
+    """
+    Prepares a worker: with fork the demand store of the parent is shared copy-on-write, otherwise it is loaded once
+    per worker. The random generator is re-seeded, or all the forked workers would break ties the same way.
+    :param f_name:
+    :param data_source:
+    :param instrumented: whether the main process records the stages, the worker then records from zero (a forked
+    worker would otherwise send back what the parent recorded before the fork)
+    :return: None
+    """
+    np.random.seed()
+    if instrumented:
+        instrumentation_util.enable()
+    else:
+        instrumentation_util.disable()
+    get_demand_store(f_name, data_source)
+
+
+def _get_context():
+    """
+    Returns the multiprocessing context, fork where available so the workers share the demand data read-only
+    :return: multiprocessing context
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def run_experiments(placement_ids_values, n_workers=None, chunk_size=None,
+                    f_name=HISTORICAL_DEMAND_CONSUMPTION, data_source=DATA_SOURCE_DISK):
+    """
+    Runs one experiment per product and gathers the chosen placement ids in one table
+    :param placement_ids_values: list of configs, as created by create_input_config_file
+    :param n_workers: number of processes, None for the number of cores, 1 to run in this process
+    :param chunk_size: number of products sent at once to a worker, None to give about 4 chunks per worker
+    :param f_name: demand history used by the experiments
+    :param data_source: local or bq
+    :return: dataframe, one row per product
+
+    A pool of workers gives the table of the serial run, in the order of the configs:
+
+    >>> from core.utils.config_util import create_input_config_file
+    >>> placement_ids_values = create_input_config_file(HISTORICAL_DEMAND_CONSUMPTION)
+    >>> serial = run_experiments(placement_ids_values, n_workers=1)
+    >>> pooled = run_experiments(placement_ids_values, n_workers=2, chunk_size=1)
+    >>> len(pooled), pooled.equals(serial)
+    (3, True)
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = max(1, min(n_workers, len(placement_ids_values)))
+
+    # Load the demand data before forking, the workers only read it
+    get_demand_store(f_name, data_source)
+
+    if n_workers == 1:
+        results = _run_chunk(placement_ids_values)
+    else:
+        if chunk_size is None:
+            chunk_size = max(1, -(-len(placement_ids_values) // (4 * n_workers)))
+        chunks = [placement_ids_values[i:i + chunk_size] for i in range(0, len(placement_ids_values), chunk_size)]
+        logger.info(f'Running {len(placement_ids_values)} experiments in {len(chunks)} chunks on {n_workers} workers')
+        results = []
+        initargs = (f_name, data_source, instrumentation_util.is_enabled())
+        with _get_context().Pool(n_workers, initializer=_init_worker, initargs=initargs) as pool:
+            for chunk_results, recorded in pool.imap(_run_worker_chunk, chunks):
+                results.extend(chunk_results)
+                if recorded is not None:
+                    instrumentation_util.merge(recorded)
+
+    instrumentation_util.count('products_processed', len(results))
+    return pd.DataFrame(results, columns=RESULT_COLUMNS)
+
+
+def run_incremental(statistics, archtype='UCBVtuned', params=None):
+    """
+    Chooses the placement id of every product from its arm statistics, without rebuilding arms from the history.
+    The policy gets the same inputs as in Experiment: discounted sums as rewards and days as pulls.
+    :param statistics: ArmStatistics, updated with the new rows of the day
+    :param archtype: name of the policy class in core.policies
+    :param params: parameters of the policy
+    :return: dataframe, one row per product
+    """
+    policy_algorithm = getattr(policies, archtype)
+    placement_ids = statistics.placement_id
+    results = []
+    for (id, product_type), rows in statistics.products().items():
+        policy = policy_algorithm(len(rows), **(params or {}))
+        policy.pulls = statistics.count[rows]
+        policy.rewards = statistics.discounted_sum[rows]
+        policy.rewardsSquared = np.square(policy.rewards)
+        policy.t = np.sum(policy.pulls)
+        with instrumentation_util.timer('policy.choice'):
+            index, calculation = policy.choice()
+        results.append({
+            'id': id,
+            'product_type': product_type,
+            'placement_id': placement_ids[rows][index],
+            'placement_ids': placement_ids[rows].tolist(),
+            'index': np.asarray(calculation).tolist(),
+        })
+    instrumentation_util.count('products_processed', len(results))
+    return pd.DataFrame(results, columns=RESULT_COLUMNS)
+
+
+def run_batched(statistics, archtype='UCBVtuned', params=None):
+    """
+    Chooses the placement id of every product at once, with the batched version of an index policy: the statistics
+    are laid out as (products, placements) matrices and all the indexes and choices are a few array operations.
+    :param statistics: ArmStatistics
+    :param archtype: name of the index policy, a key of mapping_BATCHED_POLICY
+    :param params: parameters of the policy
+    :return: dataframe, one row per product
+    """
+    products = statistics.product_keys()
+    nb_placements = np.bincount(statistics.product_code, minlength=len(products))
+    nb_arms = max(np.max(nb_placements, initial=0), 1)
+    # rows of a product are laid out in the order they were added, as in statistics.products()
+    order = np.argsort(statistics.product_code, kind='stable')
+    product_of_row = statistics.product_code[order]
+    arm_of_row = np.arange(len(order)) - np.r_[0, np.cumsum(nb_placements)[:-1]][product_of_row]
+
+    def to_matrix(values, fill=0):
+        matrix = np.full((len(products), nb_arms), fill, dtype=np.asarray(values).dtype)
+        matrix[product_of_row, arm_of_row] = values[order]
+        return matrix
+
+    policy = mapping_BATCHED_POLICY[archtype](len(products), nb_arms, **(params or {}))
+    rewards = to_matrix(statistics.discounted_sum)
+    policy.set_statistics(to_matrix(statistics.count), rewards, rewards_squared=np.square(rewards),
+                          available=to_matrix(np.ones(len(statistics), dtype=bool), fill=False))
+    with instrumentation_util.timer('policy.choice'):
+        choices, index = policy.choice()
+    instrumentation_util.count('products_processed', len(products))
+
+    placement_ids = to_matrix(statistics.placement_id)
+    return pd.DataFrame({
+        'id': [product[0] for product in products],
+        'product_type': [product[1] for product in products],
+        'placement_id': placement_ids[np.arange(len(products)), choices],
+        'placement_ids': [row[:nb] for row, nb in zip(placement_ids.tolist(), nb_placements.tolist())],
+        'index': [row[:nb] for row, nb in zip(index.tolist(), nb_placements.tolist())],
+    }, columns=RESULT_COLUMNS)
+
+
+def run_contextual(date=None, params=None, f_name=HISTORICAL_DEMAND_CONSUMPTION, data_source=DATA_SOURCE_DISK):
+    """
+    Chooses the placement id of every product with one LinUCB policy shared by all products: it learns the demand of
+    each placement id from the features of the product type and of the day of every row of the history, so a product
+    with little history gets the placement that works for its product type, weekday and month
+    :param date: day to choose the placements for, the history being used up to it (included), or None for the day
+    after the last day of the history
+    :param params: parameters of LinUCB, the amplitude being the largest consumption of the history by default
+    :param f_name: demand history
+    :param data_source: local or bq
+    :return: dataframe, one row per product
+    """
+    data = get_demand_store(f_name, data_source).data
+    dates = pd.to_datetime(data['date'], format=DATE_FORMAT).values
+    cutoff = to_cutoff_date(date)
+    history = np.flatnonzero(dates <= cutoff) if cutoff is not None else np.arange(len(data))
+    history = history[np.argsort(dates[history], kind='stable')]
+    if cutoff is None:
+        cutoff = (np.max(dates) if len(dates) else np.datetime64('today')) + np.timedelta64(1, 'D')
+
+    placement_ids = np.unique(data['placement_id'].values)
+    features = ContextFeatures(np.unique(data['product_type'].values))
+    consumption = data['consumption'].values[history].astype(float)
+    params = dict({'amplitude': max(float(np.max(consumption, initial=0.)), 1.)}, **(params or {}))
+    policy = LinUCB(len(placement_ids), features.dimension, **params)
+    policy.start_game()
+    policy.get_rewards(np.searchsorted(placement_ids, data['placement_id'].values[history]), consumption,
+                       features.encode(data['product_type'].values[history], dates[history]))
+
+    products = data[['id', 'product_type']].drop_duplicates()
+    with instrumentation_util.timer('policy.choice'):
+        choices, index = policy.choice(features.encode(products['product_type'].values, [cutoff] * len(products)))
+    instrumentation_util.count('products_processed', len(products))
+    return pd.DataFrame({
+        'id': products['id'].values,
+        'product_type': products['product_type'].values,
+        'placement_id': placement_ids[choices],
+        'placement_ids': [placement_ids.tolist()] * len(products),
+        'index': index.tolist(),
+    }, columns=RESULT_COLUMNS)
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
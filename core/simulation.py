@@ -0,0 +1,285 @@
+"""
+Offline evaluation of the policies: simulation on a MAB and replay of the historical demand.
+
+- :func:`simulate` plays a policy for a horizon against a :class:`MAB`, the rewards of every arm and every step being
+  drawn at once before the game,
+- :func:`replay` walks a logged history day by day: a day counts only when the policy chooses the placement that was
+  actually used that day, and it then receives the logged consumption [Li et al., 2011, "Unbiased offline evaluation
+  of contextual-bandit-based news article recommendation algorithms"].
+
+The choices, rewards and regrets of every step and repetition are written into preallocated arrays of a
+:class:`SimulationResult`.
+
+- :func:`simulate_batched` plays many repetitions of an index policy in lockstep, with a batched policy of
+  :mod:`core.policies.batched` (one row per repetition), and only keeps the mean and quantile regret curves in a
+  :class:`RegretCurves`, so its memory does not grow with the number of repetitions.
+"""
+import numpy as np
+
+from core.policies.batched import mapping_BATCHED_POLICY
+from core.utils.transformations_util import get_demand_store
+from definitions import DATA_SOURCE_DISK, HISTORICAL_DEMAND_CONSUMPTION
+
+
+class SimulationResult(object):
+    """
+    Choices, rewards and regrets of each step of each repetition. Steps skipped by a replay have a choice of -1 and no
+    reward nor regret.
+    """
+
+    def __init__(self, repetitions, horizon):
+        self.choices = np.full((repetitions, horizon), -1, dtype=np.int32)  #: Arm chosen at each step
+        self.rewards = np.zeros((repetitions, horizon))  #: Reward (sales) received at each step
+        self.regret = np.zeros((repetitions, horizon))  #: Gap between the best mean and the mean of the chosen arm
+
+    def __repr__(self):
+        return "{}(repetitions: {}, horizon: {})".format(self.__class__.__name__, *self.choices.shape)
+
+    @property
+    def cumulative_rewards(self):
+        """ Cumulative sales of each repetition, step after step."""
+        return np.cumsum(self.rewards, axis=1)
+
+    @property
+    def cumulative_regret(self):
+        """ Cumulative regret of each repetition, step after step."""
+        return np.cumsum(self.regret, axis=1)
+
+    @property
+    def mean_cumulative_regret(self):
+        """ Cumulative regret averaged over the repetitions."""
+        return np.mean(self.cumulative_regret, axis=0)
+
+    def placement_counts(self, nb_arms):
+        """ Number of times each arm was chosen, in each repetition."""
+        counts = np.zeros((self.choices.shape[0], nb_arms), dtype=int)
+        for repetition, choices in enumerate(self.choices):
+            counts[repetition] = np.bincount(choices[choices >= 0], minlength=nb_arms)
+        return counts
+
+
+def _chosen_arm(choice):
+    """
+    Returns the arm of a choice, the index policies also returning their indexes
+    :param choice:
+    :return: int
+    """
+    return choice[0] if isinstance(choice, tuple) else choice
+
+
+def simulate(policy_algorithm, environment, horizon, repetitions=1, policy_parameters=None, price=1.):
+    """
+    Plays a new policy against the environment, for each repetition
+    :param policy_algorithm: policy class, eg. UCBVtuned
+    :param environment: MAB whose arms are drawn from
+    :param horizon: number of steps of each repetition
+    :param repetitions: number of independent repetitions
+    :param policy_parameters: parameters of the policy
+    :param price: price given to the policy with each reward
+    :return: SimulationResult
+
+    >>> from core.arms import DiscreteArm
+    >>> from core.environment.mab import MAB
+    >>> from core.policies import UCBVtuned
+    >>> np.random.seed(0)
+    >>> environment = MAB([DiscreteArm(k, np.random.poisson(mean, 200)) for k, mean in enumerate([40, 50, 60])])
+    >>> result = simulate(UCBVtuned, environment, 300, repetitions=4)
+    >>> result
+    SimulationResult(repetitions: 4, horizon: 300)
+    >>> result.placement_counts(3)
+    array([[  1,   1, 298],
+           [  1,   1, 298],
+           [  1,   1, 298],
+           [  1,   7, 292]])
+    >>> bool(np.array_equal(result.regret, (environment.maxArm - environment.means)[result.choices]))
+    True
+    """
+    result = SimulationResult(repetitions, horizon)
+    gaps = environment.maxArm - environment.means
+    steps = np.arange(horizon)
+    for repetition in range(repetitions):
+        # All the draws of the game at once, arm after arm
+        draws = environment.draw_each_nparray(shape=(horizon,)).reshape(environment.nbArms, horizon)
+        policy = policy_algorithm(environment.nbArms, **(policy_parameters or {}))
+        policy.start_game()
+        choices = result.choices[repetition]
+        for t in steps:
+            arm = _chosen_arm(policy.choice())
+            choices[t] = arm
+            policy.get_reward(arm, draws[arm, t], price)
+        result.rewards[repetition] = draws[choices, steps]
+        result.regret[repetition] = gaps[choices]
+    return result
+
+
+def replay(policy_algorithm, placement_ids, logged_placements, logged_consumption, repetitions=1,
+           policy_parameters=None, price=1.):
+    """
+    Replays a logged history of (placement id, consumption) days, in date order, for each repetition
+    :param policy_algorithm: policy class, eg. UCBVtuned
+    :param placement_ids: placement id of each arm of the policy
+    :param logged_placements: placement id used each day
+    :param logged_consumption: consumption of each day
+    :param repetitions: number of independent repetitions
+    :param policy_parameters: parameters of the policy
+    :param price: price given to the policy with each reward
+    :return: SimulationResult, with one step per logged day
+
+    Only the days where the policy chooses the logged placement count:
+
+    >>> from core.policies import UCB
+    >>> np.random.seed(0)
+    >>> result = replay(UCB, [1, 2, 3], [1, 2, 3, 1, 2, 3], [10, 20, 30, 10, 20, 30])
+    >>> result.choices
+    array([[ 0, -1,  2, -1,  1,  2]], dtype=int32)
+    >>> result.rewards
+    array([[10.,  0., 30.,  0., 20., 30.]])
+    """
+    placement_ids = np.asarray(placement_ids)
+    logged_consumption = np.asarray(logged_consumption, dtype=float)
+    # Arm of each logged day, and the mean consumption of each arm over the log for the regret
+    sorter = np.argsort(placement_ids)
+    logged_arms = sorter[np.searchsorted(placement_ids, logged_placements, sorter=sorter)]
+    means = np.bincount(logged_arms, weights=logged_consumption, minlength=len(placement_ids)) / \
+        np.maximum(np.bincount(logged_arms, minlength=len(placement_ids)), 1)
+    gaps = np.max(means) - means
+
+    horizon = len(logged_arms)
+    result = SimulationResult(repetitions, horizon)
+    for repetition in range(repetitions):
+        policy = policy_algorithm(len(placement_ids), **(policy_parameters or {}))
+        policy.start_game()
+        choices = result.choices[repetition]
+        for t in range(horizon):
+            arm = _chosen_arm(policy.choice())
+            if arm == logged_arms[t]:
+                choices[t] = arm
+                policy.get_reward(arm, logged_consumption[t], price)
+        matched = choices >= 0
+        result.rewards[repetition, matched] = logged_consumption[matched]
+        result.regret[repetition, matched] = gaps[choices[matched]]
+    return result
+
+
+class RegretCurves(object):
+    """
+    Mean and quantiles over the repetitions of the cumulative regret and sales, recorded every few steps.
+    """
+
+    def __init__(self, steps, quantiles):
+        self.steps = steps  #: Steps at which the curves are recorded (from 1)
+        self.quantiles = np.asarray(quantiles)  #: Quantiles of the cumulative regret that are recorded
+        self.mean_regret = np.zeros(len(steps))  #: Mean cumulative regret
+        self.quantile_regret = np.zeros((len(self.quantiles), len(steps)))  #: Quantiles of the cumulative regret
+        self.mean_rewards = np.zeros(len(steps))  #: Mean cumulative sales
+        self.final_regret = None  #: Cumulative regret of each repetition at the end of the game
+        self.pulls = None  #: Number of pulls of each arm in each repetition at the end of the game
+
+    def __repr__(self):
+        return "{}(horizon: {}, points: {})".format(self.__class__.__name__, self.steps[-1], len(self.steps))
+
+
+def simulate_batched(archtype, environment, horizon, repetitions=100, policy_parameters=None, price=1.,
+                     quantiles=(0.1, 0.5, 0.9), record_every=1, block_size=1000):
+    """
+    Plays repetitions of an index policy against the environment in lockstep, the state of all the repetitions being
+    (repetitions, nbArms) matrices
+    :param archtype: name of the index policy, a key of mapping_BATCHED_POLICY
+    :param environment: MAB whose arms are drawn from
+    :param horizon: number of steps of each repetition
+    :param repetitions: number of independent repetitions
+    :param policy_parameters: parameters of the policy
+    :param price: price given to the policy with each reward
+    :param quantiles: quantiles of the cumulative regret to record
+    :param record_every: the curves are recorded every this number of steps, and at the last step
+    :param block_size: number of steps whose rewards are drawn at once, for all arms and repetitions
+    :return: RegretCurves
+
+    The repetitions are those of :func:`simulate`, played together:
+
+    >>> from core.arms import DiscreteArm
+    >>> from core.environment.mab import MAB
+    >>> from core.policies import UCBVtuned
+    >>> np.random.seed(0)
+    >>> environment = MAB([DiscreteArm(k, np.random.poisson(mean, 200)) for k, mean in enumerate([40, 50, 60])])
+    >>> serial = simulate(UCBVtuned, environment, 300, repetitions=50)
+    >>> curves = simulate_batched('UCBVtuned', environment, 300, repetitions=50, record_every=100)
+    >>> curves
+    RegretCurves(horizon: 300, points: 3)
+    >>> round(float(np.median(serial.cumulative_regret[:, -1])), 2), round(float(curves.quantile_regret[1, -1]), 2)
+    (30.88, 30.88)
+    >>> bool(np.all(np.diff(curves.mean_regret) >= 0))
+    True
+    >>> bool(np.isclose(curves.mean_regret[-1], np.mean(curves.final_regret)))
+    True
+    >>> int(curves.pulls.sum())
+    15000
+    """
+    steps = np.unique(np.r_[np.arange(record_every, horizon + 1, record_every), horizon])
+    curves = RegretCurves(steps, quantiles)
+    gaps = environment.maxArm - environment.means
+    policy = mapping_BATCHED_POLICY[archtype](repetitions, environment.nbArms, **(policy_parameters or {}))
+    policy.start_game()
+    rows = np.arange(repetitions)
+    cumulative_regret = np.zeros(repetitions)
+    cumulative_rewards = np.zeros(repetitions)
+
+    point = 0
+    with np.errstate(invalid='ignore'):
+        for block_start in range(0, horizon, block_size):
+            block = min(block_size, horizon - block_start)
+            # Rewards of every arm, repetition and step of the block, shape (nbArms, repetitions, block)
+            draws = environment.draw_each_nparray(shape=(repetitions, block)).reshape(
+                environment.nbArms, repetitions, block)
+            for t in range(block):
+                arms = policy.choice()[0]
+                rewards = draws[arms, rows, t]
+                policy.get_reward(arms, rewards, price)
+                cumulative_regret += gaps[arms]
+                cumulative_rewards += rewards
+                if block_start + t + 1 == steps[point]:
+                    curves.mean_regret[point] = np.mean(cumulative_regret)
+                    curves.quantile_regret[:, point] = np.quantile(cumulative_regret, curves.quantiles)
+                    curves.mean_rewards[point] = np.mean(cumulative_rewards)
+                    point += 1
+
+    curves.final_regret = cumulative_regret
+    curves.pulls = policy.pulls
+    return curves
+
+
+def replay_product(policy_algorithm, id, product_type, date=None, repetitions=1, policy_parameters=None, price=1.,
+                   f_name=HISTORICAL_DEMAND_CONSUMPTION, data_source=DATA_SOURCE_DISK):
+    """
+    Replays the demand history of one product, from the demand store, up to the date (included)
+    :param policy_algorithm: policy class, eg. UCBVtuned
+    :param id:
+    :param product_type:
+    :param date: "as of" date, or None for the whole history
+    :param repetitions: number of independent repetitions
+    :param policy_parameters: parameters of the policy
+    :param price: price given to the policy with each reward
+    :param f_name:
+    :param data_source: local or bq
+    :return: tuple of the placement ids of the arms and the SimulationResult
+    """
+    index = get_demand_store(f_name, data_source).index
+    placement_ids = index.placement_ids(id, product_type)
+    dates, placements, consumption = [], [], []
+    for placement_id in placement_ids:
+        consumed = index.consumption_slice(id, product_type, placement_id, date)
+        dates.append(index.dates_slice(id, product_type, placement_id, date))
+        placements.append(np.full(len(consumed), placement_id))
+        consumption.append(consumed)
+    order = np.argsort(np.concatenate(dates), kind='stable')
+    return placement_ids, replay(policy_algorithm, placement_ids, np.concatenate(placements)[order],
+                                 np.concatenate(consumption)[order], repetitions=repetitions,
+                                 policy_parameters=policy_parameters, price=price)
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
@@ -2,7 +2,7 @@
 Utility for setting the placement ids and values
 """
 from core.scripts.setup import CONFIG_LOCAL
-from core.utils.transformations_util import get_demand_history
+from core.utils.transformations_util import get_demand_store
 from definitions import DATA_SOURCE_DISK, HISTORICAL_DEMAND_CONSUMPTION
 from datetime import datetime, date
 from core.utils.io_utils import logger
@@ -16,7 +16,7 @@ def create_input_config_file(f_name, data_source=DATA_SOURCE_DISK):
     :return: json
     """
 
-    grocery_list = get_demand_history(f_name, data_source=DATA_SOURCE_DISK)
+    grocery_list = get_demand_store(f_name, data_source=DATA_SOURCE_DISK).data
     filtered_df = grocery_list[['id', 'product_type']].drop_duplicates().reset_index(drop=True)
 
 
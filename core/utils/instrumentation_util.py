@@ -0,0 +1,224 @@
+"""
+Utility for the instrumentation of a run: the wall time of each stage (eg. reading the history, building the arms,
+choosing the placements) and counters (rows scanned, arms built, products processed), exported at the end of the run
+as a json summary and optionally as a Prometheus text file.
+
+It is disabled by default, and then a timed function or block only tests a flag. It is enabled by enable(), or for the
+whole process by the environment variable GROCERY_INSTRUMENTATION=1.
+"""
+import json
+import os
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from functools import wraps
+
+from core.scripts.setup import PATH_TEMP_DIR
+
+#: Environment variable enabling the instrumentation when set to 1
+ENV_INSTRUMENTATION = 'GROCERY_INSTRUMENTATION'
+#: Directory of the summaries written by default, one file per run
+PATH_INSTRUMENTATION = os.path.join(PATH_TEMP_DIR, 'instrumentation')
+#: Prefix of the Prometheus metrics
+PROMETHEUS_PREFIX = 'grocery'
+
+_enabled = os.environ.get(ENV_INSTRUMENTATION, '0') == '1'
+#: Number of calls and wall time of each stage, keyed by the name of the stage
+_stages = {}
+#: Value of each counter, keyed by its name
+_counters = {}
+_started = time.time()
+_null_timer = nullcontext()
+
+
+class _Timer(object):
+    """
+    Adds the wall time of a block to its stage
+    """
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        add_time(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def is_enabled():
+    """
+    Returns whether the stages and counters are recorded
+    :return: bool
+    """
+    return _enabled
+
+
+def enable():
+    """
+    Starts recording the stages and counters, from zero
+    :return: None
+    """
+    global _enabled
+    reset()
+    _enabled = True
+
+
+def disable():
+    """
+    Stops recording the stages and counters, what was recorded is kept until the next reset
+    :return: None
+    """
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """
+    Drops what was recorded, and starts the wall time of the run
+    :return: None
+    """
+    global _started
+    _stages.clear()
+    _counters.clear()
+    _started = time.time()
+
+
+def add_time(stage, seconds, calls=1):
+    """
+    Adds calls and their wall time to a stage
+    :param stage:
+    :param seconds:
+    :param calls:
+    :return: None
+    """
+    if _enabled:
+        totals = _stages.setdefault(stage, [0, 0.])
+        totals[0] += calls
+        totals[1] += seconds
+
+
+def count(name, value=1):
+    """
+    Adds a value to a counter
+    :param name: eg. 'rows_scanned'
+    :param value:
+    :return: None
+    """
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def timer(stage):
+    """
+    Returns a context manager adding the wall time of its block to the stage
+    :param stage:
+    :return: context manager
+    """
+    return _Timer(stage) if _enabled else _null_timer
+
+
+def timed(stage):
+    """
+    Decorator adding the wall time of each call of the function to the stage
+    :param stage:
+    :return: decorator
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                add_time(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def collect():
+    """
+    Returns what was recorded since the last reset and resets it, eg. to send it from a worker to the main process
+    :return: dict
+    """
+    recorded = {'stages': {stage: list(totals) for stage, totals in _stages.items()}, 'counters': dict(_counters)}
+    reset()
+    return recorded
+
+
+def merge(recorded):
+    """
+    Adds what was recorded elsewhere (eg. by collect() in a worker) to the stages and counters
+    :param recorded: dict, as returned by collect
+    :return: None
+    """
+    for stage, (calls, seconds) in recorded['stages'].items():
+        add_time(stage, seconds, calls)
+    for name, value in recorded['counters'].items():
+        count(name, value)
+
+
+def summary():
+    """
+    Returns the summary of the run: its start and wall time, and the calls and wall time of each stage and the counters
+    :return: dict
+    """
+    return {
+        'started': datetime.fromtimestamp(_started).isoformat(timespec='seconds'),
+        'wall_seconds': time.time() - _started,
+        'stages': {stage: {'calls': calls, 'seconds': seconds} for stage, (calls, seconds) in sorted(_stages.items())},
+        'counters': dict(sorted(_counters.items())),
+    }
+
+
+def to_prometheus(run_summary):
+    """
+    Returns a summary in the Prometheus text exposition format
+    :param run_summary: dict, as returned by summary
+    :return: str
+    """
+    lines = [
+        '# HELP {}_run_seconds Wall time of the run'.format(PROMETHEUS_PREFIX),
+        '# TYPE {}_run_seconds gauge'.format(PROMETHEUS_PREFIX),
+        '{}_run_seconds {!r}'.format(PROMETHEUS_PREFIX, run_summary['wall_seconds']),
+    ]
+    for metric, field, description in (('stage_seconds', 'seconds', 'Wall time of each stage'),
+                                       ('stage_calls', 'calls', 'Number of calls of each stage')):
+        lines.append('# HELP {}_{} {}'.format(PROMETHEUS_PREFIX, metric, description))
+        lines.append('# TYPE {}_{} gauge'.format(PROMETHEUS_PREFIX, metric))
+        for stage, totals in run_summary['stages'].items():
+            lines.append('{}_{}{{stage="{}"}} {!r}'.format(PROMETHEUS_PREFIX, metric, stage, totals[field]))
+    for name, value in run_summary['counters'].items():
+        lines.append('# TYPE {}_{} gauge'.format(PROMETHEUS_PREFIX, name))
+        lines.append('{}_{} {!r}'.format(PROMETHEUS_PREFIX, name, value))
+    return '\n'.join(lines) + '\n'
+
+
+def write_summary(path=None, prometheus_path=None):
+    """
+    Writes the summary of the run as json, and in the Prometheus text format if a path is given for it
+    :param path: json file, by default a new file of PATH_INSTRUMENTATION named after the start of the run
+    :param prometheus_path: text file (eg. for the textfile collector of the node exporter), or None
+    :return: path of the json file
+    """
+    run_summary = summary()
+    if path is None:
+        path = os.path.join(PATH_INSTRUMENTATION, 'run_{}.json'.format(
+            datetime.fromtimestamp(_started).strftime('%Y%m%d_%H%M%S')))
+    for file_path in (path, prometheus_path):
+        if file_path is not None and os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(run_summary, f, indent=2)
+    if prometheus_path is not None:
+        # Written then renamed, so that a collector never reads a partial file
+        with open(prometheus_path + '.tmp', 'w') as f:
+            f.write(to_prometheus(run_summary))
+        os.replace(prometheus_path + '.tmp', prometheus_path)
+    return path
@@ -0,0 +1,23 @@
+"""
+Utility for the optional compiled kernels: with Numba installed, scalar functions are compiled to numpy ufuncs,
+otherwise the callers use their pure NumPy versions
+"""
+try:
+    from numba import vectorize
+    #: Whether the kernels are compiled with Numba
+    USE_NUMBA = True
+except ImportError:
+    vectorize = None
+    USE_NUMBA = False
+
+
+def jit_ufunc(function):
+    """
+    Compiles a scalar function of floats to a numpy ufunc, which broadcasts its arguments like the numpy operators
+    :param function: function of float arguments returning a float, using only the math module
+    :return: ufunc, or None without Numba
+    """
+    if not USE_NUMBA:
+        return None
+    signature = 'float64({})'.format(', '.join(['float64'] * function.__code__.co_argcount))
+    return vectorize([signature], nopython=True, cache=True)(function)
@@ -3,17 +3,59 @@
 import numpy as np
 discount_factor = 0.9
 
+#: Number of days computed together by :func:`discounted_rewards`, the decay between two days of a block is a matrix
+_BLOCK_SIZE = 256
 
-def discounted_rewards(credit_consumption):
+
+def _decay_matrix(ratio, size):
+    """
+    Lower triangular matrix of the decays between the days of a block, ``ratio ** (i - j)`` for ``i >= j``
+    :param ratio:
+    :param size:
+    :return: numpy.ndarray
     """
-    Calculates the discounted factor
+    exponents = np.arange(size)[:, None] - np.arange(size)[None, :]
+    return np.where(exponents >= 0, ratio ** np.maximum(exponents, 0), 0.)
+
+
+def next_discounted_reward(previous, credit_consumed):
+    """
+    Extends the discounted rewards by one day
+    :param previous: discounted reward of the day before, 0 for the first day
+    :param credit_consumed: consumption of the new day
+    :return: float
+    """
+    return previous * (1 - discount_factor) + credit_consumed * discount_factor
+
+
+def discounted_rewards(credit_consumption, initial=0.):
+    r"""
+    Calculates the discounted factor of each day, with :math:`\gamma` the discount factor and :math:`x_j` the
+    consumptions:
+
+    .. math:: D_i = \gamma \sum_{j \leq i} x_j (1 - \gamma)^{i - j} = (1 - \gamma) D_{i-1} + \gamma x_i.
+
+    The recurrence is computed by blocks of days, in linear time.
+
     :param credit_consumption:
-    :return:
+    :param initial: discounted reward of the day before the first one, to extend an already computed history
+    :return: numpy.ndarray
     """
-    credit_consumed = np.array(credit_consumption)
-    discounted_rewards = []
-    for index in range(credit_consumed.shape[0]):
-        cc_discountfactor = credit_consumed[0:index+1] * discount_factor
-        p = np.poly1d(cc_discountfactor)
-        discounted_rewards.append(p(1-discount_factor))
-    return discounted_rewards
+    credit_consumed = np.asarray(credit_consumption, dtype=float)
+    size = credit_consumed.shape[0]
+    ratio = 1 - discount_factor
+    block_size = min(_BLOCK_SIZE, max(size, 1))
+    nb_blocks = -(-size // block_size)
+
+    # Discounted rewards of each block on its own, as if the block started from zero
+    blocks = np.zeros(nb_blocks * block_size)
+    blocks[:size] = credit_consumed * discount_factor
+    blocks = blocks.reshape(nb_blocks, block_size) @ _decay_matrix(ratio, block_size).T
+
+    # Then add what is carried over from the previous blocks
+    carry_decay = ratio ** np.arange(1, block_size + 1)
+    carry = initial
+    for block in blocks:
+        block += carry * carry_decay
+        carry = block[-1]
+    return blocks.ravel()[:size]
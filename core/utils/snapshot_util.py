@@ -0,0 +1,206 @@
+"""
+Utility to save and load the state of the policies and environments of many products in one binary file
+"""
+import numpy as np
+
+from core import policies
+from core.environment.mab import MAB
+
+#: Fields of the states with a variable number of values per product (not one per arm, eg. the last rewards of a
+#: sliding window)
+RAGGED_FIELDS = ('all_rewards', 'ringArms', 'ringRewards', 'ringRewardsSquared')
+#: Kinds of fields: one value per product, one value per arm, or a variable number of values
+PRODUCT, ARM, RAGGED = 'product', 'arm', 'ragged'
+
+
+def _pack(arrays, prefix, states, nb_arms):
+    """
+    Concatenates the states of all products, field by field, into the arrays to save
+    :param arrays: dict of arrays to save, updated
+    :param prefix: prefix of the names of the arrays
+    :param states: list of dict, one per product
+    :param nb_arms: list, number of arms of each product
+    :return: None
+    """
+    fields = sorted(set().union(*states)) if states else []
+    kinds = []
+    for field in fields:
+        present = np.array([field in state for state in states])
+        values = [np.asarray(state[field]) if field in state else None for state in states]
+        dtype = values[int(np.argmax(present))].dtype
+        if field in RAGGED_FIELDS:
+            kind = RAGGED
+            values = [np.zeros(0, dtype=dtype) if value is None else value for value in values]
+            arrays[prefix + field + '_offsets'] = np.r_[0, np.cumsum([len(value) for value in values])]
+            arrays[prefix + field] = np.concatenate(values)
+        elif all(value is None or value.ndim == 0 for value in values):
+            kind = PRODUCT
+            arrays[prefix + field] = np.array([0 if value is None else value[()] for value in values], dtype=dtype)
+        else:
+            kind = ARM
+            values = [np.zeros(nb, dtype=dtype) if value is None else value for value, nb in zip(values, nb_arms)]
+            arrays[prefix + field] = np.concatenate(values)
+        if not present.all():
+            arrays[prefix + field + '_present'] = present
+        kinds.append(kind)
+    arrays[prefix + 'fields'] = np.array(fields, dtype=str)
+    arrays[prefix + 'kinds'] = np.array(kinds, dtype=str)
+
+
+def save_snapshot(path, experiments):
+    """
+    Saves the state of the policy and of the environment of every experiment in one uncompressed ``.npz`` file
+    :param path:
+    :param experiments: list of Experiment
+    :return: None
+    """
+    experiments = list(experiments)
+    nb_arms = [experiment.environment.nbArms for experiment in experiments]
+    arrays = {
+        'ids': np.array([experiment.id for experiment in experiments], dtype=str),
+        'product_types': np.array([experiment.product_type for experiment in experiments], dtype=str),
+        'archtypes': np.array([experiment.policy.__class__.__name__ for experiment in experiments], dtype=str),
+        'arm_offsets': np.r_[0, np.cumsum(nb_arms)].astype(np.int64),
+    }
+    _pack(arrays, 'policy_', [experiment.policy.get_state() for experiment in experiments], nb_arms)
+    _pack(arrays, 'environment_', [experiment.environment.get_state() for experiment in experiments], nb_arms)
+    np.savez(path, **arrays)
+
+
+def load_snapshot(path):
+    """
+    Loads a snapshot saved by save_snapshot
+    :param path:
+    :return: Snapshot
+    """
+    with np.load(path) as saved:
+        return Snapshot({name: saved[name] for name in saved.files})
+
+
+class Snapshot(object):
+    """
+    States of the policies and environments of many products, kept as the concatenated arrays of the file. The state of
+    a product is only sliced out when asked for.
+
+    Saving then loading is exact, for any number of arms and any policy (eg. the ragged rewards of BESA and the ring
+    buffers of SWUCB), down to the dtypes:
+
+    >>> import os, tempfile
+    >>> from types import SimpleNamespace
+    >>> from core.arms import DiscreteArm
+    >>> from core.policies import BESA, SWUCB, UCBVtuned
+    >>> np.random.seed(0)
+    >>> experiments = []
+    >>> for i, policy in enumerate([UCBVtuned(2), BESA(3), SWUCB(4, window=5)]):
+    ...     policy.start_game()
+    ...     for t in range(12):
+    ...         policy.get_reward(t % policy.nbArms, np.random.poisson(40 + 10 * (t % policy.nbArms)))
+    ...     environment = MAB([DiscreteArm(k, np.random.poisson(40 + 10 * k, 30)) for k in range(policy.nbArms)])
+    ...     experiments.append(SimpleNamespace(id=str(i), product_type='bakery', policy=policy,
+    ...                                        environment=environment))
+    >>> path = os.path.join(tempfile.mkdtemp(), 'snapshot.npz')
+    >>> save_snapshot(path, experiments)
+    >>> snapshot = load_snapshot(path)
+    >>> snapshot
+    Snapshot(nbProducts: 3, nbArms: 9)
+    >>> def same(state, restored):
+    ...     return state.keys() == restored.keys() and all(
+    ...         np.array_equal(state[field], restored[field])
+    ...         and np.asarray(state[field]).dtype == restored[field].dtype for field in state)
+    >>> [same(experiment.policy.get_state(), snapshot.policy_state(i)) for i, experiment in enumerate(experiments)]
+    [True, True, True]
+    >>> restored = [snapshot.policy(0), snapshot.policy(1), snapshot.policy(2, window=5)]
+    >>> [same(experiment.policy.get_state(), policy.get_state()) for experiment, policy in zip(experiments, restored)]
+    [True, True, True]
+    >>> [same(experiment.environment.get_state(), snapshot.environment(i).get_state())
+    ...  for i, experiment in enumerate(experiments)]
+    [True, True, True]
+    """
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.arm_offsets = arrays['arm_offsets']
+        self.keys = list(zip(arrays['ids'].tolist(), arrays['product_types'].tolist()))
+        self._products = {key: i for i, key in enumerate(self.keys)}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        return "{}(nbProducts: {}, nbArms: {})".format(self.__class__.__name__, len(self), self.arm_offsets[-1])
+
+    def product(self, id, product_type):
+        """
+        Returns the position of a product in the snapshot
+        :param id:
+        :param product_type:
+        :return: int
+        """
+        return self._products[(id, product_type)]
+
+    def _unpack(self, prefix, i):
+        """
+        Slices the state of the i-th product
+        :param prefix:
+        :param i:
+        :return: dict
+        """
+        state = {}
+        start, stop = self.arm_offsets[i], self.arm_offsets[i + 1]
+        for field, kind in zip(self.arrays[prefix + 'fields'].tolist(), self.arrays[prefix + 'kinds'].tolist()):
+            present = self.arrays.get(prefix + field + '_present')
+            if present is not None and not present[i]:
+                continue
+            values = self.arrays[prefix + field]
+            if kind == PRODUCT:
+                state[field] = values[i]
+            elif kind == ARM:
+                state[field] = values[start:stop]
+            else:
+                offsets = self.arrays[prefix + field + '_offsets']
+                state[field] = values[offsets[i]:offsets[i + 1]]
+        return state
+
+    def policy_state(self, i):
+        """
+        Returns the state of the policy of the i-th product
+        :param i:
+        :return: dict
+        """
+        return self._unpack('policy_', i)
+
+    def environment_state(self, i):
+        """
+        Returns the statistics of the arms of the i-th product
+        :param i:
+        :return: dict
+        """
+        return self._unpack('environment_', i)
+
+    def policy(self, i, **params):
+        """
+        Creates the policy of the i-th product and restores its state
+        :param i:
+        :param params: parameters of the policy, as in the config of the experiment
+        :return: BasePolicy
+        """
+        policy_algorithm = getattr(policies, self.arrays['archtypes'][i])
+        policy = policy_algorithm(int(self.arm_offsets[i + 1] - self.arm_offsets[i]), **params)
+        policy.set_state(self.policy_state(i))
+        return policy
+
+    def environment(self, i):
+        """
+        Creates the MAB of the i-th product from its saved statistics
+        :param i:
+        :return: MAB
+        """
+        return MAB(self.environment_state(i))
+
+
+# --- Debugging
+if __name__ == "__main__":
+    # Code for debugging purposes.
+    from doctest import testmod
+    print("\nTesting automatically all the docstring written in each functions of this module :")
+    testmod(verbose=True)
@@ -1,29 +1,331 @@
 """
 Utility for data transformations
 """
-from core.scripts.setup import PROJECT_ROOT, PATH_SAMPLE_DATA_FILES
+from core.scripts.setup import PROJECT_ROOT, PATH_SAMPLE_DATA_FILES, PATH_TEMP_DIR
 from definitions import  DATA_SOURCE_DISK
+import numpy as np
 import pandas as pd
 from core.utils.logger_util import get_logger
+from core.utils.instrumentation_util import count, timed
 import os
 
 logger = get_logger()
 
+#: Format of the ``date`` column of the demand history
+DATE_FORMAT = '%d-%m-%y'
 
-def get_demand_history(f_name, data_source=DATA_SOURCE_DISK):
+#: Types of the columns of the demand history, the dates being parsed apart with DATE_FORMAT
+DEMAND_DTYPES = {
+    'id': 'category',
+    'product_type': 'category',
+    'placement_id': np.int8,
+    'consumption': np.int32,
+    'placment_name': 'category',
+}
+
+#: Number of rows of each chunk read by iter_demand_history
+DEFAULT_CHUNK_SIZE = 100000
+
+#: Directory of the columnar caches of the demand histories, one sub-directory per file
+PATH_DEMAND_CACHE = os.path.join(PATH_TEMP_DIR, 'demand_cache')
+
+#: Demand stores already built in this process, keyed by ``(f_name, data_source)``
+_demand_stores = {}
+
+
+def to_cutoff_date(date):
+    """
+    Converts an "as of" date to a numpy datetime, strings being day first as written by the config files
+    :param date: str, datetime or None
+    :return: numpy.datetime64 or None
+    """
+    if date is None:
+        return None
+    if isinstance(date, str):
+        return pd.to_datetime(date, dayfirst=True).to_datetime64()
+    return pd.Timestamp(date).to_datetime64()
+
+
+class DemandIndex(object):
+    """
+    Columnar demand history, grouped by ``(id, product_type, placement_id)``
+
+    - The rows are sorted once by product, placement id and date, so the consumption of every group is a contiguous
+      slice of :attr:`consumption` between two entries of :attr:`offsets`,
+    - Inside a group the rows are sorted by date, an "as of" cutoff is a binary search,
+    - The arrays are read-only, the slices returned are views and can be shared by the arms without copying.
+    """
+
+    def __init__(self, data, dates=None):
+        if dates is None:
+            dates = data['date']
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, format=DATE_FORMAT)
+        product_codes = data.groupby(['id', 'product_type'], sort=False, observed=True).ngroup().values
+        placement_ids = data['placement_id'].values
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+
+        order = np.lexsort((dates, placement_ids, product_codes))
+        product_codes = product_codes[order]
+        placement_ids = placement_ids[order]
+        #: Consumption of every row, contiguous for each group
+        self.consumption = np.ascontiguousarray(data['consumption'].values[order])
+        #: Date of every row, sorted inside each group
+        self.dates = dates[order]
+
+        # One pass to find where a group starts
+        if len(order) > 0:
+            starts = np.flatnonzero(np.r_[True, (np.diff(product_codes) != 0) | (np.diff(placement_ids) != 0)])
+        else:
+            starts = np.zeros(0, dtype=int)
+        #: Start of each group in the arrays, with a last entry being the number of rows
+        self.offsets = np.append(starts, len(order))
+
+        products = data[['id', 'product_type']].drop_duplicates().values
+        #: ``(id, product_type, placement_id)`` of each group
+        self.keys = []
+        self._groups = {}
+        self._placements = {}
+        for group, start in enumerate(starts):
+            key = tuple(products[product_codes[start]])
+            self.keys.append(key + (placement_ids[start],))
+            self._groups[self.keys[-1]] = group
+            self._placements.setdefault(key, []).append(placement_ids[start])
+
+        self.consumption.setflags(write=False)
+        self.dates.setflags(write=False)
+        self.offsets.setflags(write=False)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def products(self):
+        """
+        Returns the ``(id, product_type)`` of the products in the index
+        :return: list
+        """
+        return list(self._placements)
+
+    def placement_ids(self, id, product_type):
+        """
+        Returns the placement ids having a demand history for the product, in increasing order
+        :param id:
+        :param product_type:
+        :return: list
+        """
+        return list(self._placements.get((id, product_type), []))
+
+    def bounds(self, id, product_type, placement_id, date=None):
+        """
+        Returns the start and stop of the rows of the group, up to the date (included)
+        :param id:
+        :param product_type:
+        :param placement_id:
+        :param date: "as of" date, or None for the whole history
+        :return: tuple
+        """
+        group = self._groups.get((id, product_type, placement_id))
+        if group is None:
+            return 0, 0
+        start, stop = self.offsets[group], self.offsets[group + 1]
+        cutoff = to_cutoff_date(date)
+        if cutoff is not None:
+            stop = start + np.searchsorted(self.dates[start:stop], cutoff, side='right')
+        return start, stop
+
+    def consumption_slice(self, id, product_type, placement_id, date=None):
+        """
+        Returns a view on the consumption of the product at the placement id, up to the date (included)
+        :param id:
+        :param product_type:
+        :param placement_id:
+        :param date: "as of" date, or None for the whole history
+        :return: numpy.ndarray
+        """
+        start, stop = self.bounds(id, product_type, placement_id, date)
+        return self.consumption[start:stop]
+
+    def dates_slice(self, id, product_type, placement_id, date=None):
+        """
+        Returns a view on the dates of the product at the placement id, up to the date (included)
+        :param id:
+        :param product_type:
+        :param placement_id:
+        :param date: "as of" date, or None for the whole history
+        :return: numpy.ndarray
+        """
+        start, stop = self.bounds(id, product_type, placement_id, date)
+        return self.dates[start:stop]
+
+
+class DemandStore(object):
+    """
+    In-memory demand history, read and date-parsed once, indexed by ``(id, product_type, placement_id)``
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.index = DemandIndex(data)
+
+    def placement_ids(self, id, product_type):
+        """
+        Returns the placement ids having a demand history for the product
+        :param id:
+        :param product_type:
+        :return: list
+        """
+        return self.index.placement_ids(id, product_type)
+
+    # The date filtering of the history, for get_historical_demand_by_price and the experiments
+    @timed('DemandStore.consumption')
+    def consumption(self, id, product_type, placement_id, date):
+        """
+        Returns the consumption of the product at the placement id, up to the date (included)
+        :param id:
+        :param product_type:
+        :param placement_id:
+        :param date:
+        :return: numpy.ndarray, a read-only view on the index
+        """
+        return self.index.consumption_slice(id, product_type, placement_id, date)
+
+
+def get_demand_store(f_name, data_source=DATA_SOURCE_DISK, cache=False):
+    """
+    Returns the demand store of the historical data, built on first use and shared by the whole process
+    :param data_source: local or bq
+    :param f_name:
+    :param cache: whether to read the history through its columnar cache, see get_demand_history
+    :return: DemandStore
+    """
+    key = (f_name, data_source)
+    if key not in _demand_stores:
+        _demand_stores[key] = DemandStore(get_demand_history(f_name, data_source, cache=cache))
+    return _demand_stores[key]
+
+
+def set_demand_history(data, f_name, data_source=DATA_SOURCE_DISK):
+    """
+    Builds the demand store of a history already in memory (eg. synthetic data), used in place of the data source by
+    the next calls of get_demand_store
+    :param data: dataframe, typed and with the dates parsed as by read_demand_csv
+    :param f_name:
+    :param data_source: local or bq
+    :return: DemandStore
+    """
+    _demand_stores[(f_name, data_source)] = DemandStore(data)
+    return _demand_stores[(f_name, data_source)]
+
+
+def clear_demand_store():
+    """
+    Drops every demand store, so that the next call re-reads the data source
+    :return: None
+    """
+    _demand_stores.clear()
+
+
+def read_demand_csv(path, **kwargs):
+    """
+    Reads a demand history csv with the types of DEMAND_DTYPES, the dates being parsed once with DATE_FORMAT
+    :param path: csv file
+    :param kwargs: other arguments of pandas.read_csv
+    :return: dataframe
+    """
+    data = pd.read_csv(path, dtype=DEMAND_DTYPES, **kwargs)
+    data['date'] = pd.to_datetime(data['date'], format=DATE_FORMAT)
+    return data
+
+
+def iter_demand_history(f_name, data_source=DATA_SOURCE_DISK, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Reads the historical data chunk by chunk, each chunk being typed as by read_demand_csv, so that the whole table is
+    never in memory (eg. to fold it into ArmStatistics)
+    :param f_name:
+    :param data_source: local or bq
+    :param chunksize: number of rows of each chunk
+    :return: iterator of dataframes
+    """
+    if data_source == DATA_SOURCE_DISK:
+        csv_path = os.path.join(PATH_SAMPLE_DATA_FILES, f_name) + ".csv"
+        # TextFileReader is only a context manager from pandas 1.2
+        reader = pd.read_csv(csv_path, dtype=DEMAND_DTYPES, chunksize=chunksize)
+        try:
+            for chunk in reader:
+                count('rows_scanned', len(chunk))
+                chunk['date'] = pd.to_datetime(chunk['date'], format=DATE_FORMAT)
+                yield chunk
+        finally:
+            reader.close()
+
+
+def save_demand_cache(data, path):
+    """
+    Writes a typed demand history as a columnar cache: a directory with one ``.npy`` file per column, the categorical
+    columns being saved as their codes and their categories
+    :param data: dataframe, as read by read_demand_csv
+    :param path: directory of the cache
+    :return: None
+    """
+    os.makedirs(path, exist_ok=True)
+    for column in data.columns:
+        values = data[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(path, column + '.codes.npy'), values.cat.codes.values)
+            np.save(os.path.join(path, column + '.categories.npy'), np.asarray(values.cat.categories, dtype=str))
+        else:
+            np.save(os.path.join(path, column + '.npy'), values.values)
+    # The list of the columns is written last, a cache without it is incomplete
+    np.save(os.path.join(path, 'columns.npy'), np.asarray(data.columns, dtype=str))
+
+
+def load_demand_cache(path, mmap_mode='r'):
+    """
+    Reads a columnar cache written by save_demand_cache, the columns being memory-mapped (read-only) by default, so
+    only the pages that are used are read from the disk
+    :param path: directory of the cache
+    :param mmap_mode: mode of numpy.load, None to read the columns in memory
+    :return: dataframe
+    """
+    columns = {}
+    for column in np.load(os.path.join(path, 'columns.npy')).tolist():
+        codes = os.path.join(path, column + '.codes.npy')
+        if os.path.isfile(codes):
+            columns[column] = pd.Categorical.from_codes(
+                np.load(codes, mmap_mode=mmap_mode), np.load(os.path.join(path, column + '.categories.npy')))
+        else:
+            columns[column] = np.load(os.path.join(path, column + '.npy'), mmap_mode=mmap_mode)
+    return pd.DataFrame(columns, copy=False)
+
+
+@timed('get_demand_history')
+def get_demand_history(f_name, data_source=DATA_SOURCE_DISK, cache=False):
     """
-    Returns the historical data
+    Returns the historical data, typed with DEMAND_DTYPES and the dates parsed
     :param data_source: local or bq
     :param f_name:
+    :param cache: whether to go through the columnar cache of PATH_DEMAND_CACHE, which is (re)built when it is older
+    than the csv file, and memory-mapped otherwise
     :return: dataframe
     """
     data = None
     if data_source == DATA_SOURCE_DISK:
         # print('-- Reading data from {} csv'.format(f_name))
-        data = pd.read_csv(os.path.join(PATH_SAMPLE_DATA_FILES, f_name) + ".csv")
+        csv_path = os.path.join(PATH_SAMPLE_DATA_FILES, f_name) + ".csv"
+        if not cache:
+            data = read_demand_csv(csv_path)
+        else:
+            cache_path = os.path.join(PATH_DEMAND_CACHE, f_name)
+            columns_path = os.path.join(cache_path, 'columns.npy')
+            if not os.path.isfile(columns_path) or os.path.getmtime(columns_path) < os.path.getmtime(csv_path):
+                logger.info(f'Building the demand cache of {f_name}')
+                save_demand_cache(read_demand_csv(csv_path), cache_path)
+            data = load_demand_cache(cache_path)
+        count('rows_scanned', len(data))
     return data
 
 
+@timed('get_historical_demand_by_price')
 def get_historical_demand_by_price(f_name, id, product_type, date, data_source=DATA_SOURCE_DISK):
     """
     Returns historical credit consumption for each price level
@@ -37,13 +339,13 @@ def get_historical_demand_by_price(f_name, id, product_type, date, data_source=D
     :return: dict
     """
 
-    data = get_demand_history(f_name, data_source)
+    store = get_demand_store(f_name, data_source)
 
-    filtered_df = data[(data['id'] == id) &
-                       (data['product_type'] == product_type) &
-                       (pd.to_datetime(data['date']) <= date)][['placement_id', 'consumption']]
-    placementid_demand_dict = filtered_df.groupby('placement_id')['consumption'].apply(list).reset_index(
-        name='consumed').set_index('placement_id').T.to_dict()
+    placementid_demand_dict = {}
+    for placement_id in store.placement_ids(id, product_type):
+        consumed = store.consumption(id, product_type, placement_id, date)
+        if len(consumed) > 0:
+            placementid_demand_dict[placement_id] = {'consumed': consumed.tolist()}
 
     return placementid_demand_dict
 